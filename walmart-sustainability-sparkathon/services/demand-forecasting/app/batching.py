@@ -0,0 +1,93 @@
+import asyncio
+from collections import Counter, defaultdict
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+
+class PredictionCoalescer:
+    """
+    Micro-batches concurrent single-row predictions.
+
+    Requests awaiting predict() are queued on the event loop. The queue is flushed when it
+    reaches max_batch_size or window_seconds after its first request arrived, whichever comes
+    first. Each flush runs one vectorized predict_fn(model, matrix) call per model version in a
+    worker thread, so the event loop keeps accepting requests meanwhile, and the results are
+    handed back to the waiting requests. Must only be used from a single event loop.
+    """
+
+    def __init__(self, predict_fn: Callable, window_seconds: float = 0.002, max_batch_size: int = 256):
+        self.predict_fn = predict_fn
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: List[Tuple[object, np.ndarray, asyncio.Future]] = []
+        self._timer = None
+        self._running = set()
+        self.batch_sizes = Counter()  # batch size -> number of model calls with that size
+
+    async def predict(self, loaded, row: np.ndarray):
+        """Queues one feature row for `loaded` (a LoadedModel) and waits for its prediction."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((loaded, row, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Rows queued just around a model swap may belong to different versions
+        by_version = defaultdict(list)
+        for loaded, row, future in batch:
+            by_version[loaded.version].append((loaded, row, future))
+        for group in by_version.values():
+            task = asyncio.ensure_future(self._run(group))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, group):
+        self.batch_sizes[len(group)] += 1
+        model = group[0][0].model
+        matrix = np.stack([row for _, row, _ in group])
+        try:
+            predictions = await asyncio.to_thread(self.predict_fn, model, matrix)
+        except Exception as e:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), prediction in zip(group, predictions.tolist()):
+            if not future.done():  # The client may have gone away
+                future.set_result(prediction)
+
+    def stats(self) -> dict:
+        batches = sum(self.batch_sizes.values())
+        rows = sum(size * count for size, count in self.batch_sizes.items())
+        # Power-of-two buckets: "1", "2", "3-4", "5-8", ...
+        histogram = Counter()
+        for size, count in self.batch_sizes.items():
+            upper = 1 << (size - 1).bit_length()
+            lower = upper // 2 + 1 if upper > 1 else 1
+            histogram[(lower, upper)] += count
+        return {
+            "window_seconds": self.window_seconds,
+            "max_batch_size": self.max_batch_size,
+            "batches": batches,
+            "rows": rows,
+            "mean_batch_size": rows / batches if batches else 0.0,
+            "max_observed_batch_size": max(self.batch_sizes, default=0),
+            "batch_size_histogram": {
+                (str(lower) if lower == upper else f"{lower}-{upper}"): count
+                for (lower, upper), count in sorted(histogram.items())
+            }
+        }
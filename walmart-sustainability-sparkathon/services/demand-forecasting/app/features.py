@@ -0,0 +1,83 @@
+import numpy as np
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+
+# Column order must be the same as during training (see create_model.py)
+FEATURE_COLUMNS = ['store_id', 'product_id', 'is_weekend', 'is_holiday', 'promotion_applied', 'day_of_year', 'month', 'year', 'day_of_week']
+
+
+def date_range(start_date: date, end_date: date) -> np.ndarray:
+    """Inclusive daily range as a datetime64[D] array."""
+    return np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1, dtype='datetime64[D]')
+
+
+def date_features(dates: np.ndarray) -> dict:
+    """
+    Derives the calendar features the model is trained on (create_model.py) and served with,
+    straight from datetime64 values. Matches pandas' .dt dayofyear/month/year/dayofweek.
+    """
+    days = dates.astype('datetime64[D]')
+    years = days.astype('datetime64[Y]')
+    months = days.astype('datetime64[M]')
+    # 1970-01-01 was a Thursday; shift so Monday == 0 like pandas' dayofweek
+    day_of_week = (days.astype(np.int64) + 3) % 7
+    return {
+        'day_of_year': (days - years.astype('datetime64[D]')).astype(np.int64) + 1,
+        'month': months.astype(np.int64) % 12 + 1,
+        'year': years.astype(np.int64) + 1970,
+        'day_of_week': day_of_week,
+        # Same rule as generate_dataset.py: Saturday and Sunday
+        'is_weekend': (day_of_week >= 5).astype(np.int64),
+    }
+
+
+def build_grid_chunks(store_ids: List[int], product_ids: List[int], dates: np.ndarray,
+                      holidays: Optional[List[date]] = None,
+                      promotions: Optional[list] = None,
+                      chunk_rows: int = 100_000) -> Iterator[Tuple[np.ndarray, np.ndarray, int, np.ndarray]]:
+    """
+    Expands store x product x date into model-ready feature matrices, a block of series at a time.
+
+    Yields (series_store_ids, series_product_ids, first_day, matrix) where the matrix holds one
+    row per (series, date) pair for the dates from index first_day on, series-major, with columns
+    in FEATURE_COLUMNS order. A block covers whole series while they fit in chunk_rows; longer
+    series are split into consecutive day ranges, one series per block. Only one block is
+    materialized at a time, so memory is bounded by chunk_rows regardless of the grid size.
+    """
+    stores = np.asarray(store_ids, dtype=np.int64)
+    products = np.asarray(product_ids, dtype=np.int64)
+    n_days = len(dates)
+    n_series = len(stores) * len(products)
+
+    # Calendar features are shared by every series, so they are computed once
+    calendar = date_features(dates)
+    is_holiday = np.isin(dates, np.array(holidays or [], dtype='datetime64[D]')).astype(np.int64)
+
+    days_per_chunk = max(1, min(n_days, chunk_rows))
+    series_per_chunk = max(1, chunk_rows // days_per_chunk)
+    for first in range(0, n_series, series_per_chunk):
+        series = np.arange(first, min(first + series_per_chunk, n_series))
+        chunk_stores = stores[series // len(products)]
+        chunk_products = products[series % len(products)]
+
+        for first_day in range(0, n_days, days_per_chunk):
+            days = slice(first_day, first_day + days_per_chunk)
+            chunk_dates = dates[days]
+            promoted = np.zeros((len(series), len(chunk_dates)), dtype=bool)
+            for promo in promotions or []:
+                in_window = (chunk_dates >= np.datetime64(promo.start_date, 'D')) & (chunk_dates <= np.datetime64(promo.end_date, 'D'))
+                matches = np.ones(len(series), dtype=bool)
+                if promo.store_id is not None:
+                    matches &= chunk_stores == promo.store_id
+                if promo.product_id is not None:
+                    matches &= chunk_products == promo.product_id
+                promoted |= matches[:, None] & in_window[None, :]
+
+            values = {column: feature[days] for column, feature in calendar.items()}
+            values.update(store_id=chunk_stores[:, None], product_id=chunk_products[:, None],
+                          is_holiday=is_holiday[days], promotion_applied=promoted)
+            matrix = np.empty((len(series), len(chunk_dates), len(FEATURE_COLUMNS)), dtype=np.float32)
+            for i, column in enumerate(FEATURE_COLUMNS):
+                matrix[:, :, i] = values[column]
+
+            yield chunk_stores, chunk_products, first_day, matrix.reshape(-1, len(FEATURE_COLUMNS))
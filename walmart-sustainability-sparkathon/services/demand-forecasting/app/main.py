@@ -1,13 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .models import PredictionFeatures # <-- Updated import
-import joblib
-import pandas as pd
+from fastapi.responses import StreamingResponse
+from .models import PredictionFeatures, BatchPredictionRequest, ForecastGridRequest
+from .features import FEATURE_COLUMNS, date_range, build_grid_chunks
+from .model_manager import default_model_manager
+from .cache import PredictionCache
+from .batching import PredictionCoalescer
+import json
+import numpy as np
 import os
 from fastapi.middleware.cors import CORSMiddleware
 
+# Serves the registry's active model version (or models/demand_model.ubj if the registry is empty)
+# and swaps to newly registered or pinned versions in the background.
+model_manager = default_model_manager()
+model_manager.refresh()
+
+# Repeated single-row predictions (e.g. dashboards polling the same store/product/date)
+# are answered from here; entries are keyed on the model version and dropped on every swap.
+prediction_cache = PredictionCache(
+    max_size=int(os.environ.get('PREDICTION_CACHE_SIZE', '10000')),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL_SECONDS', '300'))
+)
+model_manager.add_swap_listener(lambda loaded: prediction_cache.clear())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_manager.start()
+    yield
+    model_manager.stop()
+
+
 app = FastAPI(
     title="Walmart Demand Forecasting API",
-    description="An innovative API using ML to predict stock requirements, reducing waste and optimizing logistics."
+    description="An innovative API using ML to predict stock requirements, reducing waste and optimizing logistics.",
+    lifespan=lifespan
 )
 
 origins = [
@@ -22,13 +50,100 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-model_path = os.path.join(os.path.dirname(__file__), '..', 'models', 'demand_model.pkl')
-model = joblib.load(model_path)
+# Rows scored per model call when expanding a forecast grid
+GRID_CHUNK_ROWS = 100_000
+
+
+def _rows_to_matrix(rows) -> np.ndarray:
+    """Builds the FEATURE_COLUMNS-ordered model input straight from PredictionFeatures rows."""
+    return np.array([[getattr(row, column) for column in FEATURE_COLUMNS] for row in rows],
+                    dtype=np.float32).reshape(-1, len(FEATURE_COLUMNS))
+
+
+def _batch_to_matrix(batch: BatchPredictionRequest) -> np.ndarray:
+    """Builds the model input from either the row or the columnar form of a batch."""
+    if (batch.rows is None) == (batch.columns is None):
+        raise ValueError("Provide exactly one of 'rows' or 'columns'.")
+
+    if batch.rows is not None:
+        return _rows_to_matrix(batch.rows)
+
+    columns = [getattr(batch.columns, column) for column in FEATURE_COLUMNS]
+    if len({len(values) for values in columns}) > 1:
+        raise ValueError("All columns must have the same length.")
+    return np.array(columns, dtype=np.float32).T.reshape(-1, len(FEATURE_COLUMNS))
+
+
+def _predict_matrix(model, matrix: np.ndarray) -> np.ndarray:
+    """Scores every row of a FEATURE_COLUMNS-ordered matrix in a single vectorized XGBoost call."""
+    if len(matrix) == 0:
+        return np.empty(0, dtype=np.int64)
+    return model.predict(matrix).astype(np.int64)
+
+
+def _stream_grid(request: ForecastGridRequest, dates: np.ndarray, loaded):
+    """
+    Yields the grid forecast as newline-delimited JSON: a header with the dates, one line
+    per store/product series, then the per-store, per-product and overall totals.
+    Repeated store or product IDs are forecast (and counted in the totals) once.
+    """
+    store_ids = list(dict.fromkeys(request.store_ids))
+    product_ids = list(dict.fromkeys(request.product_ids))
+    yield json.dumps({
+        "start_date": request.start_date.isoformat(),
+        "end_date": request.end_date.isoformat(),
+        "dates": [str(d) for d in dates],
+        "series_count": len(store_ids) * len(product_ids),
+        "model_version": loaded.version
+    }) + "\n"
+
+    store_totals = {store_id: 0 for store_id in store_ids}
+    product_totals = {product_id: 0 for product_id in product_ids}
+    chunks = build_grid_chunks(store_ids, product_ids, dates,
+                               holidays=request.holidays, promotions=request.promotions,
+                               chunk_rows=GRID_CHUNK_ROWS)
+    pending = [] # Predictions so far of a series split across chunks by day range
+    for stores, products, first_day, matrix in chunks:
+        predictions = _predict_matrix(loaded.model, matrix).reshape(len(stores), -1)
+        if first_day + predictions.shape[1] < len(dates): # More of this series follows
+            pending.append(predictions)
+            continue
+        if pending:
+            predictions = np.concatenate(pending + [predictions], axis=1)
+            pending = []
+        series_totals = predictions.sum(axis=1)
+        lines = []
+        for store_id, product_id, series, total in zip(stores.tolist(), products.tolist(),
+                                                       predictions.tolist(), series_totals.tolist()):
+            store_totals[store_id] += total
+            product_totals[product_id] += total
+            lines.append(json.dumps({
+                "store_id": store_id,
+                "product_id": product_id,
+                "predicted_sales": series,
+                "total": total
+            }))
+        yield "\n".join(lines) + "\n"
+
+    yield json.dumps({
+        "store_totals": store_totals,
+        "product_totals": product_totals,
+        "grand_total": sum(store_totals.values())
+    }) + "\n"
+
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the AI-Powered Demand Forecasting API"}
 
+# Concurrent single-row requests that miss the cache are scored together in one model call,
+# in a worker thread so the event loop is never blocked by XGBoost
+prediction_coalescer = PredictionCoalescer(
+    _predict_matrix,
+    window_seconds=float(os.environ.get('COALESCE_WINDOW_MS', '2')) / 1000,
+    max_batch_size=int(os.environ.get('COALESCE_MAX_BATCH', '256'))
+)
+
 # The endpoint is now updated to accept the new feature set
 @app.post("/predict_daily_sales")
 async def predict_daily_sales(features: PredictionFeatures):
@@ -36,18 +151,108 @@ async def predict_daily_sales(features: PredictionFeatures):
     Predicts the daily sales for a single day based on a rich feature set.
     """
     try:
-        # Create a DataFrame from the input features that matches the model's training columns
-        feature_df = pd.DataFrame([features.dict()])
-        
-        # Ensure the column order is the same as during training
-        training_columns = ['store_id', 'product_id', 'is_weekend', 'is_holiday', 'promotion_applied', 'day_of_year', 'month', 'year', 'day_of_week']
-        feature_df = feature_df[training_columns]
-
-        prediction = model.predict(feature_df)
-        
+        loaded = model_manager.current
+        cache_key = (loaded.version,) + tuple(getattr(features, column) for column in FEATURE_COLUMNS)
+        prediction = prediction_cache.get(cache_key)
+        if prediction is None:
+            prediction = await prediction_coalescer.predict(loaded, _rows_to_matrix([features])[0])
+            prediction_cache.put(cache_key, prediction)
+
         # Return the prediction
         return {
-            "predicted_sales": int(prediction[0])
+            "predicted_sales": prediction,
+            "model_version": loaded.version
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+# Plain def: FastAPI runs it in the threadpool, keeping the vectorized predict off the event loop
+@app.post("/predict_daily_sales/batch")
+def predict_daily_sales_batch(batch: BatchPredictionRequest):
+    """
+    Predicts daily sales for many rows at once, e.g. every store x product x day of a horizon.
+    Accepts a list of feature rows or a columnar payload and returns the predictions in input order.
+    """
+    try:
+        loaded = model_manager.current
+        predictions = _predict_matrix(loaded.model, _batch_to_matrix(batch)).tolist()
+
+        return {
+            "count": len(predictions),
+            "predicted_sales": predictions,
+            "model_version": loaded.version
         }
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+@app.post("/forecast_grid")
+async def forecast_grid(request: ForecastGridRequest):
+    """
+    Forecasts every store x product x day in the requested date range.
+    Calendar features are derived server-side; results are streamed as NDJSON, chunk by chunk.
+    """
+    try:
+        if not request.store_ids or not request.product_ids:
+            raise ValueError("'store_ids' and 'product_ids' must not be empty.")
+        if request.end_date < request.start_date:
+            raise ValueError("'end_date' must not be before 'start_date'.")
+
+        dates = date_range(request.start_date, request.end_date)
+        return StreamingResponse(_stream_grid(request, dates, model_manager.current), media_type="application/x-ndjson")
+    except Exception as e:
+        return {"error": str(e)}
+
+# --- Model registry ---
+
+def _registry_status():
+    registry = model_manager.registry
+    return {
+        "active_version": model_manager.current.version,
+        "pinned_version": registry.pinned_version(),
+        "versions": [registry.metadata(version) for version in registry.versions()]
+    }
+
+@app.get("/models")
+def list_models():
+    """Lists the registered model versions and which one is being served."""
+    return _registry_status()
+
+@app.post("/models/{version}/pin")
+def pin_model(version: str):
+    """Serves the given version until unpinned, even if newer versions are registered."""
+    try:
+        model_manager.registry.pin(version)
+        model_manager.refresh()
+        return _registry_status()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.delete("/models/pin")
+def unpin_model():
+    """Goes back to serving the newest registered version."""
+    try:
+        model_manager.registry.unpin()
+        model_manager.refresh()
+        return _registry_status()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.post("/models/rollback")
+def rollback_model():
+    """Pins the version registered just before the one currently active."""
+    try:
+        model_manager.registry.rollback()
+        model_manager.refresh()
+        return _registry_status()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and occupancy of the single-row prediction cache."""
+    return prediction_cache.stats()
+
+@app.get("/batching/stats")
+def batching_stats():
+    """Batch-size distribution of the single-row request coalescer."""
+    return prediction_coalescer.stats()
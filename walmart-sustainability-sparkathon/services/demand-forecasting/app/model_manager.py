@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, List, NamedTuple, Optional
+
+from .native_model import NativeBoosterModel
+from .registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+LEGACY_VERSION = 'legacy'
+
+
+class LoadedModel(NamedTuple):
+    version: str
+    model: Any
+    metadata: dict
+
+
+class ModelManager:
+    """
+    Keeps the model being served in sync with the registry's active version.
+
+    Requests read `current` once and use that snapshot, so a swap never changes the model
+    under a request in flight. New versions are loaded on a background thread and swapped
+    in with a single reference assignment. If the registry is empty, the standalone
+    demand_model.ubj is served as version 'legacy'. Only the native format is served; models
+    saved only as pickles are converted offline with convert_models.py.
+    """
+
+    def __init__(self, registry: ModelRegistry, legacy_model_path: str, poll_interval: float = 10.0):
+        self.registry = registry
+        self.legacy_model_path = legacy_model_path
+        self.poll_interval = poll_interval
+        self.current: Optional[LoadedModel] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._swap_listeners: List[Callable[[LoadedModel], None]] = []
+
+    def add_swap_listener(self, listener: Callable[[LoadedModel], None]):
+        """Registers a callback run after every model swap, e.g. to drop cached predictions."""
+        self._swap_listeners.append(listener)
+
+    def _load(self, version: str) -> LoadedModel:
+        if version == LEGACY_VERSION:
+            native_path = os.path.splitext(self.legacy_model_path)[0] + '.ubj'
+            if not os.path.exists(native_path):
+                raise FileNotFoundError(
+                    f"{native_path} not found; train a model or run convert_models.py on {self.legacy_model_path}"
+                )
+            model = NativeBoosterModel(native_path)
+            return LoadedModel(LEGACY_VERSION, model, {"version": LEGACY_VERSION})
+        return LoadedModel(version, self.registry.load(version), self.registry.metadata(version))
+
+    def refresh(self) -> bool:
+        """Loads and swaps to the registry's active version if it changed. Returns True on a swap."""
+        with self._refresh_lock:
+            target = self.registry.active_version() or LEGACY_VERSION
+            if self.current is not None and self.current.version == target:
+                return False
+            loaded = self._load(target)
+            previous = self.current.version if self.current else None
+            self.current = loaded
+            logger.info("Serving model version %s (was %s)", target, previous)
+            for listener in self._swap_listeners:
+                listener(loaded)
+            return True
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the current model; the next poll will try again
+                logger.exception("Model refresh failed")
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, name="model-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def default_model_manager() -> ModelManager:
+    models_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
+    registry = ModelRegistry(os.environ.get('MODEL_REGISTRY_DIR', os.path.join(models_dir, 'registry')))
+    return ModelManager(
+        registry,
+        legacy_model_path=os.path.join(models_dir, 'demand_model.pkl'),
+        poll_interval=float(os.environ.get('MODEL_POLL_INTERVAL_SECONDS', '10'))
+    )
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+from datetime import date
 from pydantic import BaseModel
 
 # This new model matches the features our XGBoost model was trained on
@@ -12,4 +13,39 @@ class PredictionFeatures(BaseModel):
     day_of_year: int
     month: int
     year: int
-    day_of_week: int
\ No newline at end of file
+    day_of_week: int
+
+# Columnar form of PredictionFeatures: one list per feature, all of the same length.
+# Much smaller on the wire than repeating the field names for every row.
+class ColumnarPredictionFeatures(BaseModel):
+    store_id: List[int]
+    product_id: List[int]
+    is_weekend: List[int]
+    is_holiday: List[int]
+    promotion_applied: List[int]
+    day_of_year: List[int]
+    month: List[int]
+    year: List[int]
+    day_of_week: List[int]
+
+# Batch payload: send either `rows` or `columns`
+class BatchPredictionRequest(BaseModel):
+    rows: Optional[List[PredictionFeatures]] = None
+    columns: Optional[ColumnarPredictionFeatures] = None
+
+
+# A promotion running over a date range; leave store_id/product_id empty to apply it to all
+class PromotionWindow(BaseModel):
+    start_date: date
+    end_date: date
+    store_id: Optional[int] = None
+    product_id: Optional[int] = None
+
+# Server-side horizon forecast: every store x product x date in the range is scored
+class ForecastGridRequest(BaseModel):
+    store_ids: List[int]
+    product_ids: List[int]
+    start_date: date
+    end_date: date
+    holidays: List[date] = []
+    promotions: List[PromotionWindow] = []
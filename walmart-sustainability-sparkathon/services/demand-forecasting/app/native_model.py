@@ -0,0 +1,21 @@
+import numpy as np
+
+
+class NativeBoosterModel:
+    """
+    Prediction-only model loaded from XGBoost's native JSON/UBJSON format.
+
+    Loading a Booster directly skips unpickling the sklearn wrapper (and importing
+    scikit-learn and pandas with it), which keeps service start-up short. Like
+    XGBRegressor.predict, it only uses the trees up to the early-stopping best iteration.
+    """
+
+    def __init__(self, model_path: str):
+        import xgboost as xgb
+
+        self.booster = xgb.Booster(model_file=model_path)
+        best_iteration = self.booster.attr('best_iteration')
+        self._iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+
+    def predict(self, matrix: np.ndarray) -> np.ndarray:
+        return self.booster.inplace_predict(matrix, iteration_range=self._iteration_range)
@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from .native_model import NativeBoosterModel
+
+NATIVE_MODEL_FILE = 'model.ubj'
+MODEL_FILE = 'model.pkl'
+METADATA_FILE = 'metadata.json'
+PIN_FILE = 'PINNED'
+
+
+class ModelRegistry:
+    """
+    Small on-disk model registry.
+
+    Each version lives in its own directory (<root>/v0001, <root>/v0002, ...) holding the model
+    in XGBoost's native format, the pickled estimator, and a metadata.json (feature list, training
+    rows, validation RMSE, ...). Versions are written to a temporary directory and renamed into
+    place, so readers never see half a version.
+    The newest version is active unless a PINNED file names another one.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def versions(self) -> List[str]:
+        """All complete versions, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if name.startswith('v') and os.path.isfile(os.path.join(self.root, name, METADATA_FILE))
+        )
+
+    def register(self, model, metadata: dict) -> str:
+        """Stores a new model version and returns its name."""
+        os.makedirs(self.root, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+        os.chmod(staging_dir, 0o755)
+        try:
+            import joblib
+
+            model.get_booster().save_model(os.path.join(staging_dir, NATIVE_MODEL_FILE))
+            joblib.dump(model, os.path.join(staging_dir, MODEL_FILE))
+            while True:
+                existing = self.versions()
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+                metadata = dict(metadata, version=version,
+                                registered_at=datetime.now(timezone.utc).isoformat())
+                with open(os.path.join(staging_dir, METADATA_FILE), 'w') as f:
+                    json.dump(metadata, f, indent=2)
+                try:
+                    os.rename(staging_dir, self._version_dir(version))
+                    return version
+                except OSError:
+                    # Another trainer registered this version number first; take the next one
+                    if not os.path.exists(self._version_dir(version)):
+                        raise
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+    def metadata(self, version: str) -> dict:
+        with open(os.path.join(self._version_dir(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def load(self, version: str):
+        """
+        Loads a version for serving, from the native format. Versions registered before it was
+        saved need converting first (convert_models.py); serving never unpickles.
+        """
+        native_path = os.path.join(self._version_dir(version), NATIVE_MODEL_FILE)
+        if not os.path.exists(native_path):
+            raise FileNotFoundError(f"Version {version} has no {NATIVE_MODEL_FILE}; run convert_models.py")
+        return NativeBoosterModel(native_path)
+
+    def load_estimator(self, version: str):
+        """Loads the full pickled XGBRegressor, e.g. to continue training it (needs the training requirements)."""
+        import joblib
+
+        return joblib.load(os.path.join(self._version_dir(version), MODEL_FILE))
+
+    def pinned_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, PIN_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def pin(self, version: str) -> None:
+        """Serves the given version, regardless of newer registrations, until unpinned."""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version '{version}'.")
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".{PIN_FILE}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(self.root, PIN_FILE))
+
+    def unpin(self) -> None:
+        try:
+            os.remove(os.path.join(self.root, PIN_FILE))
+        except FileNotFoundError:
+            pass
+
+    def active_version(self) -> Optional[str]:
+        pinned = self.pinned_version()
+        if pinned in self.versions():
+            return pinned
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def rollback(self) -> str:
+        """Pins the version registered just before the active one and returns it."""
+        versions = self.versions()
+        active = self.active_version()
+        if active is None or versions.index(active) == 0:
+            raise ValueError("No earlier model version to roll back to.")
+        previous = versions[versions.index(active) - 1]
+        self.pin(previous)
+        return previous
@@ -0,0 +1,58 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Each snippet runs in a fresh interpreter: import what the service needs, load the model
+# and answer one prediction, i.e. the work done before a new replica can serve traffic.
+PICKLE_STARTUP = """
+import joblib
+import pandas as pd
+model = joblib.load('models/demand_model.pkl')
+row = {'store_id': 1, 'product_id': 2, 'is_weekend': 0, 'is_holiday': 0, 'promotion_applied': 1,
+       'day_of_year': 40, 'month': 2, 'year': 2024, 'day_of_week': 2}
+print(int(model.predict(pd.DataFrame([row]))[0]))
+"""
+
+NATIVE_STARTUP = """
+import numpy as np
+from app.native_model import NativeBoosterModel
+model = NativeBoosterModel('models/demand_model.ubj')
+print(int(model.predict(np.array([[1, 2, 0, 0, 1, 40, 2, 2024, 2]], dtype=np.float32))[0]))
+"""
+
+# The serving image only installs requirements.txt. Without scikit-learn present, importing
+# xgboost skips its sklearn integration too; emulate that when training deps are installed here.
+NATIVE_SERVING_IMAGE_STARTUP = "import sys\nsys.modules['sklearn'] = None\n" + NATIVE_STARTUP
+
+SNIPPETS = {
+    "pickle (joblib + sklearn wrapper + pandas)": PICKLE_STARTUP,
+    "native (UBJSON booster + numpy)": NATIVE_STARTUP,
+    "native, serving image (no scikit-learn)": NATIVE_SERVING_IMAGE_STARTUP,
+}
+
+
+def time_startup(snippet: str) -> (float, str):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', snippet], capture_output=True, text=True, check=True)
+    return time.perf_counter() - started, result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cold start of the pickle and native model paths.")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"--- Cold start to first prediction, median of {args.runs} runs ---")
+    for name, snippet in SNIPPETS.items():
+        time_startup(snippet)  # Warm the OS file cache
+        timings = []
+        for _ in range(args.runs):
+            elapsed, prediction = time_startup(snippet)
+            timings.append(elapsed)
+        print(f"{name:45s} {statistics.median(timings) * 1000:8.1f} ms  (prediction {prediction})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import argparse
+import os
+
+import joblib
+
+from app.registry import MODEL_FILE, NATIVE_MODEL_FILE, ModelRegistry
+
+
+def convert(pickle_path: str, native_path: str) -> bool:
+    """Writes the pickled estimator's booster in XGBoost's native format, if it isn't there yet."""
+    if os.path.exists(native_path) or not os.path.exists(pickle_path):
+        return False
+    joblib.load(pickle_path).get_booster().save_model(native_path)
+    print(f"Converted {pickle_path} -> {native_path}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Add the native (UBJSON) booster the API serves to models saved only as pickles. "
+                    "Needs the training requirements (requirements-train.txt)."
+    )
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--registry-dir', default=None, help="Defaults to <model-dir>/registry.")
+    args = parser.parse_args()
+
+    converted = convert(os.path.join(args.model_dir, 'demand_model.pkl'), os.path.join(args.model_dir, 'demand_model.ubj'))
+    registry = ModelRegistry(args.registry_dir or os.path.join(args.model_dir, 'registry'))
+    for version in registry.versions():
+        version_dir = os.path.join(registry.root, version)
+        converted += convert(os.path.join(version_dir, MODEL_FILE), os.path.join(version_dir, NATIVE_MODEL_FILE))
+    print(f"✅ {converted} model(s) converted")
+
+
+if __name__ == '__main__':
+    main()
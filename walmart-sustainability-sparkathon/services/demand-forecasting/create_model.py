@@ -1,53 +1,219 @@
+import argparse
+import os
+import tempfile
+
+import joblib
+import numpy as np
 import pandas as pd
 import xgboost as xgb
-import joblib
-import os
 
-print("--- Training Enterprise-Grade XGBoost Model ---")
+from app.features import FEATURE_COLUMNS, date_features
+from app.registry import ModelRegistry
 
-# Load the new dataset
-df = pd.read_csv('data/simulated_sales.csv')
-df['date'] = pd.to_datetime(df['date'])
+TARGET = 'daily_sales'
 
-# Feature Engineering
-df['day_of_year'] = df['date'].dt.dayofyear
-df['month'] = df['date'].dt.month
-df['year'] = df['date'].dt.year
-df['day_of_week'] = df['date'].dt.dayofweek
+# Downcast dtypes for the raw sales file; keeps chunks (and the in-memory path) small
+SALES_DTYPES = {
+    'store_id': 'int32',
+    'product_id': 'int32',
+    'daily_sales': 'float32',
+    'is_weekend': 'int8',
+    'is_holiday': 'int8',
+    'promotion_applied': 'int8',
+}
 
-# Define features (X) and target (y)
-features = ['store_id', 'product_id', 'is_weekend', 'is_holiday', 'promotion_applied', 'day_of_year', 'month', 'year', 'day_of_week']
-target = 'daily_sales'
+# These parameters are a starting point for a robust model
+XGB_PARAMS = {
+    'objective': 'reg:squarederror',
+    'learning_rate': 0.05,
+    'max_depth': 5,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'tree_method': 'hist',
+}
+NUM_BOOST_ROUND = 1000
+EARLY_STOPPING_ROUNDS = 50  # Prevents overfitting
 
-X = df[features]
-y = df[target]
 
-# Initialize and train the XGBoost Regressor model
-# These parameters are a starting point for a robust model
-xgb_model = xgb.XGBRegressor(
-    objective='reg:squarederror',
-    n_estimators=1000,
-    learning_rate=0.05,
-    max_depth=5,
-    subsample=0.8,
-    colsample_bytree=0.8,
-    n_jobs=-1,
-    early_stopping_rounds=50 # Prevents overfitting
-)
-
-print("Training model... This might take a moment.")
-# We need a validation set for early stopping
-from sklearn.model_selection import train_test_split
-X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
-
-xgb_model.fit(X_train, y_train,
-              eval_set=[(X_val, y_val)],
-              verbose=False)
-
-# Save the trained model
-model_dir = 'models'
-os.makedirs(model_dir, exist_ok=True)
-model_path = os.path.join(model_dir, 'demand_model.pkl')
-joblib.dump(xgb_model, model_path)
-
-print(f"✅ XGBoost model trained and saved to {model_path}")
\ No newline at end of file
+def prepare_features(df: pd.DataFrame):
+    """Feature Engineering: adds the calendar features and returns (X, y)."""
+    calendar = date_features(df['date'].to_numpy())
+    for column in ('day_of_year', 'month', 'year', 'day_of_week'):
+        df[column] = calendar[column].astype(np.int16)
+    return df[FEATURE_COLUMNS], df[TARGET]
+
+
+def read_sales(data_path: str, chunksize: int = None):
+    """
+    Reads the sales file with typed columns. With a chunksize, returns an iterator of DataFrames
+    so that only one chunk is in memory at a time. CSV and Parquet are both supported.
+    """
+    columns = ['date'] + list(SALES_DTYPES)
+    if data_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(data_path)
+        if chunksize is None:
+            return parquet_file.read(columns=columns).to_pandas().astype(SALES_DTYPES)
+        return (batch.to_pandas().astype(SALES_DTYPES)
+                for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns))
+
+    return pd.read_csv(data_path, usecols=columns, dtype=SALES_DTYPES, parse_dates=['date'], chunksize=chunksize)
+
+
+def validation_mask(n_rows: int, chunk_index: int, test_size: float, seed: int) -> np.ndarray:
+    """Deterministic per-chunk train/validation split, so every pass over the data agrees."""
+    return np.random.default_rng([seed, chunk_index]).random(n_rows) < test_size
+
+
+class SalesChunkIter(xgb.DataIter):
+    """Streams one side (train or validation) of the split to XGBoost's external-memory DMatrix."""
+
+    def __init__(self, data_path: str, chunksize: int, validation: bool,
+                 test_size: float, seed: int, cache_prefix: str):
+        self._data_path = data_path
+        self._chunksize = chunksize
+        self._validation = validation
+        self._test_size = test_size
+        self._seed = seed
+        self._chunks = None
+        self._chunk_index = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._chunks is None:
+            self._chunks = iter(read_sales(self._data_path, self._chunksize))
+
+        for chunk in self._chunks:
+            mask = validation_mask(len(chunk), self._chunk_index, self._test_size, self._seed)
+            self._chunk_index += 1
+            if not self._validation:
+                mask = ~mask
+            if not mask.any():
+                continue
+
+            X, y = prepare_features(chunk[mask].copy())
+            input_data(data=X, label=y)
+            return True
+        return False
+
+    def reset(self) -> None:
+        self._chunks = None
+        self._chunk_index = 0
+
+
+def load_existing_booster(registry: ModelRegistry, model_path: str):
+    """
+    Returns (version, booster) of the model to continue training from: the registry's
+    active version if there is one, otherwise the standalone demand_model.pkl.
+    """
+    version = registry.active_version()
+    if version:
+        print(f"Continuing training from registered model {version}")
+        return version, registry.load_estimator(version).get_booster()
+    print(f"Continuing training from {model_path}")
+    return None, joblib.load(model_path).get_booster()
+
+
+def train_in_memory(data_path: str, test_size: float, seed: int, init_booster=None):
+    # Load the new dataset
+    X, y = prepare_features(read_sales(data_path))
+
+    # Initialize and train the XGBoost Regressor model
+    xgb_model = xgb.XGBRegressor(
+        n_estimators=NUM_BOOST_ROUND,
+        n_jobs=-1,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        **XGB_PARAMS
+    )
+
+    print("Training model... This might take a moment.")
+    # We need a validation set for early stopping
+    from sklearn.model_selection import train_test_split
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=test_size, random_state=seed)
+
+    xgb_model.fit(X_train, y_train,
+                  eval_set=[(X_val, y_val)],
+                  xgb_model=init_booster,
+                  verbose=False)
+    print(f"Trained on {len(X_train)} rows, validation RMSE {xgb_model.best_score:.3f}")
+    return xgb_model, len(X_train)
+
+
+def train_external_memory(data_path: str, chunksize: int, test_size: float, seed: int,
+                          init_booster=None):
+    """Out-of-core training: XGBoost pages the chunks through an on-disk cache instead of RAM."""
+    with tempfile.TemporaryDirectory(prefix='xgb-cache-') as cache_dir:
+        train_iter = SalesChunkIter(data_path, chunksize, False, test_size, seed, os.path.join(cache_dir, 'train'))
+        val_iter = SalesChunkIter(data_path, chunksize, True, test_size, seed, os.path.join(cache_dir, 'val'))
+        dtrain = xgb.DMatrix(train_iter)
+        dval = xgb.DMatrix(val_iter)
+
+        print(f"Training model out-of-core in chunks of {chunksize} rows... This might take a moment.")
+        booster = xgb.train(
+            XGB_PARAMS, dtrain,
+            num_boost_round=NUM_BOOST_ROUND,
+            evals=[(dval, 'validation')],
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            xgb_model=init_booster,
+            verbose_eval=False
+        )
+        train_rows = dtrain.num_row()
+        print(f"Trained on {train_rows} rows, validation RMSE {booster.best_score:.3f}")
+        # Release the DMatrix pages before their cache directory is removed
+        del dtrain, dval
+
+    # Wrap the booster so the saved artifact is the same sklearn estimator the API loads
+    xgb_model = xgb.XGBRegressor()
+    xgb_model.load_model(bytearray(booster.save_raw('ubj')))
+    return xgb_model, train_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the demand forecasting XGBoost model.")
+    parser.add_argument('--data', default='data/simulated_sales.csv', help="Sales file (.csv or .parquet).")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--registry-dir', default=None, help="Model registry location (default: <model-dir>/registry).")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Train out-of-core, streaming the data in chunks of this many rows.")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue training the active registered model (or demand_model.pkl) on the given data instead of starting over.")
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("--- Training Enterprise-Grade XGBoost Model ---")
+
+    model_path = os.path.join(args.model_dir, 'demand_model.pkl')
+    registry = ModelRegistry(args.registry_dir or os.path.join(args.model_dir, 'registry'))
+    parent_version, init_booster = load_existing_booster(registry, model_path) if args.resume else (None, None)
+
+    if args.chunksize:
+        xgb_model, train_rows = train_external_memory(args.data, args.chunksize, args.test_size, args.seed, init_booster)
+    else:
+        xgb_model, train_rows = train_in_memory(args.data, args.test_size, args.seed, init_booster)
+
+    # Save the trained model: the sklearn estimator, plus the booster in XGBoost's native
+    # format, which the API loads much faster than the pickle
+    os.makedirs(args.model_dir, exist_ok=True)
+    joblib.dump(xgb_model, model_path)
+    xgb_model.get_booster().save_model(os.path.join(args.model_dir, 'demand_model.ubj'))
+
+    # Register it as a new version; a running API picks it up without a restart
+    version = registry.register(xgb_model, {
+        "features": FEATURE_COLUMNS,
+        "target": TARGET,
+        "training_rows": int(train_rows),
+        "validation_rmse": float(xgb_model.best_score),
+        "best_iteration": int(xgb_model.best_iteration),
+        "params": XGB_PARAMS,
+        "data_path": args.data,
+        "out_of_core": bool(args.chunksize),
+        "parent_version": parent_version
+    })
+
+    print(f"✅ XGBoost model trained and saved to {model_path} (registered as {version})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,51 +1,141 @@
-import pandas as pd
+import argparse
+import os
+from datetime import date
+
 import numpy as np
-from datetime import date, timedelta
-
-print("--- Generating Realistic Sales Dataset ---")
-
-# Configuration
-num_products = 5
-num_stores = 3
-start_date = date(2023, 1, 1)
-end_date = date(2024, 12, 31)
-holidays = [date(2023, 1, 26), date(2023, 8, 15), date(2023, 10, 24), date(2024, 1, 26), date(2024, 8, 15), date(2024, 11, 1)] # Example Indian Holidays
-
-# Create products and stores
-products = [{'product_id': i, 'product_name': f'Product_{i}', 'base_sales': np.random.randint(50, 200)} for i in range(num_products)]
-stores = [{'store_id': i, 'store_name': f'Store_{i}'} for i in range(num_stores)]
-
-# Generate data
-data = []
-current_date = start_date
-while current_date <= end_date:
-    for store in stores:
-        for product in products:
-            base_sales = product['base_sales']
-            
-            # Factors affecting sales
-            day_of_week_factor = 1.4 if current_date.weekday() >= 5 else 1.0 # Weekend boost
-            holiday_factor = 2.0 if current_date in holidays else 1.0 # Holiday boost
-            promotion_factor = np.random.choice([1.5, 1.0], p=[0.1, 0.9]) # Random promotions
-            
-            # Noise
-            noise = np.random.normal(1, 0.1)
-            
-            daily_sales = int(base_sales * day_of_week_factor * holiday_factor * promotion_factor * noise)
-            
-            data.append({
-                'date': current_date,
-                'store_id': store['store_id'],
-                'product_id': product['product_id'],
-                'daily_sales': daily_sales,
-                'is_weekend': 1 if day_of_week_factor > 1.0 else 0,
-                'is_holiday': 1 if holiday_factor > 1.0 else 0,
-                'promotion_applied': 1 if promotion_factor > 1.0 else 0
-            })
-    current_date += timedelta(days=1)
-
-df = pd.DataFrame(data)
-output_path = 'data/simulated_sales.csv'
-df.to_csv(output_path, index=False)
-
-print(f"✅ Generated {len(df)} rows of data and saved to {output_path}")
\ No newline at end of file
+import pandas as pd
+
+# Example Indian Holidays
+DEFAULT_HOLIDAYS = [date(2023, 1, 26), date(2023, 8, 15), date(2023, 10, 24), date(2024, 1, 26), date(2024, 8, 15), date(2024, 11, 1)]
+
+WEEKEND_FACTOR = 1.4    # Weekend boost
+HOLIDAY_FACTOR = 2.0    # Holiday boost
+PROMOTION_FACTOR = 1.5  # Random promotions...
+PROMOTION_PROB = 0.1    # ...on roughly 1 in 10 store/product/days
+NOISE_STD = 0.1
+RNG_BLOCK_ROWS = 65_536  # Rows of a day's grid drawn from one generator
+
+
+def _day_draws(seed: int, day: int, rows_per_day: int, start: int, stop: int):
+    """
+    (promoted, noise) for rows [start, stop) of one day's grid. Draws come in fixed blocks of
+    RNG_BLOCK_ROWS rows, each from its own generator seeded with (seed, day, block), so any
+    slicing of the day yields the same values.
+    """
+    first_block, last_block = start // RNG_BLOCK_ROWS, (stop - 1) // RNG_BLOCK_ROWS
+    promoted, noise = [], []
+    for block in range(first_block, last_block + 1):
+        rng = np.random.default_rng([seed, day, block])
+        n = min(RNG_BLOCK_ROWS, rows_per_day - block * RNG_BLOCK_ROWS)
+        promoted.append(rng.random(n) < PROMOTION_PROB)
+        noise.append(rng.normal(1, NOISE_STD, n))
+    offset = start - first_block * RNG_BLOCK_ROWS
+    return (np.concatenate(promoted)[offset:offset + stop - start],
+            np.concatenate(noise)[offset:offset + stop - start])
+
+
+def generate_chunks(num_products: int, num_stores: int, start_date: date, end_date: date,
+                    holidays=DEFAULT_HOLIDAYS, seed: int = 42, chunk_rows: int = 1_000_000):
+    """
+    Yields the synthetic sales dataset as DataFrames of at most chunk_rows rows each.
+
+    Rows are ordered by date, then store, then product. Each day's (stores x products) grid is
+    built with NumPy broadcasting, several whole days per chunk when they fit, and in slices of
+    chunk_rows when a single day doesn't. Random draws depend only on the seed and the row's
+    position (see _day_draws), never on the chunk size.
+    """
+    base_sales = np.random.default_rng(seed).integers(50, 200, size=num_products)
+    store_ids = np.repeat(np.arange(num_stores, dtype=np.int32), num_products)
+    product_ids = np.tile(np.arange(num_products, dtype=np.int32), num_stores)
+    rows_per_day = num_stores * num_products
+    chunk_rows = max(1, chunk_rows)
+
+    dates = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1, dtype='datetime64[D]')
+    # 1970-01-01 was a Thursday, so this is date.weekday()
+    is_weekend = ((dates.astype(np.int64) + 3) % 7 >= 5)
+    is_holiday = np.isin(dates, np.array(holidays, dtype='datetime64[D]'))
+
+    def build(segments) -> pd.DataFrame:
+        columns = {name: [] for name in ('date', 'store_id', 'product_id', 'daily_sales',
+                                         'is_weekend', 'is_holiday', 'promotion_applied')}
+        for day, start, stop in segments:
+            n = stop - start
+            promoted, noise = _day_draws(seed, day, rows_per_day, start, stop)
+            daily_sales = (base_sales[product_ids[start:stop]]
+                           * (WEEKEND_FACTOR if is_weekend[day] else 1.0)
+                           * (HOLIDAY_FACTOR if is_holiday[day] else 1.0)
+                           * np.where(promoted, PROMOTION_FACTOR, 1.0)
+                           * noise)
+            columns['date'].append(np.full(n, dates[day]))
+            columns['store_id'].append(store_ids[start:stop])
+            columns['product_id'].append(product_ids[start:stop])
+            columns['daily_sales'].append(daily_sales.astype(np.int32))
+            columns['is_weekend'].append(np.full(n, is_weekend[day], dtype=np.int8))
+            columns['is_holiday'].append(np.full(n, is_holiday[day], dtype=np.int8))
+            columns['promotion_applied'].append(promoted.astype(np.int8))
+        return pd.DataFrame({name: np.concatenate(parts) for name, parts in columns.items()})
+
+    segments, pending = [], 0  # (day, first row, end row) slices of day grids for the next chunk
+    for day in range(len(dates)):
+        for start in range(0, rows_per_day, chunk_rows):
+            stop = min(start + chunk_rows, rows_per_day)
+            if segments and pending + stop - start > chunk_rows:
+                yield build(segments)
+                segments, pending = [], 0
+            segments.append((day, start, stop))
+            pending += stop - start
+    if segments:
+        yield build(segments)
+
+
+def write_dataset(chunks, output_path: str) -> int:
+    """Streams chunks to CSV or Parquet (picked from the file extension). Returns the row count."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    total_rows = 0
+
+    if output_path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+                total_rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(output_path, 'w', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=False, header=(i == 0), date_format='%Y-%m-%d')
+                total_rows += len(chunk)
+
+    return total_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic daily sales dataset.")
+    parser.add_argument('--products', type=int, default=5)
+    parser.add_argument('--stores', type=int, default=3)
+    parser.add_argument('--start-date', type=date.fromisoformat, default=date(2023, 1, 1))
+    parser.add_argument('--end-date', type=date.fromisoformat, default=date(2024, 12, 31))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000, help="Maximum rows generated (and held in memory) at once.")
+    parser.add_argument('--output', default='data/simulated_sales.csv', help="Output path; use a .parquet extension for Parquet.")
+    args = parser.parse_args()
+
+    print("--- Generating Realistic Sales Dataset ---")
+
+    chunks = generate_chunks(args.products, args.stores, args.start_date, args.end_date,
+                             seed=args.seed, chunk_rows=args.chunk_rows)
+    total_rows = write_dataset(chunks, args.output)
+
+    print(f"✅ Generated {total_rows} rows of data and saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
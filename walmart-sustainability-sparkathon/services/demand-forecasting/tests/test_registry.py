@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from app.cache import PredictionCache
+from app.model_manager import ModelManager
+from app.registry import ModelRegistry
+
+ROWS = np.random.default_rng(0).uniform(0, 10, size=(64, 3)).astype(np.float32)
+
+
+def _train(scale: float) -> xgb.XGBRegressor:
+    model = xgb.XGBRegressor(n_estimators=5, max_depth=2)
+    model.fit(ROWS, ROWS.sum(axis=1) * scale)
+    return model
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    for scale in (1.0, 2.0, 3.0):
+        registry.register(_train(scale), {"scale": scale})
+    return registry
+
+
+@pytest.fixture
+def manager(registry, tmp_path):
+    return ModelManager(registry, legacy_model_path=str(tmp_path / 'demand_model.pkl'))
+
+
+def test_versions_are_numbered_in_order(registry):
+    assert registry.versions() == ['v0001', 'v0002', 'v0003']
+    assert registry.active_version() == 'v0003'
+    assert registry.metadata('v0002')['scale'] == 2.0
+
+
+def test_native_load_predicts_like_the_estimator(registry):
+    estimator = registry.load_estimator('v0002')
+    np.testing.assert_allclose(registry.load('v0002').predict(ROWS), estimator.predict(ROWS), rtol=1e-6)
+
+
+def test_pin_holds_until_unpinned(registry):
+    registry.pin('v0001')
+    registry.register(_train(4.0), {"scale": 4.0})
+    assert registry.active_version() == 'v0001'
+    registry.unpin()
+    assert registry.active_version() == 'v0004'
+    with pytest.raises(ValueError):
+        registry.pin('v0099')
+
+
+def test_rollback_steps_back_one_version_at_a_time(registry):
+    assert registry.rollback() == 'v0002'
+    assert registry.rollback() == 'v0001'
+    assert registry.active_version() == 'v0001'
+    with pytest.raises(ValueError):
+        registry.rollback()
+
+
+def test_refresh_swaps_only_when_the_active_version_changes(manager):
+    assert manager.refresh()
+    assert manager.current.version == 'v0003'
+    assert not manager.refresh()
+
+    manager.registry.rollback()
+    assert manager.refresh()
+    assert manager.current.version == 'v0002'
+    np.testing.assert_allclose(
+        manager.current.model.predict(ROWS), manager.registry.load('v0002').predict(ROWS)
+    )
+
+
+def test_swap_clears_the_prediction_cache(manager):
+    cache = PredictionCache()
+    manager.add_swap_listener(lambda loaded: cache.clear())
+    manager.refresh()
+
+    row = tuple(ROWS[0])
+    cache.put((manager.current.version,) + row, 1.0)
+    assert cache.get(('v0003',) + row) == 1.0
+
+    manager.registry.pin('v0001')
+    manager.refresh()
+    assert cache.stats()["size"] == 0
+    assert cache.get((manager.current.version,) + row) is None
+    assert cache.get(('v0003',) + row) is None
+
+
+def test_failed_load_keeps_serving_the_current_model(manager, tmp_path):
+    manager.refresh()
+    version = manager.registry.register(_train(5.0), {})
+    (tmp_path / 'registry' / version / 'model.ubj').unlink()
+    with pytest.raises(FileNotFoundError):
+        manager.refresh()
+    assert manager.current.version == 'v0003'
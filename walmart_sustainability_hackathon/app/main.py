@@ -1,18 +1,53 @@
+from datetime import datetime
+from typing import Dict, List, Optional
 from flask import Flask, jsonify, request, render_template
+import os
 from .services.demand_forecasting_service import DemandForecastingService
+from .services.forecast_snapshot import ForecastMaterializer
+from .models.demand_models import SalesDataPoint
+from .services.greenshelf_persistence import DEFAULT_GREENSHELF_DATA_DIR, GreenShelfPersistence, GreenShelfSnapshotter
 from .services.greenshelf_service import GreenShelfService
+from .services.greenshelf_shards import GreenShelfShards
+from .models.greenshelf_models import STATUS_CODES
+from .services.sensor_ingestion import batch_from_records, batch_from_json_lines, batch_from_frame
 from .services.pricing_service import DynamicPricingService
 from .models.pricing_models import MOCK_PRODUCT_PRICING_PS # Import mock pricing data
 from .services.sourcing_service import SourcingPlatformService
 from .services.hub_service import SustainabilityHubService
 
+MOCK_STORES = [
+    {"id": "Store101", "name": "Store #101 - Fayetteville, AR"},
+    {"id": "Store203", "name": "Store #203 - Bentonville, AR"},
+    {"id": "Store505", "name": "Store #505 - Rogers, AR"}
+]
+
 # For simplicity in hackathon, initialize services globally
 demand_forecasting_service = DemandForecastingService()
-greenshelf_service = GreenShelfService()
+# One GreenShelf service per store, loaded on first use: restored from its snapshot + journal under
+# GREENSHELF_DATA_DIR (empty keeps stores in memory only) and snapshotted when evicted.
+# GREENSHELF_MEMORY_BUDGET_MB bounds the resident stores and GREENSHELF_QUERY_WORKERS the threads
+# cross-store queries load and filter stores on (0 queries them one after another)
+greenshelf_data_dir = os.environ.get('GREENSHELF_DATA_DIR', DEFAULT_GREENSHELF_DATA_DIR)
+greenshelf_persistence = GreenShelfPersistence(
+    greenshelf_data_dir, store_ids=[store["id"] for store in MOCK_STORES]
+) if greenshelf_data_dir else None
+query_workers = os.environ.get('GREENSHELF_QUERY_WORKERS')
+greenshelf_shards = GreenShelfShards(
+    loader=greenshelf_persistence.load if greenshelf_persistence else GreenShelfService,
+    on_evict=greenshelf_persistence.close if greenshelf_persistence else None,
+    memory_budget_bytes=int(float(os.environ.get('GREENSHELF_MEMORY_BUDGET_MB', '256')) * 1024 * 1024),
+    max_workers=int(query_workers) if query_workers else 8
+)
+DEFAULT_GREENSHELF_STORE_ID = "Store101" # Store served by the routes without a store ID (and priced)
+greenshelf_service = greenshelf_shards.pin(DEFAULT_GREENSHELF_STORE_ID)
 pricing_service = DynamicPricingService(greenshelf_service=greenshelf_service, product_pricing_data=MOCK_PRODUCT_PRICING_PS)
+# Stores loaded from here on (other stores, or reloads after eviction) get the same repricing subscriber
+greenshelf_shards.on_load = lambda store_id, service: pricing_service.attach(service)
 sourcing_service = SourcingPlatformService()
 hub_service = SustainabilityHubService()
 
+MAX_SCENARIOS = 100 # Per what-if request
+
 
 def create_app():
     app = Flask(__name__)
@@ -45,33 +80,48 @@ def create_app():
     # --- API Routes ---
 
     # Feature 1: AI Demand Prediction
+    def parse_days_arg():
+        """Reads the 'days' query param. Returns (future_days, error_response)."""
+        future_days_str = request.args.get('days', '7')
+        if not future_days_str.isdigit():
+            return None, (jsonify({"error": "Invalid 'days' parameter. Must be an integer."}), 400)
+        future_days = int(future_days_str)
+
+        if future_days <= 0 or future_days > 90:
+             return None, (jsonify({"error": "'days' parameter must be between 1 and 90."}), 400)
+        return future_days, None
+
+    def parse_forecast_args():
+        """Reads 'days' and the scenario query params. Returns (future_days, scenario_adjustments, error_response)."""
+        future_days, error_response = parse_days_arg()
+        if error_response:
+            return None, None, error_response
+
+        scenario_adjustments = {}
+        event_impact_multiplier_str = request.args.get('event_impact_multiplier')
+        if event_impact_multiplier_str:
+            try:
+                scenario_adjustments['event_impact_multiplier'] = float(event_impact_multiplier_str)
+            except ValueError:
+                return None, None, (jsonify({"error": "Invalid 'event_impact_multiplier'. Must be a float."}), 400)
+
+        temp_adjust_str = request.args.get('temperature_increase_celsius')
+        if temp_adjust_str:
+            try:
+                scenario_adjustments['weather_override'] = {
+                    "temperature_increase_celsius": float(temp_adjust_str)
+                }
+            except ValueError:
+                return None, None, (jsonify({"error": "Invalid 'temperature_increase_celsius'. Must be a float."}), 400)
+
+        return future_days, scenario_adjustments, None
+
     @app.route('/api/forecast/store/<store_id>/product/<product_sku>', methods=['GET'])
     def get_forecast_api(store_id: str, product_sku: str):
         try:
-            future_days_str = request.args.get('days', '7')
-            if not future_days_str.isdigit():
-                return jsonify({"error": "Invalid 'days' parameter. Must be an integer."}), 400
-            future_days = int(future_days_str)
-
-            if future_days <= 0 or future_days > 90:
-                 return jsonify({"error": "'days' parameter must be between 1 and 90."}), 400
-
-            scenario_adjustments = {}
-            event_impact_multiplier_str = request.args.get('event_impact_multiplier')
-            if event_impact_multiplier_str:
-                try:
-                    scenario_adjustments['event_impact_multiplier'] = float(event_impact_multiplier_str)
-                except ValueError:
-                    return jsonify({"error": "Invalid 'event_impact_multiplier'. Must be a float."}), 400
-
-            temp_adjust_str = request.args.get('temperature_increase_celsius')
-            if temp_adjust_str:
-                try:
-                    scenario_adjustments['weather_override'] = {
-                        "temperature_increase_celsius": float(temp_adjust_str)
-                    }
-                except ValueError:
-                    return jsonify({"error": "Invalid 'temperature_increase_celsius'. Must be a float."}), 400
+            future_days, scenario_adjustments, error_response = parse_forecast_args()
+            if error_response:
+                return error_response
 
             forecast_result = demand_forecasting_service.predict(
                 store_id, product_sku, future_days, scenario_adjustments
@@ -81,17 +131,113 @@ def create_app():
             app.logger.error(f"Error in get_forecast_api: {e}", exc_info=True)
             return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
 
+    @app.route('/api/forecast/store/<store_id>/product/<product_sku>/sales', methods=['POST'])
+    def ingest_sales_api(store_id: str, product_sku: str):
+        """Appends daily sales, e.g. {"sales": [{"date": "2024-05-01", "quantity_sold": 42, "price": 3.5}]}."""
+        try:
+            data = request.get_json(silent=True) or {}
+            sales_json = data.get('sales')
+            if not isinstance(sales_json, list) or not sales_json:
+                return jsonify({"error": "Body must contain a non-empty 'sales' list."}), 400
+            try:
+                sales = [
+                    SalesDataPoint(
+                        timestamp=datetime.fromisoformat(s['date']),
+                        quantity_sold=int(s['quantity_sold']),
+                        price=float(s.get('price', 0.0))
+                    )
+                    for s in sales_json
+                ]
+            except (KeyError, TypeError, ValueError) as e:
+                return jsonify({"error": f"Invalid sales record: {e}"}), 400
+
+            try:
+                return jsonify(demand_forecasting_service.ingest_sales(store_id, product_sku, sales))
+            except ValueError as e: # e.g. sales older than the series' history
+                return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            app.logger.error(f"Error in ingest_sales_api: {e}", exc_info=True)
+            return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+    @app.route('/api/forecast/store/<store_id>/product/<product_sku>/scenarios', methods=['POST'])
+    def get_scenario_forecast_api(store_id: str, product_sku: str):
+        """
+        What-if sweep over one series, e.g. POST ...?days=30 with
+        {"scenarios": [{"name": "Heatwave", "temperature_increase_celsius": 5}, {"event_impact_multiplier": 1.5}]}.
+        Returns the baseline and every scenario curve over shared dates.
+        """
+        try:
+            future_days, error_response = parse_days_arg()
+            if error_response:
+                return error_response
+
+            data = request.get_json(silent=True) or {}
+            scenarios_json = data.get('scenarios')
+            if not isinstance(scenarios_json, list) or not scenarios_json:
+                return jsonify({"error": "Body must contain a non-empty 'scenarios' list."}), 400
+            if len(scenarios_json) > MAX_SCENARIOS:
+                return jsonify({"error": f"At most {MAX_SCENARIOS} scenarios per request."}), 400
+
+            scenario_names, scenarios = [], []
+            for i, scenario_json in enumerate(scenarios_json):
+                if not isinstance(scenario_json, dict):
+                    return jsonify({"error": f"Scenario {i + 1} must be an object."}), 400
+                scenario_adjustments = {}
+                try:
+                    if 'event_impact_multiplier' in scenario_json:
+                        scenario_adjustments['event_impact_multiplier'] = float(scenario_json['event_impact_multiplier'])
+                    if 'temperature_increase_celsius' in scenario_json:
+                        scenario_adjustments['weather_override'] = {
+                            "temperature_increase_celsius": float(scenario_json['temperature_increase_celsius'])
+                        }
+                except (TypeError, ValueError):
+                    return jsonify({"error": f"Invalid adjustment in scenario {i + 1}. Values must be floats."}), 400
+                scenario_names.append(str(scenario_json.get('name', f"scenario_{i + 1}")))
+                scenarios.append(scenario_adjustments)
+
+            scenario_result = demand_forecasting_service.predict_scenarios(
+                store_id, product_sku, future_days, scenarios, scenario_names
+            )
+            return jsonify(scenario_result.to_dict())
+        except Exception as e:
+            app.logger.error(f"Error in get_scenario_forecast_api: {e}", exc_info=True)
+            return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+    @app.route('/api/forecast/store/<store_id>', methods=['GET'])
+    @app.route('/api/forecast/store/<store_id>/category/<category_id>', methods=['GET'])
+    def get_batch_forecast_api(store_id: str, category_id: Optional[str] = None):
+        """Forecasts every product of a category, or of the whole store when no category is given."""
+        try:
+            future_days, scenario_adjustments, error_response = parse_forecast_args()
+            if error_response:
+                return error_response
+
+            products_by_cat = get_products_by_category()
+            if category_id is not None:
+                if category_id not in products_by_cat:
+                    return jsonify({"error": f"Unknown category '{category_id}'."}), 404
+                product_skus = [p['sku'] for p in products_by_cat[category_id]]
+            else:
+                # A SKU can be listed under more than one category; forecast it once
+                product_skus = list(dict.fromkeys(p['sku'] for products in products_by_cat.values() for p in products))
+
+            forecast_results = demand_forecasting_service.predict_many(
+                [store_id], product_skus, future_days, scenario_adjustments
+            )
+            return jsonify({
+                "store_id": store_id,
+                "category_id": category_id,
+                "forecasts": [result.to_dict() for result in forecast_results]
+            })
+        except Exception as e:
+            app.logger.error(f"Error in get_batch_forecast_api: {e}", exc_info=True)
+            return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
     @app.route('/api/stores', methods=['GET'])
     def get_stores_api():
-        mock_stores = [
-            {"id": "Store101", "name": "Store #101 - Fayetteville, AR"},
-            {"id": "Store203", "name": "Store #203 - Bentonville, AR"},
-            {"id": "Store505", "name": "Store #505 - Rogers, AR"}
-        ]
-        return jsonify(mock_stores)
+        return jsonify(MOCK_STORES)
 
-    @app.route('/api/products/<store_id>/<category_id>', methods=['GET'])
-    def get_products_api(store_id: str, category_id: str):
+    def get_products_by_category() -> Dict[str, List[Dict[str, str]]]:
         from .models.greenshelf_models import MOCK_PRODUCT_MASTERS_GS # Import here to avoid circular if models use app context
 
         # Start with a base set of products per category for the demo
@@ -117,7 +263,11 @@ def create_app():
             if not any(p['sku'] == sku for p in products_by_cat[master.category]):
                  products_by_cat[master.category].append({"sku": sku, "name": master.name})
 
-        return jsonify(products_by_cat.get(category_id, []))
+        return products_by_cat
+
+    @app.route('/api/products/<store_id>/<category_id>', methods=['GET'])
+    def get_products_api(store_id: str, category_id: str):
+        return jsonify(get_products_by_category().get(category_id, []))
 
     @app.route('/api/product_categories', methods=['GET'])
     def get_product_categories_api():
@@ -128,13 +278,69 @@ def create_app():
         categories_list = [{"id": cat, "name": cat} for cat in sorted(list(categories_set))]
         return jsonify(categories_list)
 
+    # Precompute forecasts for every store x catalog SKU in the background; the forecast routes
+    # serve from the snapshot. FORECAST_MATERIALIZE_INTERVAL_SECONDS=0 disables the job.
+    materialize_interval = float(os.environ.get('FORECAST_MATERIALIZE_INTERVAL_SECONDS', '3600'))
+    if materialize_interval > 0:
+        def materialize_catalog_forecasts():
+            product_skus = list(dict.fromkeys(p['sku'] for products in get_products_by_category().values() for p in products))
+            return demand_forecasting_service.materialize_forecasts([store["id"] for store in MOCK_STORES], product_skus)
+
+        forecast_materializer = ForecastMaterializer(
+            materialize_catalog_forecasts, demand_forecasting_service.forecast_snapshot_path, materialize_interval
+        )
+        forecast_materializer.start()
+        app.extensions['forecast_materializer'] = forecast_materializer
+
     # --- Feature 2: GreenShelf API Routes ---
+    # Wakes when instances are due to cross into a more severe spoilage status and updates just those;
+    # checks at least every SPOILAGE_SWEEP_MAX_SLEEP_SECONDS. 0 disables it.
+    sweep_max_sleep = float(os.environ.get('SPOILAGE_SWEEP_MAX_SLEEP_SECONDS', '3600'))
+    if sweep_max_sleep > 0:
+        greenshelf_shards.start_sweepers(sweep_max_sleep) # Each resident store's; stopped when it is evicted
+    app.extensions['greenshelf_shards'] = greenshelf_shards
+
+    # Snapshots every resident store every GREENSHELF_SNAPSHOT_INTERVAL_SECONDS, keeping journals short. 0 disables it.
+    snapshot_interval = float(os.environ.get('GREENSHELF_SNAPSHOT_INTERVAL_SECONDS', '300'))
+    if greenshelf_persistence and snapshot_interval > 0:
+        def snapshot_resident_stores():
+            return sum(
+                greenshelf_persistence.snapshot(store_id, service, only_open=True)
+                for store_id, service in greenshelf_shards.resident_services().items()
+            )
+
+        greenshelf_snapshotter = GreenShelfSnapshotter(snapshot_resident_stores, snapshot_interval)
+        greenshelf_snapshotter.start()
+        app.extensions['greenshelf_snapshotter'] = greenshelf_snapshotter
+
+    def unknown_stores_response(store_ids: List[str]):
+        """A 404 response naming any of `store_ids` that isn't a known store, else None."""
+        known_store_ids = [store["id"] for store in MOCK_STORES]
+        unknown_store_ids = [store_id for store_id in store_ids if store_id not in known_store_ids]
+        if unknown_store_ids: # Loading them would build (and persist) a mock store for each
+            return jsonify({"error": f"Unknown store: {', '.join(unknown_store_ids)}"}), 404
+        return None
+
+    def greenshelf_for_request():
+        """(service, None) for the ?store_id= store (loaded on demand) or the default store; (None, 404 response) if unknown."""
+        store_id = request.args.get('store_id', DEFAULT_GREENSHELF_STORE_ID)
+        error_response = unknown_stores_response([store_id])
+        return (None, error_response) if error_response else (greenshelf_shards.get(store_id), None)
+
+    def parse_list_arg(name: str) -> Optional[List[str]]:
+        value = request.args.get(name)
+        return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
     @app.route('/api/greenshelf/store/<store_id>/layout_summary', methods=['GET'])
     def get_shelf_layout_summary_api(store_id: str):
+        """Worst status color per shelf, from incrementally kept counts; ?refresh=true re-simulates sensors first."""
         try:
-            simulate_updates_str = request.args.get('simulate_updates', 'true').lower()
-            simulate_updates = simulate_updates_str == 'true'
-            summary = greenshelf_service.get_all_shelves_summary(store_id, simulate_updates=simulate_updates)
+            # simulate_updates is the parameter's older name
+            refresh_str = request.args.get('refresh', request.args.get('simulate_updates', 'false')).lower()
+            error_response = unknown_stores_response([store_id])
+            if error_response:
+                return error_response
+            summary = greenshelf_shards.get(store_id).get_all_shelves_summary(store_id, refresh=refresh_str == 'true')
             return jsonify(summary)
         except Exception as e:
             app.logger.error(f"Error in get_shelf_layout_summary_api: {e}", exc_info=True)
@@ -145,20 +351,117 @@ def create_app():
         try:
             simulate_updates_str = request.args.get('simulate_updates', 'true').lower()
             simulate_updates = simulate_updates_str == 'true'
-            items = greenshelf_service.get_shelf_items(shelf_id, simulate_updates=simulate_updates)
+            greenshelf, error_response = greenshelf_for_request()
+            if error_response:
+                return error_response
+            items = greenshelf.get_shelf_items(shelf_id, simulate_updates=simulate_updates)
             return jsonify([item.to_dict() for item in items])
         except Exception as e:
             app.logger.error(f"Error in get_shelf_items_api: {e}", exc_info=True)
             return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
 
+    @app.route('/api/greenshelf/sensor_readings', methods=['POST'])
+    def ingest_sensor_readings_api():
+        """
+        Bulk shelf sensor readings, as any of:
+          application/json          [{"shelf_id": "ShelfA1_Dairy", "timestamp": "2024-05-01T10:00:00", "temperature_c": 3.4, "humidity_pct": null}, ...]
+          application/x-ndjson      the same readings, one JSON object per line
+          application/octet-stream  packed SENSOR_FRAME_DTYPE records (see services/sensor_ingestion.py)
+        """
+        try:
+            try:
+                if request.mimetype == 'application/octet-stream':
+                    batch = batch_from_frame(request.get_data())
+                elif request.mimetype == 'application/x-ndjson':
+                    batch = batch_from_json_lines(request.get_data(as_text=True))
+                else:
+                    readings = request.get_json(silent=True)
+                    if not isinstance(readings, list):
+                        return jsonify({"error": "Body must be a list of sensor readings."}), 400
+                    batch = batch_from_records(readings)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+            greenshelf, error_response = greenshelf_for_request()
+            if error_response:
+                return error_response
+            return jsonify(greenshelf.ingest_sensor_readings(batch))
+        except Exception as e:
+            app.logger.error(f"Error in ingest_sensor_readings_api: {e}", exc_info=True)
+            return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+    @app.route('/api/greenshelf/store/<store_id>/upcoming_status_changes', methods=['GET'])
+    def get_upcoming_status_changes_api(store_id: str):
+        """Items that will cross into a more severe status within ?hours=N (default 24), soonest first."""
+        try:
+            try:
+                hours = float(request.args.get('hours', '24'))
+            except ValueError:
+                return jsonify({"error": "hours must be a number."}), 400
+            if not 0 <= hours <= 24 * 365:
+                return jsonify({"error": "hours must be between 0 and 8760."}), 400
+            error_response = unknown_stores_response([store_id])
+            if error_response:
+                return error_response
+
+            changes = greenshelf_shards.get(store_id).get_upcoming_status_changes(hours)
+            return jsonify([
+                {**item.to_dict(), "next_status": next_status, "changes_at": changes_at.isoformat()}
+                for item, next_status, changes_at in changes
+            ])
+        except Exception as e:
+            app.logger.error(f"Error in get_upcoming_status_changes_api: {e}", exc_info=True)
+            return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+    @app.route('/api/greenshelf/status_changes', methods=['GET'])
+    def get_recent_status_changes_api():
+        """The most recent status change events (?limit=N, default 100), newest last."""
+        try:
+            try:
+                limit = int(request.args.get('limit', '100'))
+            except ValueError:
+                return jsonify({"error": "limit must be an integer."}), 400
+            if limit < 0:
+                return jsonify({"error": "limit must not be negative."}), 400
+            greenshelf, error_response = greenshelf_for_request()
+            if error_response:
+                return error_response
+            events = list(greenshelf.recent_status_changes)
+            return jsonify([event.to_dict() for event in events[len(events) - min(limit, len(events)):]])
+        except Exception as e:
+            app.logger.error(f"Error in get_recent_status_changes_api: {e}", exc_info=True)
+            return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+    @app.route('/api/greenshelf/instances', methods=['GET'])
+    def query_greenshelf_instances_api():
+        """Items across stores (?stores=, default all) filtered by comma-separated ?status=, ?category= and ?sku=."""
+        try:
+            store_ids = parse_list_arg('stores') or [store["id"] for store in MOCK_STORES]
+            error_response = unknown_stores_response(store_ids)
+            if error_response:
+                return error_response
+            statuses = parse_list_arg('status')
+            unknown_statuses = [status for status in statuses or [] if status not in STATUS_CODES]
+            if unknown_statuses:
+                return jsonify({"error": f"Unknown status: {', '.join(unknown_statuses)}"}), 400
+
+            items = greenshelf_shards.query_instances(
+                store_ids, statuses=statuses, categories=parse_list_arg('category'), skus=parse_list_arg('sku')
+            )
+            return jsonify(items)
+        except Exception as e:
+            app.logger.error(f"Error in query_greenshelf_instances_api: {e}", exc_info=True)
+            return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
     @app.route('/api/greenshelf/item/<instance_id>/details', methods=['GET'])
     def get_greenshelf_item_details_api(instance_id: str):
         try:
-            item_tuple = greenshelf_service.get_instance_by_id(instance_id)
-            if item_tuple:
-                item, _ = item_tuple
-                greenshelf_service.simulate_sensor_update_for_instance(item)
-                return jsonify(item.to_dict())
+            greenshelf, error_response = greenshelf_for_request()
+            if error_response:
+                return error_response
+            item_details = greenshelf.get_instance_details(instance_id)
+            if item_details:
+                return jsonify(item_details)
             else:
                 return jsonify({"error": "Product instance not found"}), 404
         except Exception as e:
@@ -201,6 +504,37 @@ def create_app():
             app.logger.error(f"Error in get_shelf_dynamic_prices_api: {e}", exc_info=True)
             return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
 
+    @app.route('/api/pricing/reprice', methods=['POST'])
+    def reprice_stores_api():
+        """Reprices every item in ?stores= (default all) in bulk, e.g. for a nightly markdown run; ?demand_factor= applies to all."""
+        try:
+            demand_factor_str = request.args.get('demand_factor')
+            try:
+                demand_factor = float(demand_factor_str) if demand_factor_str else None
+            except ValueError:
+                return jsonify({"error": "demand_factor must be a number."}), 400
+            if demand_factor is not None and not demand_factor > 0:
+                return jsonify({"error": "demand_factor must be positive."}), 400
+
+            store_ids = parse_list_arg('stores') or [store["id"] for store in MOCK_STORES]
+            error_response = unknown_stores_response(store_ids)
+            if error_response:
+                return error_response
+
+            results = {}
+            for store_id in store_ids:
+                result = pricing_service.reprice(demand_signal_factors=demand_factor,
+                                                 greenshelf_service=greenshelf_shards.get(store_id))
+                results[store_id] = {
+                    "instances_repriced": int(result.priced.sum()),
+                    "instances_discounted": int((result.discount_percentage > 0).sum()),
+                    "items": result.to_dict()
+                }
+            return jsonify(results)
+        except Exception as e:
+            app.logger.error(f"Error in reprice_stores_api: {e}", exc_info=True)
+            return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
     # Placeholder for staff actions like approving discounts if we build that UI part
     # @app.route('/api/pricing/item/<instance_id>/action', methods=['POST'])
     # def post_pricing_action_api(instance_id: str):
@@ -252,5 +586,3 @@ if __name__ == '__main__':
     # depending on your project structure and how you installed Flask.
     app_instance = create_app()
     app_instance.run(debug=True, host='0.0.0.0', port=5001)
-
-```
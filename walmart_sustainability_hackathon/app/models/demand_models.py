@@ -74,3 +74,44 @@ class ForecastResult:
             "forecast_points": [fp.to_dict() for fp in self.forecast_points],
             "influencing_factors_summary": self.influencing_factors_summary
         }
+
+class ScenarioCurve:
+    def __init__(self, name: str, scenario_adjustments: Dict[str, Any], predicted_units: List[int],
+                 confidence_low: List[int], confidence_high: List[int],
+                 influencing_factors_summary: Optional[List[Dict[str, str]]] = None):
+        self.name = name
+        self.scenario_adjustments = scenario_adjustments
+        self.predicted_units = predicted_units
+        self.confidence_low = confidence_low
+        self.confidence_high = confidence_high
+        self.influencing_factors_summary = influencing_factors_summary if influencing_factors_summary is not None else []
+
+    def to_dict(self): # Helper for JSON serialization
+        return {
+            "name": self.name,
+            "scenario_adjustments": self.scenario_adjustments,
+            "predicted_units": self.predicted_units,
+            "confidence_low": self.confidence_low,
+            "confidence_high": self.confidence_high,
+            "influencing_factors_summary": self.influencing_factors_summary
+        }
+
+class ScenarioForecastResult: # Baseline and what-if curves for one series, columnar over shared dates
+    def __init__(self, product_sku: str, store_id: str, dates: List[datetime],
+                 baseline: ScenarioCurve, scenarios: List[ScenarioCurve]):
+        self.product_sku = product_sku
+        self.store_id = store_id
+        self.dates = dates
+        self.baseline = baseline
+        self.scenarios = scenarios
+        self.generated_at = datetime.now()
+
+    def to_dict(self): # Helper for JSON serialization
+        return {
+            "product_sku": self.product_sku,
+            "store_id": self.store_id,
+            "generated_at": self.generated_at.isoformat(),
+            "dates": [d.isoformat() for d in self.dates],
+            "baseline": self.baseline.to_dict(),
+            "scenarios": [s.to_dict() for s in self.scenarios]
+        }
@@ -1,8 +1,10 @@
 from datetime import datetime, date, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+
+import numpy as np
 
 class SensorReading:
-    def __init__(self, timestamp: datetime, temperature_c: float, humidity_pct: Optional[float] = None):
+    def __init__(self, timestamp: datetime, temperature_c: Optional[float], humidity_pct: Optional[float] = None):
         self.timestamp = timestamp
         self.temperature_c = temperature_c
         self.humidity_pct = humidity_pct
@@ -28,32 +30,132 @@ class ProductMasterGS: # GS for GreenShelf, to avoid naming conflict if used els
     def to_dict(self):
         return vars(self)
 
+# Spoilage statuses, in increasing order of severity; an instance stores the index as its status code
+SPOILAGE_STATUSES = [
+    ("Normal", "green"),
+    ("Approaching", "yellow"),
+    ("Nearing Expiry", "orange"),
+    ("Critical / Donate", "red"),
+    ("Spoiled", "darkred"),
+    ("Error: Missing Product Info", "grey"),
+]
+STATUS_CODES: Dict[str, int] = {status: code for code, (status, _) in enumerate(SPOILAGE_STATUSES)}
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal() # Dates are stored as days since 1970-01-01
+
+def _column(name: str, to_py=None, from_py=None):
+    """Property reading/writing this instance's row of an inventory column."""
+    def fget(self):
+        value = getattr(self._inventory, name)[self._row]
+        return to_py(value) if to_py else value.item()
+    def fset(self, value):
+        getattr(self._inventory, name)[self._row] = from_py(value) if from_py else value
+    return property(fget, fset)
+
+def _day_to_date(day) -> date:
+    return date.fromordinal(EPOCH_ORDINAL + int(day))
+
+def _date_to_day(d: date) -> int:
+    return d.toordinal() - EPOCH_ORDINAL
+
+def _nan_to_none(value) -> Optional[float]:
+    return None if value != value else float(value)
+
+def _none_to_nan(value: Optional[float]) -> float:
+    return float('nan') if value is None else value
+
 class ProductInstanceGS: # Represents a specific batch/item on a shelf
-    def __init__(self, instance_id: str, sku: str, printed_expiry_date: date,
-                 received_date: date, shelf_id: str, quantity: int,
-                 product_name: Optional[str] = "Unknown Product", # Will be populated
-                 current_conditions: Optional[SensorReading] = None):
-        self.instance_id = instance_id
-        self.sku = sku
-        self.product_name = product_name
-        self.printed_expiry_date = printed_expiry_date
-        self.received_date = received_date
-        self.shelf_id = shelf_id
-        self.quantity = quantity
+    """
+    A thin view onto one row of a GreenShelfInventory (see services/greenshelf_inventory.py).
+    All state lives in the inventory's column arrays; attributes read and write them in place.
+    """
+    __slots__ = ('_inventory', '_row')
+
+    def __init__(self, inventory, row: int):
+        self._inventory = inventory
+        self._row = row
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    @property
+    def instance_id(self) -> str:
+        return self._inventory.instance_ids[self._row]
+
+    @property
+    def sku(self) -> str:
+        return self._inventory.skus[self._inventory.sku_code[self._row]]
+
+    @property
+    def product_name(self) -> str:
+        return self._inventory.product_names[self._inventory.product_name_code[self._row]]
+
+    @property
+    def shelf_id(self) -> str:
+        return self._inventory.shelves[self._inventory.shelf_code[self._row]]
+
+    printed_expiry_date = _column('printed_expiry_day', _day_to_date, _date_to_day)
+    received_date = _column('received_day', _day_to_date, _date_to_day)
+    predicted_spoilage_date = _column('predicted_spoilage_day', _day_to_date, _date_to_day)
+    quantity = _column('quantity')
+
+    @property
+    def current_conditions(self) -> SensorReading:
+        """Latest reading of the shelf's sensor (temperature None before the shelf has any)."""
+        conditions = self._inventory.shelf_conditions(self._inventory.shelf_code[self._row])
+        if conditions is None:
+            arrival = self._inventory.arrival_time[self._row].astype('datetime64[us]').item()
+            return SensorReading(arrival, None)
+        return conditions
 
-        self.current_conditions = current_conditions if current_conditions else SensorReading(datetime.now(), 10.0) # Default
-        self.condition_history: List[SensorReading] = [self.current_conditions] if self.current_conditions else []
+    @property
+    def arrival_time(self) -> datetime:
+        """When the instance was placed on its current shelf."""
+        return self._inventory.arrival_time[self._row].astype('datetime64[us]').item()
 
-        self.predicted_spoilage_date: date = printed_expiry_date # Initial prediction
-        self.status: str = "Normal" # "Normal", "Approaching", "Nearing Expiry", "Critical / Donate", "Spoiled"
-        self.status_color: str = "green" # For UI: green, yellow, orange, red, darkred
+    def exposure(self) -> Tuple[float, float]:
+        """(temperature integral in °C·h, hours) over the instance's time on shelves so far."""
+        degree_hours, hours = self._inventory.exposures(np.array([self._row]))
+        return float(degree_hours[0]), float(hours[0])
 
-        # For dynamic pricing integration (can be populated by PricingService)
-        self.current_discount_percentage: Optional[float] = None
-        self.current_discounted_price: Optional[float] = None
-        self.original_price: Optional[float] = None # Should come from product master or pricing DB
+    @property
+    def average_temperature_c(self) -> float:
+        """Time-weighted average temperature since arrival (the shelf's current one until time has passed)."""
+        return float(self._inventory.average_temperatures(np.array([self._row]))[0])
+
+    def net_degree_hours_above(self, temp_c: float) -> float:
+        """
+        Net degree-hours above `temp_c` (e.g. the product's ideal temperature) since arrival, floored at 0:
+        time spent below `temp_c` offsets time above it, as in the average-temperature spoilage model.
+        """
+        degree_hours, hours = self.exposure()
+        return max(0.0, degree_hours - temp_c * hours)
+
+    def record_reading(self, reading: SensorReading):
+        """Records a reading from this instance's shelf sensor; it is shared by everything on the shelf."""
+        self._inventory.record_reading(self._row, reading)
+
+    # "Normal", "Approaching", "Nearing Expiry", "Critical / Donate", "Spoiled"
+    @property
+    def status(self) -> str:
+        return SPOILAGE_STATUSES[self._inventory.status_code[self._row]][0]
+
+    @status.setter
+    def status(self, status: str):
+        self._inventory.set_status(self._row, STATUS_CODES[status]) # Keeps the inventory's status index current
+
+    @property
+    def status_color(self) -> str: # For UI: green, yellow, orange, red, darkred
+        return SPOILAGE_STATUSES[self._inventory.status_code[self._row]][1]
+
+    # For dynamic pricing integration (populated by PricingService)
+    current_discount_percentage = _column('current_discount_percentage', _nan_to_none, _none_to_nan)
+    current_discounted_price = _column('current_discounted_price', _nan_to_none, _none_to_nan)
+    original_price = _column('original_price', _nan_to_none, _none_to_nan) # Should come from product master or pricing DB
 
     def to_dict(self):
+        current_conditions = self.current_conditions
         return {
             "instance_id": self.instance_id,
             "sku": self.sku,
@@ -62,8 +164,7 @@ class ProductInstanceGS: # Represents a specific batch/item on a shelf
             "received_date": self.received_date.isoformat(),
             "shelf_id": self.shelf_id,
             "quantity": self.quantity,
-            "current_conditions": self.current_conditions.to_dict() if self.current_conditions else None,
-            # "condition_history": [cond.to_dict() for cond in self.condition_history], # Can be verbose
+            "current_conditions": current_conditions.to_dict(),
             "predicted_spoilage_date": self.predicted_spoilage_date.isoformat(),
             "status": self.status,
             "status_color": self.status_color,
@@ -72,6 +173,30 @@ class ProductInstanceGS: # Represents a specific batch/item on a shelf
             "original_price": self.original_price
         }
 
+class StatusChangeEvent:
+    """Published by GreenShelfService when an instance's spoilage status changes."""
+    def __init__(self, instance_id: str, sku: str, shelf_id: str, old_status: str, new_status: str,
+                 predicted_spoilage_date: date, timestamp: datetime):
+        self.instance_id = instance_id
+        self.sku = sku
+        self.shelf_id = shelf_id
+        self.old_status = old_status
+        self.new_status = new_status
+        self.predicted_spoilage_date = predicted_spoilage_date
+        self.timestamp = timestamp
+
+    def to_dict(self):
+        return {
+            "instance_id": self.instance_id,
+            "sku": self.sku,
+            "shelf_id": self.shelf_id,
+            "old_status": self.old_status,
+            "new_status": self.new_status,
+            "new_status_color": SPOILAGE_STATUSES[STATUS_CODES[self.new_status]][1],
+            "predicted_spoilage_date": self.predicted_spoilage_date.isoformat(),
+            "timestamp": self.timestamp.isoformat()
+        }
+
 # Mock data for product masters (could be loaded from a config file or DB)
 MOCK_PRODUCT_MASTERS_GS: Dict[str, ProductMasterGS] = {
     "SKU_DAIRY_MILK1G": ProductMasterGS(sku="SKU_DAIRY_MILK1G", name="Whole Milk (1 Gallon)", category="Dairy", ideal_temp_c=3, base_shelf_life_days=12, temp_sensitivity_factor=0.25),
@@ -94,4 +219,3 @@ class Shelf:
 
     def to_dict(self):
         return vars(self)
-```
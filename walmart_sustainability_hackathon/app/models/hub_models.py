@@ -103,4 +103,3 @@ class SustainabilityDashboardData:
             "gamification_leaderboard": [entry.to_dict() for entry in self.gamification_leaderboard],
             "sustainability_tips": self.sustainability_tips
         }
-```
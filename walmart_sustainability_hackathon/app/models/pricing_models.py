@@ -1,5 +1,7 @@
 from datetime import date
-from typing import Optional, Dict
+from typing import Optional, Dict, List, NamedTuple
+
+import numpy as np
 
 # Re-using ProductInstanceGS from greenshelf_models for context, but DynamicPricingService will mostly operate on its data.
 # from .greenshelf_models import ProductInstanceGS
@@ -50,6 +52,54 @@ class DynamicPriceResult:
             "status_color_from_greenshelf": self.status_color_from_greenshelf
         }
 
+# BulkPriceResult.adjustment codes: how margin protection changed the discount
+MARGIN_ADJUSTMENT_SUFFIXES = ["", " (Margin Protected)", " (Near Cost)"]
+
+class BulkPriceResult(NamedTuple):
+    """
+    Dynamic prices for many instances as columns, one entry per instance (see
+    DynamicPricingService.reprice). Reasons are kept as a tier index into `tier_templates`
+    (-1 for the standard price) plus a margin adjustment code, and formatted only on demand.
+    """
+    rows: np.ndarray  # Inventory rows priced
+    instance_ids: List[str]
+    sku_codes: np.ndarray
+    skus: List[str]  # By SKU code
+    product_name_codes: np.ndarray
+    product_names: List[str]  # By product name code
+    status_codes: np.ndarray  # Index into greenshelf_models.SPOILAGE_STATUSES
+    predicted_spoilage_days: np.ndarray  # Days since 1970-01-01
+    priced: np.ndarray  # False where no pricing info was available (prices are then 0)
+    original_price: np.ndarray
+    discount_percentage: np.ndarray
+    discounted_price: np.ndarray
+    tier: np.ndarray
+    tier_templates: List[str]
+    adjustment: np.ndarray  # Index into MARGIN_ADJUSTMENT_SUFFIXES
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def reason(self, i: int) -> str:
+        """The reason the per-item path gives for instance i's price."""
+        if not self.priced[i]:
+            return "Pricing info unavailable"
+        tier = self.tier[i]
+        template = self.tier_templates[tier] if tier >= 0 else "Standard Price"
+        return template.format(product_name=self.product_names[self.product_name_codes[i]]) + \
+            MARGIN_ADJUSTMENT_SUFFIXES[self.adjustment[i]]
+
+    def to_dict(self):
+        """Columns as lists, one entry per instance."""
+        return {
+            "instance_id": self.instance_ids,
+            "sku": [self.skus[code] for code in self.sku_codes.tolist()],
+            "original_price": self.original_price.tolist(),
+            "discount_percentage": self.discount_percentage.tolist(),
+            "discounted_price": self.discounted_price.tolist(),
+            "reason": [self.reason(i) for i in range(len(self))]
+        }
+
 # Mock data for product base pricing (could be loaded from config/DB)
 # Using different SKUs from GreenShelf to ensure they are distinct if needed, or can align them.
 # For this demo, let's align them with MOCK_PRODUCT_MASTERS_GS SKUs.
@@ -82,4 +132,3 @@ class DynamicPricingRulesConfig:
     # For hackathon, demand_signal_factor is simplified or passed directly.
     # A more complex system would fetch this from Demand Forecasting service.
     DEFAULT_DEMAND_FACTOR = 1.0
-```
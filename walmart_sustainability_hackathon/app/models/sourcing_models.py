@@ -119,4 +119,3 @@ MOCK_CERTIFICATIONS_SR: Dict[str, CertificationInfo] = {
     "usda_organic": CertificationInfo(id="usda_organic", name="USDA Organic", logo_url="static/img/usda_organic_logo.png", description="Grown and processed according to federal guidelines addressing soil quality, animal raising practices, pest and weed control, and use of additives."),
     "rainforest_alliance": CertificationInfo(id="rainforest_alliance", name="Rainforest Alliance Certified™", logo_url="static/img/rainforest_alliance_logo.png", description="Products sourced from farms or forests certified to standards promoting environmental, social, and economic sustainability.")
 }
-```
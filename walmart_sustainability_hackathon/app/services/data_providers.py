@@ -0,0 +1,232 @@
+import hashlib
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..models.demand_models import WeatherDataPoint, EventDataPoint, CompetitorPricePoint, SocialTrendPoint
+from .demand_statistics import month_of, weekday_of
+from .sales_history_store import SALES_HISTORY_DTYPE
+
+HISTORY_DAYS = 365 * 2
+EVENT_BLOCK_DAYS = 30
+
+
+def _day_start(d: date) -> datetime:
+    return datetime.combine(d, datetime.min.time())
+
+
+class DemandDataProvider(ABC):
+    """
+    Where DemandForecastingService gets its inputs: sales history, weather, events, competitor
+    prices and social trends. Subclasses implement the feeds; randomness the service itself needs
+    (simulated confidence bands, fallback models) comes from rng(), which is deterministic for a
+    given seed and key so identical requests give identical, cacheable results.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+
+    def rng(self, *key) -> np.random.Generator:
+        """A generator seeded from the provider's seed and `key`, e.g. rng('weather', store_id, start_date)."""
+        digest = hashlib.blake2b('|'.join(str(part) for part in key).encode(), digest_size=8).digest()
+        return np.random.default_rng([self.seed, int.from_bytes(digest, 'little')])
+
+    @abstractmethod
+    def sales_history(self, store_id: str, product_sku: str, end_date: Optional[date] = None) -> np.ndarray:
+        """Daily sales before end_date (default today), oldest first, as SALES_HISTORY_DTYPE records."""
+
+    @abstractmethod
+    def weather(self, store_id: str, start_date: date, days: int) -> List[WeatherDataPoint]:
+        ...
+
+    @abstractmethod
+    def events(self, store_id: str, start_date: date, days: int) -> List[EventDataPoint]:
+        ...
+
+    @abstractmethod
+    def competitor_prices(self, store_id: str, product_sku: Optional[str], as_of: date) -> List[CompetitorPricePoint]:
+        ...
+
+    @abstractmethod
+    def social_trends(self, product_sku: str, as_of: date) -> List[SocialTrendPoint]:
+        ...
+
+
+class SeededDemandDataProvider(DemandDataProvider):
+    """
+    Simulated data with the same shape as the original mock generators, drawn from a NumPy
+    Generator per series (and per forecast start date for the forward-looking feeds). Asking
+    twice for the same thing returns the same data, and longer horizons extend shorter ones, so
+    materialized and live forecasts agree.
+    """
+
+    def sales_history(self, store_id: str, product_sku: str, end_date: Optional[date] = None) -> np.ndarray:
+        start_date = (end_date or date.today()) - timedelta(days=HISTORY_DAYS)
+        rng = self.rng('sales', store_id, product_sku, start_date)
+        days = np.datetime64(start_date, 'D') + np.arange(HISTORY_DAYS)
+        months = month_of(days)
+
+        base_sales = 50 + 20 * (weekday_of(days) // 5) + rng.integers(-10, 11, size=HISTORY_DAYS) # Weekday/weekend effect
+        base_sales = base_sales * np.where(np.isin(months, [11, 12]), 1.2, 1.0) # Holiday season
+        base_sales = base_sales * np.where(np.isin(months, [6, 7, 8]), 1.1, 1.0) # Summer
+
+        records = np.empty(HISTORY_DAYS, dtype=SALES_HISTORY_DTYPE)
+        records['day'] = days.astype(np.int32)
+        records['quantity_sold'] = np.maximum(0, np.trunc(base_sales))
+        records['price'] = rng.uniform(5.0, 15.0, size=HISTORY_DAYS)
+        return records
+
+    def weather(self, store_id: str, start_date: date, days: int) -> List[WeatherDataPoint]:
+        # Separate generators per quantity keep every horizon a prefix of the longer ones
+        temperature = self.rng('temperature', store_id, start_date).uniform(5, 30, size=days)
+        precipitation_prob = self.rng('precipitation', store_id, start_date).random(size=days)
+        return [
+            WeatherDataPoint(date=_day_start(start_date + timedelta(days=i)), temperature=t, precipitation_prob=p)
+            for i, (t, p) in enumerate(zip(temperature.tolist(), precipitation_prob.tolist()))
+        ]
+
+    def events(self, store_id: str, start_date: date, days: int) -> List[EventDataPoint]:
+        # Drawn per 30-day block of the horizon, so a short forecast sees the same events as a long one
+        events = []
+        for block in range((days + EVENT_BLOCK_DAYS - 1) // EVENT_BLOCK_DAYS):
+            rng = self.rng('events', store_id, start_date, block)
+            if rng.random() < 0.1: # 10% chance of an event in each 30 days of the forecast period
+                event_day_offset = block * EVENT_BLOCK_DAYS + int(rng.integers(1, EVENT_BLOCK_DAYS - 2))
+                if event_day_offset >= days:
+                    continue
+                event_start_dt = _day_start(start_date + timedelta(days=event_day_offset))
+                event_end_dt = event_start_dt + timedelta(days=int(rng.integers(0, 3)))
+                events.append(EventDataPoint(name="Local Festival", start_date=event_start_dt, end_date=event_end_dt, expected_impact=1.3))
+        return events
+
+    def competitor_prices(self, store_id: str, product_sku: Optional[str], as_of: date) -> List[CompetitorPricePoint]:
+        price = self.rng('competitor_prices', store_id, product_sku, as_of).uniform(4.5, 14.0)
+        return [CompetitorPricePoint(_day_start(as_of - timedelta(days=1)), "CompetitorX", price)]
+
+    def social_trends(self, product_sku: str, as_of: date) -> List[SocialTrendPoint]:
+        sentiment_score = self.rng('social_trends', product_sku, as_of).uniform(-0.5, 0.5)
+        return [SocialTrendPoint(_day_start(as_of - timedelta(days=1)), product_sku, sentiment_score)]
+
+
+class FileDemandDataProvider(DemandDataProvider):
+    """
+    Reads real feeds exported as CSV files into `data_dir`:
+
+        sales.csv              store_id, product_sku, date, quantity_sold, price
+        weather.csv            store_id, date, temperature, precipitation_prob
+        events.csv             store_id, name, start_date, end_date, expected_impact
+        competitor_prices.csv  store_id, product_sku, timestamp, competitor_id, price
+        social_trends.csv      product_sku, timestamp, keyword, sentiment_score
+
+    Each file is read once, on first use, and a missing file is an empty feed.
+    """
+
+    TABLES = {
+        "sales": ["date"],
+        "weather": ["date"],
+        "events": ["start_date", "end_date"],
+        "competitor_prices": ["timestamp"],
+        "social_trends": ["timestamp"],
+    }
+    RECENT_DAYS = 7 # How far back competitor prices and social trends are read
+    # IDs stay strings even when they look numeric (e.g. store "0101" or SKU "00012345")
+    ID_DTYPES = {"store_id": str, "product_sku": str}
+
+    def __init__(self, data_dir: str, seed: int = 0):
+        super().__init__(seed)
+        self.data_dir = data_dir
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _table(self, name: str) -> pd.DataFrame:
+        table = self._tables.get(name)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(name)
+                if table is None:
+                    path = os.path.join(self.data_dir, f"{name}.csv")
+                    date_columns = self.TABLES[name]
+                    if os.path.exists(path):
+                        table = pd.read_csv(path, parse_dates=date_columns, dtype=self.ID_DTYPES)
+                    else:
+                        table = pd.DataFrame(columns=date_columns)
+                    self._tables[name] = table
+        return table
+
+    def sales_history(self, store_id: str, product_sku: str, end_date: Optional[date] = None) -> np.ndarray:
+        sales = self._table("sales")
+        if sales.empty:
+            return np.empty(0, dtype=SALES_HISTORY_DTYPE)
+        sales = sales[(sales['store_id'] == store_id) & (sales['product_sku'] == product_sku) &
+                      (sales['date'] < pd.Timestamp(end_date or date.today()))].sort_values('date')
+
+        records = np.empty(len(sales), dtype=SALES_HISTORY_DTYPE)
+        records['day'] = sales['date'].to_numpy().astype('datetime64[D]').astype(np.int32)
+        records['quantity_sold'] = sales['quantity_sold'].to_numpy()
+        records['price'] = sales['price'].to_numpy()
+        return records
+
+    def weather(self, store_id: str, start_date: date, days: int) -> List[WeatherDataPoint]:
+        weather = self._table("weather")
+        if weather.empty:
+            return []
+        start = pd.Timestamp(start_date)
+        weather = weather[(weather['store_id'] == store_id) & (weather['date'] >= start) &
+                          (weather['date'] < start + pd.Timedelta(days=days))]
+        return [
+            WeatherDataPoint(date=row.date.to_pydatetime(), temperature=row.temperature, precipitation_prob=row.precipitation_prob)
+            for row in weather.itertuples(index=False)
+        ]
+
+    def events(self, store_id: str, start_date: date, days: int) -> List[EventDataPoint]:
+        events = self._table("events")
+        if events.empty:
+            return []
+        start = pd.Timestamp(start_date)
+        events = events[(events['store_id'] == store_id) & (events['end_date'] >= start) &
+                        (events['start_date'] < start + pd.Timedelta(days=days))].sort_values('start_date')
+        return [
+            EventDataPoint(name=row.name, start_date=row.start_date.to_pydatetime(),
+                           end_date=row.end_date.to_pydatetime(), expected_impact=row.expected_impact)
+            for row in events.itertuples(index=False)
+        ]
+
+    def competitor_prices(self, store_id: str, product_sku: Optional[str], as_of: date) -> List[CompetitorPricePoint]:
+        prices = self._table("competitor_prices")
+        if prices.empty:
+            return []
+        as_of_ts = pd.Timestamp(as_of)
+        mask = (prices['store_id'] == store_id) & (prices['timestamp'] < as_of_ts) & \
+               (prices['timestamp'] >= as_of_ts - pd.Timedelta(days=self.RECENT_DAYS))
+        if product_sku is not None:
+            mask &= prices['product_sku'] == product_sku
+        return [
+            CompetitorPricePoint(row.timestamp.to_pydatetime(), row.competitor_id, row.price)
+            for row in prices[mask].itertuples(index=False)
+        ]
+
+    def social_trends(self, product_sku: str, as_of: date) -> List[SocialTrendPoint]:
+        trends = self._table("social_trends")
+        if trends.empty:
+            return []
+        as_of_ts = pd.Timestamp(as_of)
+        trends = trends[(trends['product_sku'] == product_sku) & (trends['timestamp'] < as_of_ts) &
+                        (trends['timestamp'] >= as_of_ts - pd.Timedelta(days=self.RECENT_DAYS))]
+        return [
+            SocialTrendPoint(row.timestamp.to_pydatetime(), row.keyword, row.sentiment_score)
+            for row in trends.itertuples(index=False)
+        ]
+
+
+def default_data_provider() -> DemandDataProvider:
+    """Real feeds from DEMAND_DATA_DIR when it is set, otherwise simulated data seeded by DEMAND_DATA_SEED."""
+    seed = int(os.environ.get('DEMAND_DATA_SEED', '0'))
+    data_dir = os.environ.get('DEMAND_DATA_DIR')
+    if data_dir:
+        return FileDemandDataProvider(data_dir, seed=seed)
+    return SeededDemandDataProvider(seed=seed)
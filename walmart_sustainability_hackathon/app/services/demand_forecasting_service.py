@@ -1,69 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
 from typing import List, Dict, Any, Optional
-import random
+import os
+import threading
+import numpy as np
 import pandas as pd
 
 # Assuming models are in a sibling directory 'models'
 from ..models.demand_models import (
-    SalesDataPoint, WeatherDataPoint, EventDataPoint,
-    CompetitorPricePoint, SocialTrendPoint,
-    ForecastOutputPoint, ForecastResult
+    SalesDataPoint, ForecastOutputPoint, ForecastResult, ScenarioCurve, ScenarioForecastResult
 )
+from .sales_history_store import SalesHistoryStore, SALES_HISTORY_DTYPE
+from .data_providers import DemandDataProvider, default_data_provider
+from .demand_statistics import DemandStatistics
+from .forecast_snapshot import ForecastSnapshot, SNAPSHOT_HORIZON_DAYS
+from .scenario_engine import ScenarioBaseline, apply_scenarios, first_event_mask, weather_mask
 
-# --- Mock Data Generation (can be expanded or moved to a separate mock_data module) ---
-def generate_mock_sales_data(days=365) -> List[SalesDataPoint]:
-    data = []
-    start_date = datetime.now() - timedelta(days=days)
-    for i in range(days):
-        d = start_date + timedelta(days=i)
-        base_sales = 50 + 20 * (d.weekday() // 5) + random.randint(-10, 10) # Weekday/weekend effect
-        if d.month in [11, 12]: base_sales *= 1.2 # Holiday season
-        if d.month in [6, 7, 8]: base_sales *= 1.1 # Summer
-        data.append(SalesDataPoint(timestamp=d, quantity_sold=max(0, int(base_sales)), price=random.uniform(5.0, 15.0)))
-    return data
-
-def generate_mock_weather_data(start_date: date, days=30) -> List[WeatherDataPoint]:
-    data = []
-    for i in range(days):
-        d = start_date + timedelta(days=i)
-        # Convert date to datetime for WeatherDataPoint if necessary, or adjust WeatherDataPoint
-        dt = datetime.combine(d, datetime.min.time())
-        data.append(WeatherDataPoint(date=dt, temperature=random.uniform(5, 30), precipitation_prob=random.random()))
-    return data
-
-def generate_mock_events(start_date: date, days=30) -> List[EventDataPoint]:
-    events = []
-    if random.random() < 0.1: # 10% chance of an event in the forecast period
-        event_day_offset = random.randint(1, days - 3) if days > 3 else 1
-        event_start_dt = datetime.combine(start_date + timedelta(days=event_day_offset), datetime.min.time())
-        event_end_dt = event_start_dt + timedelta(days=random.randint(0, 2))
-        events.append(EventDataPoint(name="Local Festival", start_date=event_start_dt, end_date=event_end_dt, expected_impact=1.3))
-    return events
+DEFAULT_SALES_HISTORY_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'sales_history')
+DEFAULT_FORECAST_SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'forecast_snapshot.npz')
 
 class DemandForecastingService:
-    def __init__(self):
+    def __init__(self, sales_history: Optional[SalesHistoryStore] = None,
+                 data_provider: Optional[DemandDataProvider] = None):
         self.models: Dict[str, Dict[str, Any]] = {} # store_id_product_sku -> trained_model (dummy model info)
-        self.historical_sales_cache: Dict[str, pd.DataFrame] = {} # Cache for historical sales
+        # Sales, weather, events etc.; the default simulated provider is deterministic per seed
+        self.data_provider = data_provider or default_data_provider()
+        # Historical sales, one memory-mapped array per series, shared by all worker processes
+        self.sales_history = sales_history or SalesHistoryStore(
+            os.environ.get('SALES_HISTORY_DIR', DEFAULT_SALES_HISTORY_DIR),
+            memory_budget_bytes=int(os.environ.get('SALES_HISTORY_MEMORY_BUDGET_MB', '256')) * 1024 * 1024
+        )
+        self._series_locks: Dict[str, threading.Lock] = {} # Serializes training/ingest per series
+        # Precomputed forecasts written by ForecastMaterializer; reloaded whenever the file changes
+        self.forecast_snapshot_path = os.environ.get('FORECAST_SNAPSHOT_PATH', DEFAULT_FORECAST_SNAPSHOT_PATH)
+        self._forecast_snapshot: Optional[ForecastSnapshot] = None
+        self._forecast_snapshot_mtime: Optional[int] = None
+        self._forecast_snapshot_lock = threading.Lock()
+
+    def _series_lock(self, model_key: str) -> threading.Lock:
+        return self._series_locks.setdefault(model_key, threading.Lock())
+
+    def _current_model(self, store_id: str, product_sku: str) -> Dict[str, Any]:
+        """The series' model, trained first if missing or stale (fit on a history another process has since extended)."""
+        model_key = f"{store_id}_{product_sku}"
+        model_info = self.models.get(model_key)
+        if model_info is not None and model_info.get("history_length") == self.sales_history.length(model_key):
+            return model_info
+        with self._series_lock(model_key):
+            return self._current_model_locked(store_id, product_sku)
+
+    def _current_model_locked(self, store_id: str, product_sku: str) -> Dict[str, Any]:
+        model_key = f"{store_id}_{product_sku}"
+        model_info = self.models.get(model_key)
+        if model_info is None or model_info.get("history_length") != self.sales_history.length(model_key):
+            self.sales_history.invalidate(model_key) # Its mapping may predate the other process's appends
+            self._train_model_locked(store_id, product_sku)
+            model_info = self.models[model_key]
+        return model_info
+
+    def _get_series_records(self, store_id: str, product_sku: str) -> np.ndarray:
+        return self.sales_history.get(
+            f"{store_id}_{product_sku}", loader=lambda: self.data_provider.sales_history(store_id, product_sku)
+        )
 
     def _get_or_load_historical_sales(self, store_id: str, product_sku: str) -> pd.DataFrame:
-        cache_key = f"{store_id}_{product_sku}"
-        if cache_key not in self.historical_sales_cache:
-            # Simulate loading/generating historical sales
-            sales = generate_mock_sales_data(days=365 * 2) # 2 years of data
-            df = pd.DataFrame([vars(s) for s in sales])
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.set_index('timestamp').sort_index()
-            self.historical_sales_cache[cache_key] = df
-        return self.historical_sales_cache[cache_key]
-
-    def _get_mock_external_data_for_future(self, product_sku: str, store_id: str,
-                                           start_date: date, future_days: int,
-                                           scenario_adjustments: Optional[Dict] = None) -> Dict:
+        records = self._get_series_records(store_id, product_sku)
+        # Columns are views onto the mapped file, not copies
+        return pd.DataFrame(
+            {'quantity_sold': records['quantity_sold'], 'price': records['price']},
+            index=pd.DatetimeIndex(records['day'].astype('datetime64[D]'), name='timestamp'),
+            copy=False
+        )
+
+    def _get_external_data_for_future(self, product_sku: Optional[str], store_id: str,
+                                      start_date: date, future_days: int,
+                                      scenario_adjustments: Optional[Dict] = None) -> Dict:
         if scenario_adjustments is None:
             scenario_adjustments = {}
 
-        weather = generate_mock_weather_data(start_date, days=future_days)
-        events = generate_mock_events(start_date, days=future_days)
+        weather = self.data_provider.weather(store_id, start_date, future_days)
+        events = self.data_provider.events(store_id, start_date, future_days)
 
         # Apply scenario adjustments (simplified)
         event_factor_adj = scenario_adjustments.get("event_impact_multiplier", 1.0)
@@ -76,8 +92,9 @@ class DemandForecastingService:
                 w_point.temperature += temp_adjust_c
 
         # For hackathon, these are mostly placeholders
-        competitor_prices = [CompetitorPricePoint(datetime.now() - timedelta(days=1), "CompetitorX", random.uniform(4.5, 14.0))]
-        social_trends = [SocialTrendPoint(datetime.now() - timedelta(days=1), product_sku, random.uniform(-0.5, 0.5))]
+        competitor_prices = self.data_provider.competitor_prices(store_id, product_sku, date.today())
+        # Social trends are per SKU; store-wide requests (product_sku=None) don't get any
+        social_trends = self.data_provider.social_trends(product_sku, date.today()) if product_sku else []
 
         return {
             "future_weather": weather,
@@ -89,123 +106,441 @@ class DemandForecastingService:
     def _create_future_features_df(self, historical_sales_df: pd.DataFrame,
                                    start_date: date, future_days: int,
                                    external_data_future: Dict) -> pd.DataFrame:
-        future_dates = pd.date_range(start=start_date, periods=future_days, freq='D')
-        df_features = pd.DataFrame(index=future_dates)
-
-        df_features['day_of_week'] = df_features.index.dayofweek
-        df_features['month'] = df_features.index.month
-        df_features['day_of_year'] = df_features.index.dayofyear
+        df_features = self._create_shared_future_features_df(start_date, future_days, external_data_future)
 
         # Lagged sales (e.g., sales from 7 days ago, 14 days ago, 365 days ago)
         # For simplicity, we'll use a generic "base_sales_estimate" from recent history
+        base_sales_estimate = np.nan
         if not historical_sales_df.empty:
             # More robust: use actual lagged values if available for these future dates (e.g. from previous year)
-            # For demo: use rolling mean of last 30 days as a very rough base.
-            df_features['base_sales_estimate'] = historical_sales_df['quantity_sold'].last('30D').mean()
-            df_features['base_sales_estimate'] = df_features['base_sales_estimate'].fillna(historical_sales_df['quantity_sold'].mean())
-            df_features['base_sales_estimate'] = df_features['base_sales_estimate'].fillna(50) # Fallback
-        else:
-            df_features['base_sales_estimate'] = 50
-
-        weather_map = {w.date.date(): w for w in external_data_future["future_weather"]}
-        df_features['temperature'] = df_features.index.map(lambda d: weather_map.get(d.date(), WeatherDataPoint(datetime.combine(d.date(), datetime.min.time()), 15, 0)).temperature)
-        df_features['precipitation_prob'] = df_features.index.map(lambda d: weather_map.get(d.date(), WeatherDataPoint(datetime.combine(d.date(), datetime.min.time()), 15, 0)).precipitation_prob)
-
-        df_features['event_impact_factor'] = 1.0
-        for event in external_data_future["future_events"]:
-            event_period_dates = pd.date_range(start=event.start_date, end=event.end_date, freq='D')
-            for date_idx in df_features.index:
-                if date_idx.normalize() in event_period_dates.normalize(): # Compare date part only
-                    df_features.loc[date_idx, 'event_impact_factor'] = event.expected_impact
+            # For demo: mean of the last 30 days of history as a very rough base.
+            quantity_sold = historical_sales_df['quantity_sold']
+            last_30_days = quantity_sold[quantity_sold.index > quantity_sold.index[-1] - pd.Timedelta(days=30)]
+            base_sales_estimate = last_30_days.mean()
+            if pd.isna(base_sales_estimate):
+                base_sales_estimate = quantity_sold.mean()
+        if pd.isna(base_sales_estimate):
+            base_sales_estimate = 50 # Fallback
+        df_features.insert(3, 'base_sales_estimate', float(base_sales_estimate))
+
+        return df_features
 
-        # Placeholder for competitor/social effects
-        df_features['competitor_effect'] = 1.0
-        df_features['social_trend_effect'] = 1.0
+    def _create_shared_future_features_df(self, start_date: date, future_days: int,
+                                          external_data_future: Dict) -> pd.DataFrame:
+        """Calendar, weather and event features. They depend only on the store, so every SKU there can share them."""
+        future_dates = pd.date_range(start=start_date, periods=future_days, freq='D')
+        day_numbers = future_dates.values.astype('datetime64[D]')
+
+        # Scatter each weather reading onto its forecast day; days without one default to 15°C and no rain
+        temperature = np.full(future_days, 15.0)
+        precipitation_prob = np.zeros(future_days)
+        weather = external_data_future["future_weather"]
+        if weather:
+            offsets = (np.array([w.date for w in weather], dtype='datetime64[D]') - day_numbers[0]).astype(int)
+            in_horizon = (offsets >= 0) & (offsets < future_days)
+            temperature[offsets[in_horizon]] = np.array([w.temperature for w in weather], dtype=float)[in_horizon]
+            precipitation_prob[offsets[in_horizon]] = np.array([w.precipitation_prob for w in weather], dtype=float)[in_horizon]
+
+        # One mask per event over the whole horizon; later events win where they overlap
+        event_impact_factor = np.ones(future_days)
+        for event in external_data_future["future_events"]:
+            in_event = (day_numbers >= np.datetime64(event.start_date, 'D')) & \
+                       (day_numbers <= np.datetime64(event.end_date, 'D'))
+            event_impact_factor[in_event] = event.expected_impact
+
+        df_features = pd.DataFrame({
+            'day_of_week': future_dates.dayofweek,
+            'month': future_dates.month,
+            'day_of_year': future_dates.dayofyear,
+            'temperature': temperature,
+            'precipitation_prob': precipitation_prob,
+            'event_impact_factor': event_impact_factor,
+            # Placeholder for competitor/social effects
+            'competitor_effect': np.ones(future_days),
+            'social_trend_effect': np.ones(future_days)
+        }, index=future_dates)
 
         return df_features
 
+    @staticmethod
+    def _lookup_array(averages: Dict[int, float], size: int, default: float) -> np.ndarray:
+        """Turns a {key: average} dict into an array indexable by key, missing keys -> default."""
+        lookup = np.full(size, default, dtype=float)
+        for key, value in averages.items():
+            lookup[key] = value
+        return lookup
+
+    def _base_predictions(self, model_info: Dict[str, Any], features_df: pd.DataFrame) -> np.ndarray:
+        """Heuristic model output for every forecast day at once."""
+        if model_info["type"] != "heuristic_average": # fallback_average
+            return np.full(len(features_df), float(model_info["value"]))
+
+        overall_average = model_info["overall_average"]
+        daily_lookup = self._lookup_array(model_info["daily_averages"], 7, overall_average)
+        monthly_lookup = self._lookup_array(model_info["monthly_averages"], 13, overall_average)
+        # Day-of-week average with a simple month adjustment
+        return daily_lookup[features_df['day_of_week'].to_numpy()] * \
+            (monthly_lookup[features_df['month'].to_numpy()] / overall_average)
+
+    def _forecast_points_from_features(self, model_key: str, model_info: Dict[str, Any],
+                                       features_df: pd.DataFrame) -> List[ForecastOutputPoint]:
+        predictions = self._base_predictions(model_info, features_df)
+
+        # Apply feature impacts (multiplicative for simplicity)
+        predictions = predictions * (1 + (features_df['temperature'].to_numpy() - 15) * 0.005) # Small temp effect
+        predictions *= (1 + features_df['precipitation_prob'].to_numpy() * -0.05) # Small rain effect
+        predictions *= features_df['event_impact_factor'].to_numpy()
+        # predictions *= features_df['competitor_effect'].to_numpy() # Placeholder
+        # predictions *= features_df['social_trend_effect'].to_numpy() # Placeholder
+        predictions = np.maximum(0, predictions) # Ensure non-negative
+
+        return self._forecast_points(model_key, features_df.index.to_pydatetime(), predictions)
+
+    def _confidence_margin_fractions(self, model_key: str, start_date, days: int) -> np.ndarray:
+        # Simulated band widths, fixed per series and start day so identical requests get identical bands
+        rng = self.data_provider.rng('confidence', model_key, np.datetime64(start_date, 'D'))
+        return rng.uniform(0.1, 0.25, size=days)
+
+    def _forecast_points(self, model_key: str, point_dates, predictions: np.ndarray) -> List[ForecastOutputPoint]:
+        # Simulate confidence interval
+        confidence_margin = predictions * self._confidence_margin_fractions(model_key, point_dates[0], len(predictions))
+
+        return [
+            ForecastOutputPoint(date=point_date, predicted_units=units, confidence_low=low, confidence_high=high)
+            for point_date, units, low, high in zip(
+                point_dates,
+                np.rint(predictions).astype(int).tolist(),
+                np.maximum(0, np.rint(predictions - confidence_margin)).astype(int).tolist(),
+                np.rint(predictions + confidence_margin).astype(int).tolist()
+            )
+        ]
+
     def train_model(self, store_id: str, product_sku: str):
         """
         Dummy training: calculates daily averages and overall average from historical data.
         In a real scenario, this would train a proper ML model.
+        This is the full fit; afterwards ingest_sales() keeps the model current incrementally.
         """
         model_key = f"{store_id}_{product_sku}"
-        historical_sales_df = self._get_or_load_historical_sales(store_id, product_sku)
+        with self._series_lock(model_key):
+            self._train_model_locked(store_id, product_sku)
 
-        if historical_sales_df.empty:
-            self.models[model_key] = {"type": "fallback_average", "value": random.randint(20, 80)}
+    def _train_model_locked(self, store_id: str, product_sku: str):
+        model_key = f"{store_id}_{product_sku}"
+        records = self._get_series_records(store_id, product_sku)
+
+        if len(records) == 0:
+            self.models[model_key] = {
+                "type": "fallback_average", "value": int(self.data_provider.rng('fallback', model_key).integers(20, 81)),
+                "history_length": 0
+            }
             return
 
-        daily_avg = historical_sales_df.groupby(historical_sales_df.index.dayofweek)['quantity_sold'].mean().to_dict()
-        monthly_avg = historical_sales_df.groupby(historical_sales_df.index.month)['quantity_sold'].mean().to_dict()
-        overall_avg = historical_sales_df['quantity_sold'].mean()
+        # Running sums/counts per weekday and month, from which the averages are derived
+        statistics = DemandStatistics.from_history(records['day'], records['quantity_sold'])
+        # The persisted history length it was fit on, so a worker can tell when another one ingested sales
+        self.models[model_key] = {**statistics.to_model_info(), "history_length": len(records)}
+        # print(f"Dummy model trained for {model_key}: Averages computed.")
+
+    def ingest_sales(self, store_id: str, product_sku: str, sales: List[SalesDataPoint]) -> Dict[str, Any]:
+        """
+        Appends new sales to a series' history and folds them into its model, O(1) per observation.
+
+        The history file and the model are replaced together under the series' lock, held across
+        processes through the history's file lock, and the new model is published with a single
+        assignment, so a concurrent forecast sees either the model before the batch or the one
+        after it, never a partial update. A model fit before another process ingested sales is
+        refit from the persisted history first. Sales dated before the
+        series' last recorded day are rejected (ValueError) and leave the series unchanged.
+        """
+        if not sales:
+            raise ValueError("No sales to ingest.")
+        model_key = f"{store_id}_{product_sku}"
+        records = np.empty(len(sales), dtype=SALES_HISTORY_DTYPE)
+        records['day'] = np.array([s.timestamp for s in sales], dtype='datetime64[D]').astype(np.int32)
+        records['quantity_sold'] = [s.quantity_sold for s in sales]
+        records['price'] = [s.price for s in sales]
+        records = records[np.argsort(records['day'], kind='stable')]
+
+        with self._series_lock(model_key), self.sales_history.series_lock(model_key):
+            model_info = self._current_model_locked(store_id, product_sku) # Fit over the history before the new sales
+
+            statistics = model_info["statistics"].copy() if "statistics" in model_info else DemandStatistics()
+            if len(records) == 1:
+                statistics.add(int(records['day'][0]), int(records['quantity_sold'][0]))
+            else:
+                statistics.add_many(records['day'], records['quantity_sold'])
+
+            history = self.sales_history.append(
+                model_key, records, loader=lambda: self.data_provider.sales_history(store_id, product_sku)
+            )
+            self.models[model_key] = {**statistics.to_model_info(), "history_length": len(history)}
 
-        self.models[model_key] = {
-            "type": "heuristic_average",
-            "daily_averages": daily_avg,
-            "monthly_averages": monthly_avg,
-            "overall_average": overall_avg if pd.notna(overall_avg) else 50
+        return {
+            "store_id": store_id,
+            "product_sku": product_sku,
+            "ingested": len(records),
+            "observations": statistics.total_count,
+            "overall_average": round(float(statistics.total_sum / statistics.total_count), 2)
         }
-        # print(f"Dummy model trained for {model_key}: Averages computed.")
 
-    def predict(self, store_id: str, product_sku: str, future_days: int,
-                scenario_adjustments: Optional[Dict] = None) -> ForecastResult:
+    def materialize_forecasts(self, store_ids: List[str], product_skus: List[str],
+                              horizon_days: int = SNAPSHOT_HORIZON_DAYS) -> ForecastSnapshot:
+        """
+        Precomputes the scenario-free part of every store x SKU forecast for ForecastMaterializer.
+        External data is drawn once per store, as in predict_many(), and kept in the snapshot so
+        requests can re-apply scenario adjustments to it.
+        """
+        start_date_for_forecast = date.today() + timedelta(days=1)
+        day_numbers = np.datetime64(start_date_for_forecast, 'D') + np.arange(horizon_days)
+        temperature = np.empty((len(store_ids), horizon_days))
+        weather_masks = np.zeros((len(store_ids), horizon_days), dtype=bool)
+        rain_effect = np.empty((len(store_ids), horizon_days))
+        event_impact_factor = np.empty((len(store_ids), horizon_days))
+        first_event_masks = np.zeros((len(store_ids), horizon_days), dtype=bool)
+        first_event_names = []
+        series_keys, series_store_rows, series_history_lengths = [], [], []
+        base_predictions = np.empty((len(store_ids) * len(product_skus), horizon_days))
+
+        for store_row, store_id in enumerate(store_ids):
+            external_data_future = self._get_external_data_for_future(
+                None, store_id, start_date_for_forecast, horizon_days
+            )
+            features_df = self._create_shared_future_features_df(
+                start_date_for_forecast, horizon_days, external_data_future
+            )
+            temperature[store_row] = features_df['temperature'].to_numpy()
+            weather_masks[store_row] = weather_mask(day_numbers, external_data_future["future_weather"])
+            rain_effect[store_row] = 1 + features_df['precipitation_prob'].to_numpy() * -0.05
+            event_impact_factor[store_row] = features_df['event_impact_factor'].to_numpy()
+
+            first_event_masks[store_row] = first_event_mask(day_numbers, external_data_future["future_events"])
+            first_event_names.append(self._first_event_name(external_data_future))
+
+            for product_sku in product_skus:
+                model_key = f"{store_id}_{product_sku}"
+                model_info = self._current_model(store_id, product_sku)
+                series_history_lengths.append(model_info["history_length"]) # The history it was fit on
+                base_predictions[len(series_keys)] = self._base_predictions(model_info, features_df)
+                series_keys.append(model_key)
+                series_store_rows.append(store_row)
+
+        return ForecastSnapshot(
+            start_date=start_date_for_forecast,
+            generated_at=datetime.now(),
+            store_ids=store_ids,
+            temperature=temperature,
+            weather_mask=weather_masks,
+            rain_effect=rain_effect,
+            event_impact_factor=event_impact_factor,
+            first_event_mask=first_event_masks,
+            first_event_names=first_event_names,
+            series_keys=series_keys,
+            series_store_rows=np.array(series_store_rows, dtype=np.int32),
+            base_predictions=base_predictions[:len(series_keys)],
+            series_history_lengths=np.array(series_history_lengths, dtype=np.int64)
+        )
+
+    def _current_forecast_snapshot(self) -> Optional[ForecastSnapshot]:
+        try:
+            mtime = os.stat(self.forecast_snapshot_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._forecast_snapshot_mtime:
+            with self._forecast_snapshot_lock:
+                if mtime != self._forecast_snapshot_mtime:
+                    try:
+                        self._forecast_snapshot = ForecastSnapshot.load(self.forecast_snapshot_path)
+                    except KeyError: # Written in an older layout; served live until the materializer replaces it
+                        self._forecast_snapshot = None
+                    self._forecast_snapshot_mtime = mtime
+        return self._forecast_snapshot
+
+    def _snapshot_baseline(self, store_id: str, product_sku: str, start_date: date,
+                           future_days: int) -> Optional[ScenarioBaseline]:
+        """The series' forecast inputs from the materialized snapshot, or None if it can't provide them."""
+        snapshot = self._current_forecast_snapshot()
+        if snapshot is None:
+            return None
         model_key = f"{store_id}_{product_sku}"
-        if model_key not in self.models:
-            self.train_model(store_id, product_sku) # Train dummy model if not exists
+        row = snapshot.series_index.get(model_key)
+        if row is None:
+            return None
+        # The persisted history, not this process's models: another worker may have ingested sales
+        if self.sales_history.length(model_key) != snapshot.series_history_lengths[row]:
+            return None # Sales were ingested since the snapshot was taken
+        return snapshot.baseline(row, start_date, future_days)
+
+    def _live_baseline(self, store_id: str, product_sku: str, start_date: date,
+                       future_days: int) -> ScenarioBaseline:
+        """Computes the series' forecast inputs without any scenario, as predict() would."""
+        model_info = self._current_model(store_id, product_sku)
+
+        external_data_future = self._get_external_data_for_future(product_sku, store_id, start_date, future_days)
+        features_df = self._create_shared_future_features_df(start_date, future_days, external_data_future)
+        dates = features_df.index.values.astype('datetime64[D]')
+        return ScenarioBaseline(
+            dates=dates,
+            base_predictions=self._base_predictions(model_info, features_df),
+            temperature=features_df['temperature'].to_numpy(),
+            weather_mask=weather_mask(dates, external_data_future["future_weather"]),
+            rain_effect=1 + features_df['precipitation_prob'].to_numpy() * -0.05,
+            event_impact_factor=features_df['event_impact_factor'].to_numpy(),
+            first_event_mask=first_event_mask(dates, external_data_future["future_events"]),
+            first_event_name=self._first_event_name(external_data_future)
+        )
 
-        model_info = self.models[model_key]
+    def _forecast_from_snapshot(self, store_id: str, product_sku: str, start_date: date, future_days: int,
+                                scenario_adjustments: Optional[Dict]) -> Optional[ForecastResult]:
+        """Serves a forecast from the materialized snapshot, or returns None if it can't."""
+        baseline = self._snapshot_baseline(store_id, product_sku, start_date, future_days)
+        if baseline is None:
+            return None
 
+        predictions = apply_scenarios(baseline, [scenario_adjustments])[0]
+        return ForecastResult(
+            product_sku=product_sku,
+            store_id=store_id,
+            forecast_points=self._forecast_points(
+                f"{store_id}_{product_sku}", baseline.dates.astype('datetime64[us]').tolist(), predictions
+            ),
+            influencing_factors_summary=self._influencing_factors_summary(scenario_adjustments, baseline.first_event_name)
+        )
+
+    def predict_scenarios(self, store_id: str, product_sku: str, future_days: int,
+                          scenarios: List[Dict], scenario_names: Optional[List[str]] = None) -> ScenarioForecastResult:
+        """
+        What-if sweep: the baseline forecast plus one curve per scenario_adjustments dict.
+        The baseline inputs are computed (or read from the snapshot) once, and every scenario is
+        applied to them in one vectorized pass, so a sweep costs little more than a single forecast.
+        """
         start_date_for_forecast = date.today() + timedelta(days=1)
+        baseline = self._snapshot_baseline(store_id, product_sku, start_date_for_forecast, future_days)
+        if baseline is None:
+            baseline = self._live_baseline(store_id, product_sku, start_date_for_forecast, future_days)
+        if scenario_names is None:
+            scenario_names = [f"scenario_{i + 1}" for i in range(len(scenarios))]
+
+        predictions = apply_scenarios(baseline, [{}] + list(scenarios)) # Row 0 is the baseline
+        # One confidence margin draw per day, shared by all curves so they stay comparable
+        confidence_margin = predictions * self._confidence_margin_fractions(
+            f"{store_id}_{product_sku}", start_date_for_forecast, future_days
+        )
+        predicted_units = np.rint(predictions).astype(int).tolist()
+        confidence_low = np.maximum(0, np.rint(predictions - confidence_margin)).astype(int).tolist()
+        confidence_high = np.rint(predictions + confidence_margin).astype(int).tolist()
+
+        curves = [
+            ScenarioCurve(
+                name=name,
+                scenario_adjustments=scenario,
+                predicted_units=predicted_units[i],
+                confidence_low=confidence_low[i],
+                confidence_high=confidence_high[i],
+                influencing_factors_summary=self._influencing_factors_summary(scenario, baseline.first_event_name)
+            )
+            for i, (name, scenario) in enumerate(zip(["baseline"] + list(scenario_names), [{}] + list(scenarios)))
+        ]
+        return ScenarioForecastResult(
+            product_sku=product_sku,
+            store_id=store_id,
+            dates=baseline.dates.astype('datetime64[us]').tolist(),
+            baseline=curves[0],
+            scenarios=curves[1:]
+        )
+
+    def predict(self, store_id: str, product_sku: str, future_days: int,
+                scenario_adjustments: Optional[Dict] = None) -> ForecastResult:
+        start_date_for_forecast = date.today() + timedelta(days=1)
+        snapshot_result = self._forecast_from_snapshot(
+            store_id, product_sku, start_date_for_forecast, future_days, scenario_adjustments
+        )
+        if snapshot_result is not None:
+            return snapshot_result
+
+        model_key = f"{store_id}_{product_sku}"
+        model_info = self._current_model(store_id, product_sku) # Retrained if another worker ingested sales
 
         historical_sales_df = self._get_or_load_historical_sales(store_id, product_sku)
-        external_data_future = self._get_mock_external_data_for_future(
+        external_data_future = self._get_external_data_for_future(
             product_sku, store_id, start_date_for_forecast, future_days, scenario_adjustments
         )
         future_features_df = self._create_future_features_df(
             historical_sales_df, start_date_for_forecast, future_days, external_data_future
         )
 
-        forecast_points: List[ForecastOutputPoint] = []
-        influencing_factors_summary = [] # For demo purposes
+        forecast_points = self._forecast_points_from_features(model_key, model_info, future_features_df)
+        influencing_factors_summary = self._influencing_factors_summary(
+            scenario_adjustments, self._first_event_name(external_data_future)
+        )
 
-        for idx_date, row in future_features_df.iterrows():
-            # Apply heuristic model
-            if model_info["type"] == "heuristic_average":
-                day_of_week = idx_date.dayofweek
-                month = idx_date.month
-                base_pred = model_info["daily_averages"].get(day_of_week, model_info["overall_average"])
-                # Simple month adjustment
-                base_pred = base_pred * (model_info["monthly_averages"].get(month, model_info["overall_average"]) / model_info["overall_average"])
-            else: # fallback_average
-                base_pred = model_info["value"]
-
-            # Apply feature impacts (multiplicative for simplicity)
-            final_prediction = base_pred
-            final_prediction *= (1 + (row['temperature'] - 15) * 0.005) # Small temp effect
-            final_prediction *= (1 + row['precipitation_prob'] * -0.05) # Small rain effect
-            final_prediction *= row['event_impact_factor']
-            # final_prediction *= row['competitor_effect'] # Placeholder
-            # final_prediction *= row['social_trend_effect'] # Placeholder
-
-            final_prediction = max(0, final_prediction) # Ensure non-negative
-
-            # Simulate confidence interval
-            confidence_margin = final_prediction * random.uniform(0.1, 0.25)
-
-            forecast_points.append(
-                ForecastOutputPoint(
-                    date=idx_date.to_pydatetime(), # Convert Timestamp to datetime
-                    predicted_units=round(final_prediction),
-                    confidence_low=max(0, round(final_prediction - confidence_margin)),
-                    confidence_high=round(final_prediction + confidence_margin)
-                )
+        return ForecastResult(
+            product_sku=product_sku,
+            store_id=store_id,
+            forecast_points=forecast_points,
+            influencing_factors_summary=influencing_factors_summary
+        )
+
+    def predict_many(self, store_ids: List[str], product_skus: List[str], future_days: int,
+                     scenario_adjustments: Optional[Dict] = None,
+                     max_workers: int = 8) -> List[ForecastResult]:
+        """
+        Forecasts every store x SKU pair in one call, e.g. a whole category or a whole store.
+        External data and the date/weather/event features are built once per store and shared by
+        all of its SKUs; the per-SKU model application runs on a thread pool for large assortments.
+        SKUs covered by the materialized forecast snapshot are served from it instead.
+        """
+        start_date_for_forecast = date.today() + timedelta(days=1)
+        results: List[ForecastResult] = []
+
+        for store_id in store_ids:
+            external_data_future = self._get_external_data_for_future(
+                None, store_id, start_date_for_forecast, future_days, scenario_adjustments
+            )
+            shared_features_df = self._create_shared_future_features_df(
+                start_date_for_forecast, future_days, external_data_future
+            )
+            influencing_factors_summary = self._influencing_factors_summary(
+                scenario_adjustments, self._first_event_name(external_data_future)
             )
 
+            def forecast_sku(product_sku: str) -> ForecastResult:
+                snapshot_result = self._forecast_from_snapshot(
+                    store_id, product_sku, start_date_for_forecast, future_days, scenario_adjustments
+                )
+                if snapshot_result is not None:
+                    return snapshot_result
+                model_key = f"{store_id}_{product_sku}"
+                return ForecastResult(
+                    product_sku=product_sku,
+                    store_id=store_id,
+                    forecast_points=self._forecast_points_from_features(
+                        model_key, self._current_model(store_id, product_sku), shared_features_df
+                    ),
+                    influencing_factors_summary=list(influencing_factors_summary)
+                )
+
+            if max_workers > 1 and len(product_skus) > 1:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(product_skus))) as executor:
+                    results.extend(executor.map(forecast_sku, product_skus))
+            else:
+                results.extend(forecast_sku(product_sku) for product_sku in product_skus)
+
+        return results
+
+    @staticmethod
+    def _first_event_name(external_data_future: Dict) -> str:
+        events = external_data_future["future_events"]
+        return events[0].name if events else ''
+
+    def _influencing_factors_summary(self, scenario_adjustments: Optional[Dict],
+                                     first_event_name: str) -> List[Dict[str, str]]:
+        influencing_factors_summary = [] # For demo purposes
+
         # Simplified influencing factors based on scenario adjustments
         if scenario_adjustments:
-            if scenario_adjustments.get("event_impact_multiplier", 1.0) != 1.0 and external_data_future["future_events"]:
-                event_name = external_data_future["future_events"][0].name
+            if scenario_adjustments.get("event_impact_multiplier", 1.0) != 1.0 and first_event_name:
+                event_name = first_event_name
                 factor = scenario_adjustments["event_impact_multiplier"]
                 influencing_factors_summary.append({
                     "factor": f"Scenario: {event_name}",
@@ -217,13 +552,7 @@ class DemandForecastingService:
                     "impact_description": f"Temperature adjusted by {scenario_adjustments['weather_override']['temperature_increase_celsius']}°C"
                 })
 
-
-        return ForecastResult(
-            product_sku=product_sku,
-            store_id=store_id,
-            forecast_points=forecast_points,
-            influencing_factors_summary=influencing_factors_summary
-        )
+        return influencing_factors_summary
 
 # Example usage (for testing, not part of Flask app directly here)
 if __name__ == '__main__':
@@ -246,4 +575,3 @@ if __name__ == '__main__':
     for point in forecast2.forecast_points:
         print(f"  {point.date.strftime('%Y-%m-%d')}: Pred={point.predicted_units}, Low={point.confidence_low}, High={point.confidence_high}")
     print(f"Influencing factors: {forecast2.influencing_factors_summary}")
-```
@@ -0,0 +1,90 @@
+from typing import Any, Dict
+
+import numpy as np
+
+# 1970-01-01 (day 0) was a Thursday; Monday is 0 as in pandas' dayofweek
+_EPOCH_WEEKDAY = 3
+
+
+def weekday_of(days: np.ndarray) -> np.ndarray:
+    """Monday=0 weekday for day numbers (days since 1970-01-01)."""
+    return (np.asarray(days, dtype=np.int64) + _EPOCH_WEEKDAY) % 7
+
+
+def month_of(days: np.ndarray) -> np.ndarray:
+    """Calendar month (1-12) for day numbers (days since 1970-01-01)."""
+    months_since_epoch = np.asarray(days, dtype='datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return months_since_epoch % 12 + 1
+
+
+class DemandStatistics:
+    """
+    Running sums and counts of units sold per weekday and per month for one series.
+
+    These are all the heuristic model needs, so it can be kept current as sales arrive: adding an
+    observation is O(1) and never rescans the history. Instances are treated as immutable once
+    published in a model; updates go to a copy() that is swapped in afterwards.
+    """
+
+    def __init__(self):
+        self.weekday_sums = np.zeros(7)
+        self.weekday_counts = np.zeros(7, dtype=np.int64)
+        self.month_sums = np.zeros(13)  # Indexed by month, slot 0 unused
+        self.month_counts = np.zeros(13, dtype=np.int64)
+        self.total_sum = 0.0
+        self.total_count = 0
+
+    @classmethod
+    def from_history(cls, days: np.ndarray, quantities: np.ndarray) -> 'DemandStatistics':
+        """Full fit over a series' history, one pass per grouping."""
+        stats = cls()
+        stats.add_many(days, quantities)
+        return stats
+
+    def copy(self) -> 'DemandStatistics':
+        stats = DemandStatistics()
+        stats.weekday_sums = self.weekday_sums.copy()
+        stats.weekday_counts = self.weekday_counts.copy()
+        stats.month_sums = self.month_sums.copy()
+        stats.month_counts = self.month_counts.copy()
+        stats.total_sum = self.total_sum
+        stats.total_count = self.total_count
+        return stats
+
+    def add(self, day: int, quantity: float) -> None:
+        weekday = (day + _EPOCH_WEEKDAY) % 7
+        month = int(month_of(day))
+        self.weekday_sums[weekday] += quantity
+        self.weekday_counts[weekday] += 1
+        self.month_sums[month] += quantity
+        self.month_counts[month] += 1
+        self.total_sum += quantity
+        self.total_count += 1
+
+    def add_many(self, days: np.ndarray, quantities: np.ndarray) -> None:
+        quantities = np.asarray(quantities, dtype=float)
+        weekdays = weekday_of(days)
+        months = month_of(days)
+        self.weekday_sums += np.bincount(weekdays, weights=quantities, minlength=7)
+        self.weekday_counts += np.bincount(weekdays, minlength=7)
+        self.month_sums += np.bincount(months, weights=quantities, minlength=13)
+        self.month_counts += np.bincount(months, minlength=13)
+        self.total_sum += float(quantities.sum())
+        self.total_count += len(quantities)
+
+    def to_model_info(self) -> Dict[str, Any]:
+        """The model dict DemandForecastingService predicts from; groupings with no sales are left out."""
+        return {
+            "type": "heuristic_average",
+            "daily_averages": {
+                int(weekday): self.weekday_sums[weekday] / self.weekday_counts[weekday]
+                for weekday in np.flatnonzero(self.weekday_counts)
+            },
+            "monthly_averages": {
+                int(month): self.month_sums[month] / self.month_counts[month]
+                for month in np.flatnonzero(self.month_counts)
+            },
+            "overall_average": self.total_sum / self.total_count if self.total_count else 50,
+            "observations": self.total_count,
+            "statistics": self
+        }
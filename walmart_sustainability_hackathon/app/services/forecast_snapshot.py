@@ -0,0 +1,161 @@
+import logging
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .scenario_engine import ScenarioBaseline
+
+logger = logging.getLogger(__name__)
+
+# Longest forecast the API serves (90 days) plus a week of slack, so a snapshot taken a few days
+# ago still covers every request until the next one is written
+SNAPSHOT_HORIZON_DAYS = 97
+
+
+class ForecastSnapshot:
+    """
+    Precomputed, scenario-free forecasts for many store/SKU series over a fixed horizon.
+
+    Everything is dense arrays: one row of base predictions (model output) per series, plus the
+    per-store inputs: temperature and which days have a weather reading, the rain effect, event
+    impact factors and which days the store's first event covers. Serving a forecast is a dict
+    lookup and scenario_engine.apply_scenarios() over a slice of the horizon. Floats are kept as
+    float64 so served forecasts match the live path's exactly.
+    """
+
+    def __init__(self, start_date: date, generated_at: datetime,
+                 store_ids: List[str], temperature: np.ndarray, weather_mask: np.ndarray, rain_effect: np.ndarray,
+                 event_impact_factor: np.ndarray, first_event_mask: np.ndarray, first_event_names: List[str],
+                 series_keys: List[str], series_store_rows: np.ndarray,
+                 base_predictions: np.ndarray, series_history_lengths: np.ndarray):
+        self.start_date = start_date
+        self.generated_at = generated_at
+        self.store_ids = list(store_ids)
+        self.temperature = temperature  # (stores, horizon)
+        self.weather_mask = weather_mask  # (stores, horizon)
+        self.rain_effect = rain_effect  # (stores, horizon)
+        self.event_impact_factor = event_impact_factor  # (stores, horizon)
+        self.first_event_mask = first_event_mask  # (stores, horizon), days a scenario's event multiplier applies to
+        self.first_event_names = list(first_event_names)  # '' for stores without events
+        self.series_keys = list(series_keys)  # "<store_id>_<product_sku>", as DemandForecastingService.models
+        self.series_store_rows = series_store_rows  # (series,) row into the per-store arrays
+        self.base_predictions = base_predictions  # (series, horizon)
+        self.series_history_lengths = series_history_lengths  # (series,) sales history records the model was fit on
+        self.series_index: Dict[str, int] = {key: row for row, key in enumerate(self.series_keys)}
+
+    @property
+    def horizon_days(self) -> int:
+        return self.base_predictions.shape[1]
+
+    def baseline(self, row: int, start_date: date, future_days: int) -> Optional[ScenarioBaseline]:
+        """The series' scenario-free forecast inputs for the requested days, or None if they fall outside the horizon."""
+        offset = (start_date - self.start_date).days
+        if offset < 0 or offset + future_days > self.horizon_days:
+            return None
+        days = slice(offset, offset + future_days)
+        store_row = self.series_store_rows[row]
+        return ScenarioBaseline(
+            dates=np.datetime64(start_date, 'D') + np.arange(future_days),
+            base_predictions=self.base_predictions[row, days],
+            temperature=self.temperature[store_row, days],
+            weather_mask=self.weather_mask[store_row, days],
+            rain_effect=self.rain_effect[store_row, days],
+            event_impact_factor=self.event_impact_factor[store_row, days],
+            first_event_mask=self.first_event_mask[store_row, days],
+            first_event_name=self.first_event_names[store_row]
+        )
+
+    def save(self, path: str) -> None:
+        """Writes the snapshot as one uncompressed .npz, swapped in atomically for readers."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    start_date=np.datetime64(self.start_date, 'D'),
+                    generated_at=np.datetime64(self.generated_at, 's'),
+                    store_ids=np.array(self.store_ids, dtype=str),
+                    temperature=self.temperature.astype(np.float64),
+                    weather_mask=self.weather_mask,
+                    rain_effect=self.rain_effect.astype(np.float64),
+                    event_impact_factor=self.event_impact_factor.astype(np.float64),
+                    first_event_mask=self.first_event_mask,
+                    first_event_names=np.array(self.first_event_names, dtype=str),
+                    series_keys=np.array(self.series_keys, dtype=str),
+                    series_store_rows=self.series_store_rows.astype(np.int32),
+                    base_predictions=self.base_predictions.astype(np.float64),
+                    series_history_lengths=self.series_history_lengths.astype(np.int64)
+                )
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'ForecastSnapshot':
+        with np.load(path) as data:
+            return cls(
+                start_date=data['start_date'].astype(date),
+                generated_at=data['generated_at'].astype(datetime),
+                store_ids=data['store_ids'].tolist(),
+                temperature=data['temperature'],
+                weather_mask=data['weather_mask'],
+                rain_effect=data['rain_effect'],
+                event_impact_factor=data['event_impact_factor'],
+                first_event_mask=data['first_event_mask'],
+                first_event_names=data['first_event_names'].tolist(),
+                series_keys=data['series_keys'].tolist(),
+                series_store_rows=data['series_store_rows'],
+                base_predictions=data['base_predictions'],
+                series_history_lengths=data['series_history_lengths']
+            )
+
+
+class ForecastMaterializer:
+    """
+    Background job that rebuilds the forecast snapshot on a schedule.
+
+    `materialize` returns a fresh ForecastSnapshot (e.g. DemandForecastingService.materialize_forecasts
+    for every known store/SKU pair); it is saved to `path`, where request handlers pick it up.
+    The first run starts immediately. A failed run keeps the previous snapshot in place.
+    """
+
+    def __init__(self, materialize: Callable[[], ForecastSnapshot], path: str, interval_seconds: float = 3600.0):
+        self.materialize = materialize
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> ForecastSnapshot:
+        snapshot = self.materialize()
+        snapshot.save(self.path)
+        logger.info("Materialized %d forecast series from %s", len(snapshot.series_keys), snapshot.start_date)
+        return snapshot
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Forecast materialization failed")
+            if self._stop.wait(self.interval_seconds):
+                return
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="forecast-materializer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
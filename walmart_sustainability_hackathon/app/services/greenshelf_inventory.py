@@ -0,0 +1,377 @@
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..models.greenshelf_models import ProductInstanceGS, SensorReading, SPOILAGE_STATUSES, STATUS_CODES, EPOCH_ORDINAL
+from .shelf_sensor_streams import ShelfSensorStream, US_PER_HOUR
+from .spoilage_engine import average_temperatures
+
+
+def _to_us(timestamp: datetime) -> int:
+    return int(np.datetime64(timestamp, 'us').astype(np.int64))
+
+
+def _reading_columns(reading: SensorReading) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """One reading as the (time_us, temperature_c, humidity_pct) columns record_shelf_readings takes."""
+    return (
+        np.array([_to_us(reading.timestamp)]), np.array([reading.temperature_c], dtype=float),
+        np.array([np.nan if reading.humidity_pct is None else reading.humidity_pct], dtype=float)
+    )
+
+
+class StringTable:
+    """Interns strings (SKUs, shelf IDs, product names) to dense int codes."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value: str) -> Optional[int]:
+        """The value's code, or None if it was never interned."""
+        return self.codes.get(value)
+
+    def __getitem__(self, code) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class GreenShelfInventory:
+    """
+    Structure-of-arrays store for every product instance on the shelves.
+
+    Each instance is one row across a set of NumPy column arrays (dates as days since 1970-01-01,
+    quantities, shelf arrival, status code, pricing), with SKUs, shelf IDs and product names
+    interned in string tables. Rows are appended
+    and never move or get reused, so ProductInstanceGS views stay valid; a removed instance just
+    has its row marked inactive. Whole-store scans are array operations over the first `size`
+    rows, and columns grow by doubling.
+
+    Lookups go through hash indexes kept up to date by add(), move(), remove() and set_status():
+    instance_id -> row, plus sku / shelf / status code -> set of rows. The same calls keep a
+    status-count histogram per shelf, so per-shelf summaries never touch instances.
+
+    Sensor data is per shelf, as in the store: each shelf code has one ShelfSensorStream shared by
+    everything on it, so a reading is stored once however many instances it covers. An instance
+    keeps only when it arrived on its shelf, its offset into the shelf's time-indexed stream, plus
+    the exposure it built up on earlier shelves (and on readings since trimmed from its own); its
+    temperature exposure comes from the stream's prefix sums.
+    """
+
+    # column -> (dtype, fill value for new rows)
+    COLUMNS = {
+        "sku_code": (np.int32, 0),
+        "shelf_code": (np.int32, 0),
+        "product_name_code": (np.int32, 0),
+        "printed_expiry_day": (np.int32, 0),
+        "received_day": (np.int32, 0),
+        "predicted_spoilage_day": (np.int32, 0),
+        "quantity": (np.int32, 0),
+        "arrival_time": (np.int64, 0), # When it reached its current shelf, microseconds since 1970-01-01
+        "prior_degree_hours": (np.float64, 0.0), # Temperature integral (°C·h) on earlier shelves
+        "prior_hours": (np.float64, 0.0), # Hours spent on earlier shelves
+        "status_code": (np.int8, STATUS_CODES["Normal"]),
+        "next_status_change_day": (np.int32, -1), # Day the status next gets more severe (see SpoilageSweeper), -1 if none
+        "active": (np.bool_, False), # False once the instance is removed
+        "original_price": (np.float64, np.nan),
+        "current_discount_percentage": (np.float64, np.nan),
+        "current_discounted_price": (np.float64, np.nan),
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self.skus = StringTable()
+        self.shelves = StringTable()
+        self.product_names = StringTable()
+        self.streams: List[ShelfSensorStream] = [] # By shelf code
+        self.shelf_status_counts = np.zeros((16, len(SPOILAGE_STATUSES)), dtype=np.int32) # [shelf code, status code]
+        self.instance_ids: List[str] = []
+        self.size = 0
+        self.active_count = 0
+        self._row_by_id: Dict[str, int] = {}
+        self._rows_by_sku: Dict[int, Set[int]] = {}
+        self._rows_by_shelf: Dict[int, Set[int]] = {}
+        self._rows_by_status: Dict[int, Set[int]] = {}
+        self.capacity = max(1, capacity)
+        for name, (dtype, fill) in self.COLUMNS.items():
+            setattr(self, name, np.full(self.capacity, fill, dtype=dtype))
+        # Write-ahead log of stock and sensor changes (see greenshelf_persistence.InventoryJournal), or None
+        self.journal = None
+
+    def _grow(self):
+        new_capacity = self.capacity * 2
+        for name, (dtype, fill) in self.COLUMNS.items():
+            column = np.full(new_capacity, fill, dtype=dtype)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+        self.capacity = new_capacity
+
+    def add_shelf(self, shelf_id: str) -> int:
+        """Registers a shelf and its sensor stream, so it is listed (as empty) before any instance is placed on it."""
+        shelf_code = self.shelves.intern(shelf_id)
+        while len(self.streams) <= shelf_code:
+            self.streams.append(ShelfSensorStream())
+        if shelf_code >= len(self.shelf_status_counts):
+            counts = np.zeros((2 * len(self.shelf_status_counts), len(SPOILAGE_STATUSES)), dtype=np.int32)
+            counts[:len(self.shelf_status_counts)] = self.shelf_status_counts
+            self.shelf_status_counts = counts
+        return shelf_code
+
+    def add(self, instance_id: str, sku: str, product_name: str, printed_expiry_date: date,
+            received_date: date, shelf_id: str, quantity: int,
+            current_conditions: Optional[SensorReading] = None) -> ProductInstanceGS:
+        """
+        Appends an instance and returns its view. Instance IDs must be unique. `current_conditions`, if
+        given, is a reading from the shelf's sensor taken when the instance arrived.
+        """
+        if instance_id in self._row_by_id:
+            raise ValueError(f"Instance {instance_id} is already in the inventory")
+        arrival_time = _to_us(current_conditions.timestamp if current_conditions is not None else datetime.now())
+        if self.journal is not None:
+            self.journal.log_add(instance_id, sku, product_name, printed_expiry_date, received_date, shelf_id,
+                                 quantity, arrival_time, current_conditions)
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        self.size += 1
+        self.active_count += 1
+
+        self.instance_ids.append(instance_id)
+        self._row_by_id[instance_id] = row
+        self.active[row] = True
+        self.sku_code[row] = sku_code = self.skus.intern(sku)
+        self.shelf_code[row] = shelf_code = self.add_shelf(shelf_id)
+        self._rows_by_sku.setdefault(sku_code, set()).add(row)
+        self._rows_by_shelf.setdefault(shelf_code, set()).add(row)
+        self._rows_by_status.setdefault(int(self.status_code[row]), set()).add(row)
+        self.shelf_status_counts[shelf_code, self.status_code[row]] += 1
+        self.product_name_code[row] = self.product_names.intern(product_name)
+        self.printed_expiry_day[row] = printed_expiry_date.toordinal() - EPOCH_ORDINAL
+        self.received_day[row] = received_date.toordinal() - EPOCH_ORDINAL
+        self.predicted_spoilage_day[row] = self.printed_expiry_day[row] # Initial prediction
+        self.quantity[row] = quantity
+        self.arrival_time[row] = arrival_time # Before the reading, which may trim the shelf's stream
+        if current_conditions is not None:
+            self._append_readings(shelf_code, *_reading_columns(current_conditions)) # Logged with the add
+        return ProductInstanceGS(self, row)
+
+    def record_reading(self, row: int, reading: SensorReading):
+        """Records a reading from the sensor of the row's shelf (it applies to everything on the shelf)."""
+        self.record_shelf_readings(int(self.shelf_code[row]), *_reading_columns(reading))
+
+    def record_shelf_readings(self, shelf_code: int, time_us: np.ndarray, temperature_c: np.ndarray,
+                              humidity_pct: np.ndarray) -> int:
+        """
+        Appends readings to a shelf's stream; returns how many were kept (older than the latest are
+        dropped). A full stream is trimmed first (see _make_room).
+        """
+        if self.journal is not None:
+            self.journal.log_readings(self.shelves[shelf_code], time_us, temperature_c, humidity_pct)
+        return self._append_readings(shelf_code, time_us, temperature_c, humidity_pct)
+
+    def _append_readings(self, shelf_code: int, time_us: np.ndarray, temperature_c: np.ndarray,
+                         humidity_pct: np.ndarray) -> int:
+        stream = self.streams[shelf_code]
+        order = np.argsort(time_us, kind='stable')
+        time_us, temperature_c, humidity_pct = time_us[order], temperature_c[order], humidity_pct[order]
+        kept = 0
+        step = max(1, stream.max_readings // 2) # So each chunk fits once the stream has been trimmed
+        for start in range(0, len(time_us), step):
+            chunk = slice(start, start + step)
+            if stream.size + len(time_us[chunk]) > stream.max_readings:
+                self._make_room(shelf_code, len(time_us[chunk]))
+            kept += stream.extend(time_us[chunk], temperature_c[chunk], humidity_pct[chunk])
+        return kept
+
+    def _make_room(self, shelf_code: int, n: int):
+        """
+        Trims a full shelf stream down to at most half its maximum before `n` more readings: drops
+        the readings no instance on the shelf still needs, and if that isn't enough the oldest of
+        the rest, after folding the exposure they cover into prior_degree_hours / prior_hours of the
+        instances that arrived before them. Depends only on the stream's logical state, so a
+        journal replay trims (and folds) at the same points as the original run.
+        """
+        stream = self.streams[shelf_code]
+        rows = self._sorted_rows(self._rows_by_shelf.get(shelf_code))
+        keep_from = len(stream) + n - stream.max_readings // 2
+        if len(rows):
+            keep_from = max(keep_from, stream.index_at(int(self.arrival_time[rows].min())))
+        keep_from = min(keep_from, stream.last_index)
+        i = keep_from - stream.offset
+        if i <= 0:
+            return
+        times = stream.time_us[:stream.size]
+        start = np.maximum(self.arrival_time[rows], times[0]) # Where each row's exposure on this shelf starts
+        folding = start < times[i]
+        rows, start = rows[folding], start[folding]
+        if len(rows):
+            index = stream.offset + np.searchsorted(times, start, side='right') - 1
+            self.prior_degree_hours[rows] += stream.degree_hours[i] - stream.integral_to(index, start)
+            self.prior_hours[rows] += (times[i] - start) / US_PER_HOUR
+        stream.trim(keep_from)
+
+    def shelf_conditions(self, shelf_code: int) -> Optional[SensorReading]:
+        """The shelf sensor's latest reading, or None before its first one."""
+        stream = self.streams[shelf_code]
+        if not stream.size:
+            return None
+        i = stream.size - 1
+        humidity_pct = stream.humidity_pct[i]
+        return SensorReading(
+            stream.time_us[i].astype('datetime64[us]').item(), float(stream.temperature_c[i]),
+            None if humidity_pct != humidity_pct else float(humidity_pct)
+        )
+
+    def move(self, row: int, shelf_id: str, timestamp: Optional[datetime] = None):
+        """Places the instance on another shelf at `timestamp` (default now), keeping the exposure it had so far."""
+        old_code = int(self.shelf_code[row])
+        new_code = self.add_shelf(shelf_id)
+        if new_code != old_code:
+            arrival_time = _to_us(timestamp or datetime.now())
+            if self.journal is not None:
+                self.journal.log_move(self.instance_ids[row], shelf_id, arrival_time)
+            rows = np.array([row])
+            self.prior_degree_hours[rows], self.prior_hours[rows] = self.exposures(rows)
+            self._rows_by_shelf[old_code].discard(row)
+            self._rows_by_shelf.setdefault(new_code, set()).add(row)
+            self.shelf_status_counts[old_code, self.status_code[row]] -= 1
+            self.shelf_status_counts[new_code, self.status_code[row]] += 1
+            self.shelf_code[row] = new_code
+            self.arrival_time[row] = arrival_time
+
+    def remove(self, row: int):
+        """Takes the instance out of the inventory. Its row stays allocated but inactive."""
+        if not self.active[row]:
+            return
+        if self.journal is not None:
+            self.journal.log_remove(self.instance_ids[row])
+        self.active[row] = False
+        self.active_count -= 1
+        del self._row_by_id[self.instance_ids[row]]
+        self._rows_by_sku[int(self.sku_code[row])].discard(row)
+        self._rows_by_shelf[int(self.shelf_code[row])].discard(row)
+        self._rows_by_status[int(self.status_code[row])].discard(row)
+        self.shelf_status_counts[self.shelf_code[row], self.status_code[row]] -= 1
+
+    def set_status(self, row: int, status_code: int):
+        old_code = int(self.status_code[row])
+        if status_code != old_code:
+            self.status_code[row] = status_code
+            if self.active[row]:
+                self._rows_by_status[old_code].discard(row)
+                self._rows_by_status.setdefault(status_code, set()).add(row)
+                shelf_code = self.shelf_code[row]
+                self.shelf_status_counts[shelf_code, old_code] -= 1
+                self.shelf_status_counts[shelf_code, status_code] += 1
+
+    def set_statuses(self, rows: np.ndarray, status_codes: np.ndarray):
+        """set_status for many rows at once; only rows whose status changes touch the index."""
+        changed = np.flatnonzero(self.status_code[rows] != status_codes)
+        for row, status_code in zip(rows[changed].tolist(), status_codes[changed].tolist()):
+            self.set_status(row, status_code)
+
+    def _group_by_shelf(self, rows: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        """(shelf code, positions in `rows` of the rows on that shelf) for each shelf among `rows`."""
+        shelf_codes = self.shelf_code[rows]
+        order = np.argsort(shelf_codes, kind='stable')
+        for positions in np.split(order, np.flatnonzero(np.diff(shelf_codes[order])) + 1):
+            if len(positions):
+                yield int(shelf_codes[positions[0]]), positions
+
+    def exposures(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per row, the temperature integral (°C·h) and the hours it covers, from arrival up to the latest
+        reading of each shelf the instance has been on. Two prefix-sum lookups per row.
+        """
+        degree_hours = self.prior_degree_hours[rows].copy()
+        hours = self.prior_hours[rows].copy()
+        for shelf_code, positions in self._group_by_shelf(rows):
+            stream = self.streams[shelf_code]
+            if not stream.size:
+                continue
+            times = stream.time_us[:stream.size]
+            start = np.maximum(self.arrival_time[rows[positions]], times[0]) # Exposure counts from the first reading
+            index = stream.offset + np.searchsorted(times, start, side='right') - 1 # Reading current at arrival
+            end = stream.last_time_us()
+            staying = start < end # Arrived before the latest reading
+            stay_degree_hours = stream.degree_hours[stream.size - 1] - stream.integral_to(index, start)
+            degree_hours[positions] += np.where(staying, stay_degree_hours, 0.0)
+            hours[positions] += np.where(staying, (end - start) / US_PER_HOUR, 0.0)
+        return degree_hours, hours
+
+    def average_temperatures(self, rows: np.ndarray) -> np.ndarray:
+        degree_hours, hours = self.exposures(rows)
+        return average_temperatures(degree_hours, hours, self.current_temperatures(rows))
+
+    def current_temperatures(self, rows: np.ndarray) -> np.ndarray:
+        """Latest reading of each row's shelf sensor, NaN for shelves without readings."""
+        last_temperature = np.array(
+            [stream.temperature_c[stream.size - 1] if stream.size else np.nan for stream in self.streams], dtype=float
+        )
+        return last_temperature[self.shelf_code[rows]]
+
+    def rebuild_indexes(self):
+        """Rebuilds the hash indexes, status histograms and active count from the columns, e.g. after a restore."""
+        rows = self.active_rows()
+        row_list = rows.tolist()
+        self._row_by_id = {self.instance_ids[row]: row for row in row_list}
+        self._rows_by_sku, self._rows_by_shelf, self._rows_by_status = {}, {}, {}
+        for index, column in ((self._rows_by_sku, self.sku_code), (self._rows_by_shelf, self.shelf_code),
+                              (self._rows_by_status, self.status_code)):
+            for code, row in zip(column[rows].tolist(), row_list):
+                index.setdefault(code, set()).add(row)
+        self.active_count = len(row_list)
+        counts = np.zeros((max(16, len(self.shelves)), len(SPOILAGE_STATUSES)), dtype=np.int32)
+        np.add.at(counts, (self.shelf_code[rows], self.status_code[rows]), 1)
+        self.shelf_status_counts = counts
+
+    def view(self, row: int) -> ProductInstanceGS:
+        return ProductInstanceGS(self, row)
+
+    @staticmethod
+    def _sorted_rows(rows: Optional[Set[int]]) -> np.ndarray:
+        if not rows:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.fromiter(rows, dtype=np.intp, count=len(rows)))
+
+    def rows_on_shelf(self, shelf_id: str) -> np.ndarray:
+        shelf_code = self.shelves.code(shelf_id)
+        return self._sorted_rows(self._rows_by_shelf.get(shelf_code))
+
+    def rows_with_sku(self, sku: str) -> np.ndarray:
+        sku_code = self.skus.code(sku)
+        return self._sorted_rows(self._rows_by_sku.get(sku_code))
+
+    def rows_with_status(self, status: str) -> np.ndarray:
+        return self._sorted_rows(self._rows_by_status.get(STATUS_CODES.get(status)))
+
+    def active_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.active[:self.size])
+
+    def find(self, instance_id: str) -> Optional[int]:
+        """Row of the instance with this ID, or None."""
+        return self._row_by_id.get(instance_id)
+
+    def worst_status_by_shelf(self) -> np.ndarray:
+        """
+        Highest (most severe) status code per shelf code, -1 for shelves without instances. Read off the
+        status histograms: O(#shelves).
+        """
+        present = self.shelf_status_counts[:len(self.shelves)] > 0
+        last_present = present.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        return np.where(present.any(axis=1), last_present, -1)
+
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays and shelf streams (excluding the interned strings and instance IDs)."""
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS) + sum(
+            stream.time_us.nbytes + stream.temperature_c.nbytes + stream.humidity_pct.nbytes + stream.degree_hours.nbytes
+            for stream in self.streams
+        )
@@ -0,0 +1,399 @@
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from ..models.greenshelf_models import SensorReading, _date_to_day, _day_to_date
+from .greenshelf_inventory import GreenShelfInventory
+from .greenshelf_service import GreenShelfService
+from .shelf_sensor_streams import ShelfSensorStream
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GREENSHELF_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'greenshelf')
+
+SNAPSHOT_MAGIC = b'GSSNAP01'
+JOURNAL_MAGIC = b'GSWAL001'
+ALIGNMENT = 64 # Snapshot arrays start on 64-byte boundaries so they can be used straight from the mapping
+
+STREAM_COLUMNS = {'time_us': np.int64, 'temperature_c': np.float64, 'humidity_pct': np.float64, 'degree_hours': np.float64}
+
+# Journal record: op, payload length, CRC-32 of the payload; then the payload
+RECORD_HEADER = struct.Struct('<BII')
+OP_ADD, OP_MOVE, OP_REMOVE, OP_READINGS = 1, 2, 3, 4
+READING_DTYPE = np.dtype([('time_us', '<i8'), ('temperature_c', '<f8'), ('humidity_pct', '<f8')])
+
+
+def _aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def _from_us(time_us: int) -> datetime:
+    return np.int64(time_us).astype('datetime64[us]').item()
+
+
+def write_snapshot(inventory: GreenShelfInventory, path: str, generation: int) -> int:
+    """
+    Writes the inventory (columns, instance IDs, string tables and shelf sensor streams) to one
+    columnar file, swapped in atomically. Returns the file size in bytes.
+
+    Layout: magic, header length (<u8), a JSON header with the string tables, stream positions and
+    each array's dtype/shape/offset, then the arrays' raw bytes, each aligned to ALIGNMENT.
+    """
+    size = inventory.size
+    instance_ids = [instance_id.encode('utf-8') for instance_id in inventory.instance_ids]
+    arrays: Dict[str, np.ndarray] = {name: getattr(inventory, name)[:size] for name in inventory.COLUMNS}
+    arrays['instance_id_bytes'] = np.frombuffer(b''.join(instance_ids), dtype=np.uint8)
+    arrays['instance_id_ends'] = np.cumsum([len(instance_id) for instance_id in instance_ids], dtype=np.int64)
+    for name, dtype in STREAM_COLUMNS.items():
+        arrays['stream_' + name] = np.concatenate(
+            [np.empty(0, dtype=dtype)] + [getattr(stream, name)[:stream.size] for stream in inventory.streams]
+        )
+
+    header = {
+        "generation": generation,
+        "size": size,
+        "skus": inventory.skus.values,
+        "shelves": inventory.shelves.values,
+        "product_names": inventory.product_names.values,
+        "stream_offsets": [stream.offset for stream in inventory.streams],
+        "stream_sizes": [stream.size for stream in inventory.streams],
+        "arrays": {}
+    }
+    position = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position = _aligned(position + array.nbytes)
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _aligned(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+            for name, array in arrays.items():
+                f.seek(data_start + header["arrays"][name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_start + position)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return data_start + position
+
+
+def read_snapshot(path: str) -> Tuple[GreenShelfInventory, int]:
+    """
+    Loads a snapshot written by write_snapshot; returns the inventory and the snapshot's generation.
+
+    The file is memory-mapped copy-on-write and the columns and streams are views into the mapping,
+    so loading reads only the header and the instance IDs (the hash indexes are rebuilt from the
+    columns); other pages are read on first use, and writes stay private to this process.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a GreenShelf snapshot")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length))
+    data_start = _aligned(len(SNAPSHOT_MAGIC) + 8 + header_length)
+    mapping = np.memmap(path, dtype=np.uint8, mode='c')
+
+    def array(name: str) -> np.ndarray:
+        spec = header["arrays"][name]
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        start = data_start + spec["offset"]
+        return mapping[start:start + dtype.itemsize * int(np.prod(shape))].view(dtype).reshape(shape)
+
+    inventory = GreenShelfInventory()
+    size = header["size"]
+    if size: # Columns are exactly full; the first add() grows them into memory
+        for name in inventory.COLUMNS:
+            setattr(inventory, name, array(name))
+        inventory.size = inventory.capacity = size
+    for table, values in ((inventory.skus, header["skus"]), (inventory.shelves, header["shelves"]),
+                          (inventory.product_names, header["product_names"])):
+        for value in values:
+            table.intern(value)
+
+    id_bytes = array('instance_id_bytes').tobytes()
+    ends = array('instance_id_ends').tolist()
+    inventory.instance_ids = [id_bytes[start:end].decode('utf-8') for start, end in zip([0] + ends[:-1], ends)]
+
+    stream_columns = {name: array('stream_' + name) for name in STREAM_COLUMNS}
+    start = 0
+    for offset, stream_size in zip(header["stream_offsets"], header["stream_sizes"]):
+        stream = ShelfSensorStream()
+        if stream_size:
+            for name in STREAM_COLUMNS:
+                setattr(stream, name, stream_columns[name][start:start + stream_size])
+        stream.offset, stream.size = offset, stream_size
+        inventory.streams.append(stream)
+        start += stream_size
+
+    inventory.rebuild_indexes()
+    return inventory, header["generation"]
+
+
+class InventoryJournal:
+    """
+    Write-ahead log of an inventory's stock and sensor changes since its last snapshot.
+
+    GreenShelfInventory logs each add, move, remove and batch of shelf readings (as attached to its
+    `journal`) before applying it; replay() applies them again to the restored snapshot. Derived
+    state (statuses, predictions, the sweeper schedule) is not logged, since it is recomputed from
+    these on restore. The file starts with the generation of the snapshot it follows, so a journal
+    left over from before a newer snapshot is ignored, and every record carries a CRC-32 so one torn
+    by a crash ends the log. Logging to a closed journal raises, so a change that could not be made
+    durable is never applied.
+    """
+
+    def __init__(self, path: str, generation: int, valid_length: int = 0, fsync: bool = False):
+        self.path = path
+        self.generation = generation
+        self.fsync = fsync # Sync each record to disk, not just to the OS
+        self.records = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if valid_length: # Continue an intact journal, dropping any torn record at its end
+            self._file = open(path, 'r+b')
+            self._file.truncate(valid_length)
+            self._file.seek(valid_length)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(JOURNAL_MAGIC + struct.pack('<Q', generation))
+            self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _append(self, op: int, payload: bytes):
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"Journal {self.path} is closed; load the store again to change it")
+            self._file.write(RECORD_HEADER.pack(op, len(payload), zlib.crc32(payload)) + payload)
+            self._sync()
+            self.records += 1
+
+    def _append_json(self, op: int, record: Dict):
+        self._append(op, json.dumps(record).encode('utf-8'))
+
+    def log_add(self, instance_id: str, sku: str, product_name: str, printed_expiry_date: date, received_date: date,
+                shelf_id: str, quantity: int, arrival_time_us: int, current_conditions: Optional[SensorReading]):
+        self._append_json(OP_ADD, {
+            "instance_id": instance_id,
+            "sku": sku,
+            "product_name": product_name,
+            "printed_expiry_day": _date_to_day(printed_expiry_date),
+            "received_day": _date_to_day(received_date),
+            "shelf_id": shelf_id,
+            "quantity": int(quantity),
+            "arrival_time_us": arrival_time_us,
+            # Taken at arrival: [temperature_c, humidity_pct]
+            "conditions": None if current_conditions is None else
+                [current_conditions.temperature_c, current_conditions.humidity_pct]
+        })
+
+    def log_move(self, instance_id: str, shelf_id: str, arrival_time_us: int):
+        self._append_json(OP_MOVE, {"instance_id": instance_id, "shelf_id": shelf_id, "arrival_time_us": arrival_time_us})
+
+    def log_remove(self, instance_id: str):
+        self._append_json(OP_REMOVE, {"instance_id": instance_id})
+
+    def log_readings(self, shelf_id: str, time_us: np.ndarray, temperature_c: np.ndarray, humidity_pct: np.ndarray):
+        readings = np.empty(len(time_us), dtype=READING_DTYPE)
+        readings['time_us'], readings['temperature_c'], readings['humidity_pct'] = time_us, temperature_c, humidity_pct
+        shelf = shelf_id.encode('utf-8')
+        self._append(OP_READINGS, struct.pack('<H', len(shelf)) + shelf + readings.tobytes())
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._file.close()
+
+
+def read_journal(path: str, generation: int) -> Tuple[List[Tuple[int, bytes]], int]:
+    """
+    The (op, payload) records of the journal at `path` that follows snapshot `generation`, and the
+    length of its intact part; ([], 0) if it is missing or belongs to another snapshot.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    prefix = len(JOURNAL_MAGIC) + 8
+    if len(data) < prefix or data[:len(JOURNAL_MAGIC)] != JOURNAL_MAGIC or \
+            struct.unpack_from('<Q', data, len(JOURNAL_MAGIC))[0] != generation:
+        return [], 0
+    records = []
+    position = prefix
+    while position + RECORD_HEADER.size <= len(data):
+        op, length, checksum = RECORD_HEADER.unpack_from(data, position)
+        payload = data[position + RECORD_HEADER.size:position + RECORD_HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            break
+        records.append((op, payload))
+        position += RECORD_HEADER.size + length
+    return records, position
+
+
+def replay(inventory: GreenShelfInventory, records: List[Tuple[int, bytes]]):
+    """Applies journal records to an inventory restored from the snapshot they follow."""
+    journal, inventory.journal = inventory.journal, None # Replayed changes are already logged
+    try:
+        for op, payload in records:
+            if op == OP_READINGS:
+                (length,) = struct.unpack_from('<H', payload)
+                readings = np.frombuffer(payload, dtype=READING_DTYPE, offset=2 + length)
+                inventory.record_shelf_readings(
+                    inventory.add_shelf(payload[2:2 + length].decode('utf-8')),
+                    readings['time_us'].copy(), readings['temperature_c'].copy(), readings['humidity_pct'].copy()
+                )
+                continue
+            record = json.loads(payload)
+            if op == OP_ADD:
+                arrival_time = _from_us(record["arrival_time_us"])
+                conditions = record["conditions"]
+                instance = inventory.add(
+                    instance_id=record["instance_id"],
+                    sku=record["sku"],
+                    product_name=record["product_name"],
+                    printed_expiry_date=_day_to_date(record["printed_expiry_day"]),
+                    received_date=_day_to_date(record["received_day"]),
+                    shelf_id=record["shelf_id"],
+                    quantity=record["quantity"],
+                    current_conditions=None if conditions is None else SensorReading(arrival_time, *conditions)
+                )
+                inventory.arrival_time[instance.row] = record["arrival_time_us"]
+            elif op == OP_MOVE:
+                row = inventory.find(record["instance_id"])
+                if row is not None:
+                    inventory.move(row, record["shelf_id"], _from_us(record["arrival_time_us"]))
+            elif op == OP_REMOVE:
+                row = inventory.find(record["instance_id"])
+                if row is not None:
+                    inventory.remove(row)
+            else:
+                raise ValueError(f"Unknown journal record type {op}")
+    finally:
+        inventory.journal = journal
+
+
+class GreenShelfPersistence:
+    """
+    Snapshots plus write-ahead journals for GreenShelf stores, one directory per store under `root_dir`.
+
+    load() restores a store by memory-mapping its snapshot and replaying the journal written since,
+    so a restarted worker is serving without rebuilding anything; a store seen for the first time is
+    built by `build(store_id)` and snapshotted. snapshot() writes a fresh snapshot (including pricing
+    annotations and statuses) and starts an empty journal; close() snapshots a store and closes its
+    journal, e.g. when GreenShelfShards evicts it. A closed store's service rejects further stock and
+    sensor changes (its journal raises), since the store's files now belong to whoever loads it next.
+
+    Snapshots rotate the journal under the service lock, which every GreenShelfService mutation holds,
+    so no change lands in a journal being swapped out.
+
+    Only `store_ids` (if given) are persisted; other IDs, and ones that aren't a plain directory
+    name such as "" or "..", raise ValueError before any path is built.
+    """
+
+    def __init__(self, root_dir: str, build: Callable[[str], GreenShelfService] = GreenShelfService,
+                 fsync: bool = False, store_ids: Optional[Iterable[str]] = None):
+        self.root_dir = root_dir
+        self.build = build
+        self.fsync = fsync
+        self.store_ids = None if store_ids is None else frozenset(store_ids)
+
+    def _paths(self, store_id: str) -> Tuple[str, str]:
+        if store_id in ('', '.', '..') or (self.store_ids is not None and store_id not in self.store_ids):
+            raise ValueError(f"Unknown GreenShelf store {store_id!r}")
+        root = os.path.realpath(self.root_dir)
+        directory = os.path.realpath(os.path.join(root, quote(store_id, safe='')))
+        if os.path.dirname(directory) != root:
+            raise ValueError(f"GreenShelf store {store_id!r} does not map to a directory under {self.root_dir}")
+        return os.path.join(directory, 'inventory.snapshot'), os.path.join(directory, 'inventory.wal')
+
+    def load(self, store_id: str) -> GreenShelfService:
+        snapshot_path, journal_path = self._paths(store_id)
+        if not os.path.exists(snapshot_path):
+            service = self.build(store_id)
+            self.snapshot(store_id, service)
+            return service
+
+        started = time.perf_counter()
+        inventory, generation = read_snapshot(snapshot_path)
+        records, valid_length = read_journal(journal_path, generation)
+        replay(inventory, records)
+        inventory.journal = InventoryJournal(journal_path, generation, valid_length, self.fsync)
+        service = GreenShelfService(store_id, inventory=inventory)
+        logger.info("Restored GreenShelf store %s (%d instances, %d journal records) in %.1f ms", store_id,
+                    inventory.active_count, len(records), (time.perf_counter() - started) * 1000)
+        return service
+
+    def snapshot(self, store_id: str, service: GreenShelfService, only_open: bool = False) -> bool:
+        """Snapshots the store and starts a new journal. only_open skips stores that were closed; returns whether it ran."""
+        snapshot_path, journal_path = self._paths(store_id)
+        with service.locked():
+            inventory = service.inventory
+            journal = inventory.journal
+            if only_open and (journal is None or journal.closed):
+                return False
+            if journal is not None and journal.closed:
+                raise RuntimeError(f"GreenShelf store {store_id} was closed; load it again to snapshot it")
+            generation = time.time_ns() # Pairs the snapshot with the journal that follows it
+            write_snapshot(inventory, snapshot_path, generation)
+            if journal is not None:
+                journal.close()
+            inventory.journal = InventoryJournal(journal_path, generation, fsync=self.fsync)
+        return True
+
+    def close(self, store_id: str, service: GreenShelfService):
+        with service.locked():
+            if self.snapshot(store_id, service, only_open=True):
+                service.inventory.journal.close() # Left attached, so later changes raise instead of going unlogged
+
+
+class GreenShelfSnapshotter:
+    """
+    Background job that snapshots stores every `interval_seconds`, keeping journals (and restart
+    replay) short. `snapshot_all` does one round and returns how many stores it snapshotted.
+    """
+
+    def __init__(self, snapshot_all: Callable[[], int], interval_seconds: float = 300.0):
+        self.snapshot_all = snapshot_all
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                logger.info("Snapshotted %d GreenShelf stores", self.snapshot_all())
+            except Exception:
+                logger.exception("GreenShelf snapshot failed")
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="greenshelf-snapshotter", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
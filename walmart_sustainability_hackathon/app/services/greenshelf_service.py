@@ -1,24 +1,53 @@
+from collections import deque
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Callable, ContextManager, Deque, List, Dict, Optional, Tuple
+import logging
 import random
+import threading
+
+import numpy as np
 
 from ..models.greenshelf_models import (
-    SensorReading, ProductMasterGS, ProductInstanceGS, MOCK_PRODUCT_MASTERS_GS
+    SensorReading, ProductMasterGS, ProductInstanceGS, StatusChangeEvent, SPOILAGE_STATUSES, STATUS_CODES, EPOCH_ORDINAL,
+    MOCK_PRODUCT_MASTERS_GS
+)
+from .greenshelf_inventory import GreenShelfInventory
+from .sensor_ingestion import SensorReadingBatch
+from .spoilage_engine import (
+    SpoilageInputs, next_status_change_days, predict_spoilage_days, spoilage_parameters, spoilage_status_codes
 )
+from .spoilage_sweeper import SpoilageSweeper, day_start, today_day
+
+logger = logging.getLogger(__name__)
+
+RECENT_STATUS_CHANGES = 1000 # Status change events kept for polling consumers
 
 class GreenShelfService:
-    def __init__(self):
+    def __init__(self, store_id: Optional[str] = None, inventory: Optional[GreenShelfInventory] = None):
+        self.store_id = store_id # None for a standalone (unsharded) service
         self.product_masters: Dict[str, ProductMasterGS] = MOCK_PRODUCT_MASTERS_GS
-        # In-memory store for product instances on shelves for the demo
-        # shelf_id -> List[ProductInstanceGS]
-        self.shelf_inventory: Dict[str, List[ProductInstanceGS]] = {}
-        self._initialize_mock_inventory()
+        # In-memory, columnar store for product instances on shelves (mock data unless a restored
+        # inventory is passed in); ProductInstanceGS objects handed out are views onto its rows
+        self.inventory = inventory if inventory is not None else GreenShelfInventory()
+        self._rng = np.random.default_rng() # Simulated sensor feed for batch updates
+        self._lock = threading.RLock() # Serializes inventory updates (request threads and the sweeper)
+        self._subscribers: List[Callable[[List[StatusChangeEvent]], None]] = []
+        self.recent_status_changes: Deque[StatusChangeEvent] = deque(maxlen=RECENT_STATUS_CHANGES)
+        # Wakes up when instances are due to cross into a more severe status (start() runs it in the background)
+        self.sweeper = SpoilageSweeper(self.inventory, self.recompute_spoilage_statuses)
+        if inventory is None:
+            self._initialize_mock_inventory()
+        else: # Restored: rebuild the sweeper's schedule, then bring statuses up to date
+            self.sweeper.rebuild()
+            self.recompute_spoilage_statuses()
+        self.recent_status_changes.clear() # Initial statuses are not changes
 
     def _initialize_mock_inventory(self):
         """Populates some mock inventory for demo purposes if it's empty."""
-        if self.shelf_inventory: # Avoid re-initializing if already populated
+        if len(self.inventory.shelves): # Avoid re-initializing if already populated
             return
 
+        rng = random.Random(self.store_id) # Same mock store every time it is loaded (unseeded without a store)
         shelf_ids = ["ShelfA1_Dairy", "ShelfA2_Produce", "ShelfB1_Meat", "ShelfC1_Bakery"]
         # Assign SKUs to shelves based on category for realism
         shelf_sku_map = {
@@ -29,207 +58,393 @@ class GreenShelfService:
         }
 
         for shelf_id in shelf_ids:
-            self.shelf_inventory[shelf_id] = []
+            self.inventory.add_shelf(shelf_id)
             skus_for_shelf = shelf_sku_map.get(shelf_id, list(self.product_masters.keys()))
 
-            for _ in range(random.randint(1, 3)): # 1-3 different product types per shelf
-                sku = random.choice(skus_for_shelf)
+            for _ in range(rng.randint(1, 3)): # 1-3 different product types per shelf
+                sku = rng.choice(skus_for_shelf)
                 master = self.product_masters.get(sku)
                 if not master:
                     continue
 
                 # Simulate items received at different times, some fresh, some older
-                days_ago_received = random.randint(0, master.base_shelf_life_days // 2)
+                days_ago_received = rng.randint(0, master.base_shelf_life_days // 2)
                 received = date.today() - timedelta(days=days_ago_received)
 
                 # Printed expiry is based on base shelf life from received date
                 printed_expiry = received + timedelta(days=master.base_shelf_life_days)
 
                 # Simulate some items being closer to their printed expiry
-                if random.random() < 0.3: # 30% chance item is older
-                    additional_age = random.randint(0, master.base_shelf_life_days // 3)
+                if rng.random() < 0.3: # 30% chance item is older
+                    additional_age = rng.randint(0, master.base_shelf_life_days // 3)
                     printed_expiry_adjusted = printed_expiry - timedelta(days=additional_age)
                     # Ensure printed expiry is not before received date
                     printed_expiry = max(received + timedelta(days=1), printed_expiry_adjusted)
 
 
-                instance_id = f"{sku}_batch{random.randint(1000, 9999)}"
+                instance_id = f"{sku}_batch{rng.randint(1000, 9999)}"
+                while self.inventory.find(instance_id) is not None: # Instance IDs are unique
+                    instance_id = f"{sku}_batch{rng.randint(1000, 9999)}"
 
                 # Simulate initial temperature slightly off ideal for some items
-                initial_temp = master.ideal_temp_c + random.uniform(-0.5, 2.5) # Can be a bit warmer
-                initial_humidity = random.uniform(40, 70) if master.category == "Produce" else None
-                initial_conditions = SensorReading(datetime.now() - timedelta(hours=random.randint(1,6)), initial_temp, initial_humidity)
+                initial_temp = master.ideal_temp_c + rng.uniform(-0.5, 2.5) # Can be a bit warmer
+                initial_humidity = rng.uniform(40, 70) if master.category == "Produce" else None
+                initial_conditions = SensorReading(datetime.now() - timedelta(hours=rng.randint(1,6)), initial_temp, initial_humidity)
 
-                instance = ProductInstanceGS(
+                instance = self.inventory.add(
                     instance_id=instance_id,
                     sku=sku,
                     product_name=master.name,
                     printed_expiry_date=printed_expiry,
                     received_date=received,
                     shelf_id=shelf_id,
-                    quantity=random.randint(3, 15),
+                    quantity=rng.randint(3, 15),
                     current_conditions=initial_conditions
                 )
                 # Initial spoilage calculation
                 self.update_product_spoilage_status(instance, master)
-                self.shelf_inventory[shelf_id].append(instance)
 
         # print("Mock inventory initialized for GreenShelf.")
-        # for shelf_id, items in self.shelf_inventory.items():
+        # for shelf_id in self.inventory.shelves.values:
         #     print(f"Shelf {shelf_id}:")
-        #     for item in items:
+        #     for item in self.get_shelf_items(shelf_id, simulate_updates=False):
         #         print(f"  - {item.product_name} ({item.instance_id}), Status: {item.status}, Pred Spoil: {item.predicted_spoilage_date}")
 
 
+    def locked(self) -> ContextManager:
+        """
+        Holds the service's lock (re-entrant), e.g. `with service.locked():`. Every method here takes
+        it, as does the sweeper; callers hold it to keep several steps over instance views consistent.
+        """
+        return self._lock
+
     def get_product_master(self, sku: str) -> Optional[ProductMasterGS]:
         return self.product_masters.get(sku)
 
     def update_product_spoilage_status(self, instance: ProductInstanceGS, master: Optional[ProductMasterGS] = None):
         """
         Updates the predicted_spoilage_date and status of a ProductInstanceGS.
-        This is a core logic for GreenShelf.
+        This is a core logic for GreenShelf; recompute_spoilage_statuses is the same model over many instances.
         """
-        if not master:
-            master = self.get_product_master(instance.sku)
+        with self._lock:
+            if not master:
+                master = self.get_product_master(instance.sku)
+            rows = np.array([instance.row])
+            old_status_codes = self.inventory.status_code[rows]
 
-        if not master:
-            # Cannot calculate without master data
-            instance.status = "Error: Missing Product Info"
-            instance.status_color = "grey"
-            return
+            if not master:
+                # Cannot calculate without master data
+                instance.status = "Error: Missing Product Info" # Shown grey
+                self._status_updated(rows, old_status_codes)
+                return
 
-        # --- Simplified Predictive Spoilage Model for Hackathon ---
-        # Real model would use full condition_history, humidity, light, ethylene etc.
-        # This model: Base shelf life from received date, adjusted by average temperature deviation.
+            # --- Simplified Predictive Spoilage Model for Hackathon ---
+            # Real model would use full condition_history, humidity, light, ethylene etc.
+            # This model: Base shelf life from received date, adjusted by average temperature deviation.
 
-        days_since_received = (date.today() - instance.received_date).days
+            days_since_received = (date.today() - instance.received_date).days
 
-        # Calculate average temperature from history (or use current if history is short)
-        avg_temp_exposure = instance.current_conditions.temperature_c
-        if instance.condition_history and len(instance.condition_history) > 1:
-            avg_temp_exposure = sum(sr.temperature_c for sr in instance.condition_history) / len(instance.condition_history)
+            # Time-weighted average temperature since arrival, from prefix sums over the shelf's sensor stream
+            avg_temp_exposure = instance.average_temperature_c
 
-        temp_deviation_from_ideal = max(0, avg_temp_exposure - master.ideal_temp_c)
+            temp_deviation_from_ideal = max(0, avg_temp_exposure - master.ideal_temp_c)
 
-        # Calculate total days lost due to temperature stress over the time it's been on shelf
-        # This is a cumulative effect. Each day at a higher temp reduces effective shelf life.
-        # Simplified: (days_on_shelf * deviation * sensitivity_factor)
-        cumulative_days_lost_due_to_temp = days_since_received * temp_deviation_from_ideal * master.temp_sensitivity_factor
+            # Calculate total days lost due to temperature stress over the time it's been on shelf
+            # This is a cumulative effect. Each day at a higher temp reduces effective shelf life.
+            # Simplified: (days_on_shelf * deviation * sensitivity_factor)
+            cumulative_days_lost_due_to_temp = days_since_received * temp_deviation_from_ideal * master.temp_sensitivity_factor
 
-        effective_shelf_life_days = master.base_shelf_life_days - cumulative_days_lost_due_to_temp
+            effective_shelf_life_days = master.base_shelf_life_days - cumulative_days_lost_due_to_temp
 
-        # Predicted spoilage is received_date + effective_shelf_life
-        instance.predicted_spoilage_date = instance.received_date + timedelta(days=max(0, round(effective_shelf_life_days)))
+            # Predicted spoilage is received_date + effective_shelf_life
+            instance.predicted_spoilage_date = instance.received_date + timedelta(days=max(0, round(effective_shelf_life_days)))
 
-        # Constraint: Predicted spoilage cannot be later than the printed expiry date
-        instance.predicted_spoilage_date = min(instance.predicted_spoilage_date, instance.printed_expiry_date)
+            # Constraint: Predicted spoilage cannot be later than the printed expiry date
+            instance.predicted_spoilage_date = min(instance.predicted_spoilage_date, instance.printed_expiry_date)
 
-        # Determine status based on predicted spoilage date
-        days_to_predicted_spoilage = (instance.predicted_spoilage_date - date.today()).days
+            # Determine status based on predicted spoilage date
+            days_to_predicted_spoilage = (instance.predicted_spoilage_date - date.today()).days
 
-        if days_to_predicted_spoilage < 0:
-            instance.status = "Spoiled"
-            instance.status_color = "darkred" # Dark Red
-        elif days_to_predicted_spoilage <= 1: # Critical (Today or Tomorrow)
-            instance.status = "Critical / Donate"
-            instance.status_color = "red" # Red
-        elif days_to_predicted_spoilage <= 3: # Nearing Expiry (2-3 days left)
-            instance.status = "Nearing Expiry"
-            instance.status_color = "orange" # Orange
-        elif days_to_predicted_spoilage <= 5: # Approaching (4-5 days left)
-            instance.status = "Approaching"
-            instance.status_color = "yellow" # Yellow
-        else:
-            instance.status = "Normal"
-            instance.status_color = "green" # Green
+            # The status color follows from the status (see SPOILAGE_STATUSES)
+            if days_to_predicted_spoilage < 0:
+                instance.status = "Spoiled" # Dark Red
+            elif days_to_predicted_spoilage <= 1: # Critical (Today or Tomorrow)
+                instance.status = "Critical / Donate" # Red
+            elif days_to_predicted_spoilage <= 3: # Nearing Expiry (2-3 days left)
+                instance.status = "Nearing Expiry" # Orange
+            elif days_to_predicted_spoilage <= 5: # Approaching (4-5 days left)
+                instance.status = "Approaching" # Yellow
+            else:
+                instance.status = "Normal" # Green
 
-    def simulate_sensor_update_for_instance(self, instance: ProductInstanceGS):
-        """Simulates a new sensor reading and updates the instance."""
-        master = self.get_product_master(instance.sku)
-        if not master: return
-
-        # Simulate temperature fluctuation
-        temp_change = random.uniform(-0.5, 0.5)
-        # More aggressive change if already warm, to show effect
-        if instance.current_conditions.temperature_c > master.ideal_temp_c + 2:
-            temp_change = random.uniform(-0.2, 1.0)
-
-        new_temp = instance.current_conditions.temperature_c + temp_change
-        # Keep temperature within a somewhat realistic bound for demo
-        new_temp = max(master.ideal_temp_c - 2, min(master.ideal_temp_c + 8, new_temp))
-
-        new_humidity = instance.current_conditions.humidity_pct
-        if new_humidity is not None:
-            new_humidity += random.uniform(-5, 5)
-            new_humidity = max(30, min(90, new_humidity))
-
-        new_reading = SensorReading(datetime.now(), round(new_temp,1), round(new_humidity,1) if new_humidity else None)
-        instance.current_conditions = new_reading
-        instance.condition_history.append(new_reading)
-        if len(instance.condition_history) > 24: # Keep last 24 readings for rolling average
-            instance.condition_history.pop(0)
-
-        self.update_product_spoilage_status(instance, master)
+            self._status_updated(rows, old_status_codes)
 
+    def simulate_sensor_update_for_instance(self, instance: ProductInstanceGS):
+        """Simulates a new reading from the instance's shelf sensor and updates everything on the shelf."""
+        with self._lock:
+            master = self.get_product_master(instance.sku)
+            if not master: return
+
+            current_temp = instance.current_conditions.temperature_c
+            if current_temp is None: # Shelf has no readings yet
+                current_temp = master.ideal_temp_c
+
+            # Simulate temperature fluctuation
+            temp_change = random.uniform(-0.5, 0.5)
+            # More aggressive change if already warm, to show effect
+            if current_temp > master.ideal_temp_c + 2:
+                temp_change = random.uniform(-0.2, 1.0)
+
+            new_temp = current_temp + temp_change
+            # Keep temperature within a somewhat realistic bound for demo
+            new_temp = max(master.ideal_temp_c - 2, min(master.ideal_temp_c + 8, new_temp))
+
+            new_humidity = instance.current_conditions.humidity_pct
+            if new_humidity is not None:
+                new_humidity += random.uniform(-5, 5)
+                new_humidity = max(30, min(90, new_humidity))
+
+            new_reading = SensorReading(datetime.now(), round(new_temp,1), round(new_humidity,1) if new_humidity else None)
+            instance.record_reading(new_reading) # One shelf reading, shared by every instance on the shelf
+
+            self.recompute_spoilage_statuses(self.inventory.rows_on_shelf(instance.shelf_id))
+
+
+    def _spoilage_inputs(self, rows: np.ndarray) -> Tuple[np.ndarray, SpoilageInputs]:
+        """Which rows have product master data, and the spoilage model inputs for those rows."""
+        inventory = self.inventory
+        parameters = spoilage_parameters(inventory.skus.values, self.product_masters)
+        sku_codes = inventory.sku_code[rows]
+        known = parameters.known[sku_codes]
+        known_rows, known_skus = rows[known], sku_codes[known]
+        return known, SpoilageInputs(
+            inventory.received_day[known_rows], inventory.printed_expiry_day[known_rows],
+            inventory.average_temperatures(known_rows), parameters.ideal_temp_c[known_skus],
+            parameters.base_shelf_life_days[known_skus], parameters.temp_sensitivity_factor[known_skus]
+        )
+
+    def recompute_spoilage_statuses(self, rows: Optional[np.ndarray] = None):
+        """
+        update_product_spoilage_status for many instances (default: every one in the store) as a few
+        array operations over the inventory columns. Produces the same predicted spoilage dates and
+        statuses as the per-instance method.
+        """
+        with self._lock:
+            inventory = self.inventory
+            if rows is None:
+                rows = inventory.active_rows()
+            known, inputs = self._spoilage_inputs(rows)
+            status_codes = np.full(len(rows), STATUS_CODES["Error: Missing Product Info"], dtype=np.int8)
+
+            today = today_day()
+            predicted_spoilage_day = predict_spoilage_days(*inputs, today)
+            inventory.predicted_spoilage_day[rows[known]] = predicted_spoilage_day
+            status_codes[known] = spoilage_status_codes(predicted_spoilage_day - today)
+            old_status_codes = inventory.status_code[rows]
+            inventory.set_statuses(rows, status_codes)
+            self._status_updated(rows, old_status_codes, (known, inputs))
+
+    def _status_updated(self, rows: np.ndarray, old_status_codes: np.ndarray,
+                        spoilage_inputs: Optional[Tuple[np.ndarray, SpoilageInputs]] = None):
+        """Schedules the rows' next status changes with the sweeper and publishes the changes just made."""
+        known, inputs = spoilage_inputs or self._spoilage_inputs(rows)
+        next_change_days = np.full(len(rows), -1, dtype=np.int64)
+        next_change_days[known] = next_status_change_days(*inputs, today_day())
+        self.sweeper.schedule(rows, next_change_days)
+
+        inventory = self.inventory
+        changed = np.flatnonzero(old_status_codes != inventory.status_code[rows])
+        if not len(changed):
+            return
+        now = datetime.now()
+        events = [
+            StatusChangeEvent(instance.instance_id, instance.sku, instance.shelf_id, SPOILAGE_STATUSES[old_code][0],
+                              instance.status, instance.predicted_spoilage_date, now)
+            for instance, old_code in zip((inventory.view(row) for row in rows[changed].tolist()),
+                                          old_status_codes[changed].tolist())
+        ]
+        self.recent_status_changes.extend(events)
+        for callback in list(self._subscribers):
+            try:
+                callback(events)
+            except Exception:
+                logger.exception("Status change subscriber failed")
+
+    def subscribe(self, callback: Callable[[List[StatusChangeEvent]], None]):
+        """Calls `callback` with the StatusChangeEvents of every batch of status changes (e.g. repricing, donations)."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def get_upcoming_status_changes(self, hours: float) -> List[Tuple[ProductInstanceGS, str, datetime]]:
+        """
+        Instances that will move to a more severe status within the next `hours` if conditions hold,
+        as (instance, next status, when), soonest first. Statuses change at the start of a day.
+        """
+        with self._lock:
+            cutoff_day = (datetime.now() + timedelta(hours=hours)).date().toordinal() - EPOCH_ORDINAL
+            rows = self.sweeper.rows_changing_by(cutoff_day)
+            known, inputs = self._spoilage_inputs(rows)
+            rows = rows[known]
+            change_days = self.inventory.next_status_change_day[rows].astype(np.int64)
+            next_status_codes = spoilage_status_codes(predict_spoilage_days(*inputs, change_days) - change_days)
+            order = np.lexsort((rows, change_days))
+            return [
+                (self.inventory.view(row), SPOILAGE_STATUSES[code][0], day_start(day))
+                for row, code, day in zip(rows[order].tolist(), next_status_codes[order].tolist(), change_days[order].tolist())
+            ]
+
+    def simulate_sensor_updates(self, rows: Optional[np.ndarray] = None):
+        """
+        simulate_sensor_update_for_instance's sensor simulation for the shelves holding `rows` (default:
+        every shelf with instances): one new reading per shelf, without the status update.
+        """
+        with self._lock:
+            inventory = self.inventory
+            if rows is None:
+                rows = inventory.active_rows()
+            parameters = spoilage_parameters(inventory.skus.values, self.product_masters)
+            rows = rows[parameters.known[inventory.sku_code[rows]]] # Instances without master data are skipped
+            if not len(rows):
+                return
+
+            # A shelf is held near the coldest ideal temperature among the products on it
+            shelf_codes, shelf_of_row = np.unique(inventory.shelf_code[rows], return_inverse=True)
+            ideal_temp_c = np.full(len(shelf_codes), np.inf)
+            np.minimum.at(ideal_temp_c, shelf_of_row, parameters.ideal_temp_c[inventory.sku_code[rows]])
+            streams = [inventory.streams[shelf_code] for shelf_code in shelf_codes.tolist()]
+            current_temp = np.array([s.temperature_c[s.size - 1] if s.size else np.nan for s in streams])
+            current_temp = np.where(np.isnan(current_temp), ideal_temp_c, current_temp)
+            humidity = np.array([s.humidity_pct[s.size - 1] if s.size else np.nan for s in streams])
+
+            # More aggressive change if already warm, to show effect
+            n = len(shelf_codes)
+            temp_change = np.where(current_temp > ideal_temp_c + 2, self._rng.uniform(-0.2, 1.0, n), self._rng.uniform(-0.5, 0.5, n))
+            new_temp = np.round(np.clip(current_temp + temp_change, ideal_temp_c - 2, ideal_temp_c + 8), 1)
+            new_humidity = np.round(np.clip(humidity + self._rng.uniform(-5, 5, n), 30, 90), 1) # NaN stays NaN
+
+            now = np.array([np.datetime64(datetime.now(), 'us').astype(np.int64)])
+            for i, shelf_code in enumerate(shelf_codes.tolist()):
+                inventory.record_shelf_readings(shelf_code, now, new_temp[i:i + 1], new_humidity[i:i + 1])
+
+    def ingest_sensor_readings(self, batch: SensorReadingBatch) -> Dict[str, Any]:
+        """
+        Appends shelf sensor readings to their shelves' streams, then recomputes spoilage for just the
+        instances on those shelves. Readings for unknown shelves, or older than a shelf's latest, are skipped.
+        """
+        with self._lock:
+            inventory = self.inventory
+            shelf_ids, shelf_of_reading = np.unique(batch.shelf_ids, return_inverse=True)
+            order = np.argsort(shelf_of_reading, kind='stable')
+            readings_by_shelf = np.split(order, np.cumsum(np.bincount(shelf_of_reading, minlength=len(shelf_ids)))[:-1])
+
+            ingested = 0
+            updated_rows = []
+            for shelf_id, readings in zip(shelf_ids.tolist(), readings_by_shelf):
+                shelf_code = inventory.shelves.code(shelf_id)
+                if shelf_code is None:
+                    continue
+                kept = inventory.record_shelf_readings(
+                    shelf_code, batch.timestamp_us[readings], batch.temperature_c[readings], batch.humidity_pct[readings]
+                )
+                ingested += kept
+                if kept:
+                    updated_rows.append(inventory.rows_on_shelf(shelf_id))
+
+            rows = np.concatenate(updated_rows) if updated_rows else np.empty(0, dtype=np.intp)
+            if len(rows):
+                self.recompute_spoilage_statuses(rows)
+            return {
+                "readings_ingested": ingested,
+                "readings_skipped": len(batch) - ingested,
+                "instances_updated": len(rows)
+            }
 
     def get_shelf_items(self, shelf_id: str, simulate_updates: bool = True) -> List[ProductInstanceGS]:
         """Returns items on a shelf, optionally simulating sensor updates first."""
-        if shelf_id not in self.shelf_inventory:
-            return []
+        with self._lock:
+            rows = self.inventory.rows_on_shelf(shelf_id)
+            if simulate_updates:
+                self.simulate_sensor_updates(rows)
+                self.recompute_spoilage_statuses(rows)
 
-        items_on_shelf = self.shelf_inventory[shelf_id]
-        if simulate_updates:
-            for instance in items_on_shelf:
-                self.simulate_sensor_update_for_instance(instance)
-
-        return items_on_shelf
+            return [self.inventory.view(row) for row in rows.tolist()]
 
-    def get_all_shelves_summary(self, store_id: str, simulate_updates: bool = True) -> Dict[str, str]:
+    def get_all_shelves_summary(self, store_id: str, refresh: bool = False) -> Dict[str, str]:
         """
         Returns a summary status (worst status color) for each shelf in the store.
-        For demo, store_id is not strictly used as inventory is global mock.
-        """
-        summary: Dict[str, str] = {}
-        color_priority = {"green": 0, "yellow": 1, "orange": 2, "red": 3, "darkred": 4, "grey": 5}
-
-        for shelf_id, instances in self.shelf_inventory.items():
-            if not instances:
-                summary[shelf_id] = "grey" # Empty or unknown
-                continue
-
-            worst_numeric_status = 0
-            for instance in instances:
-                if simulate_updates: # Ensure status is fresh before summarizing
-                    self.simulate_sensor_update_for_instance(instance)
+        Each service holds one store's inventory (GreenShelfShards keeps one service per store), so
+        store_id only has to match the store the service was loaded for.
 
-                current_numeric = color_priority.get(instance.status_color, 0)
-                if current_numeric > worst_numeric_status:
-                    worst_numeric_status = current_numeric
-
-            # Find color corresponding to the worst numeric status
-            shelf_color = "grey" # Default
-            for color, priority_val in color_priority.items():
-                if priority_val == worst_numeric_status:
-                    shelf_color = color
-                    break
-            summary[shelf_id] = shelf_color
-
-        return summary
+        Reads the per-shelf status histograms the inventory keeps as statuses change, so it costs
+        O(#shelves) and never touches instances. refresh=True first simulates a sensor update for
+        every shelf and recomputes every instance's spoilage.
+        """
+        with self._lock:
+            if refresh:
+                self.simulate_sensor_updates()
+                self.recompute_spoilage_statuses()
+
+            # Statuses are ordered by severity, so the worst one maps straight to its color
+            worst_status_by_shelf = self.inventory.worst_status_by_shelf()
+            return {
+                shelf_id: SPOILAGE_STATUSES[worst][1] if worst >= 0 else "grey" # Empty or unknown
+                for shelf_id, worst in zip(self.inventory.shelves.values, worst_status_by_shelf.tolist())
+            }
 
     def get_instance_by_id(self, instance_id: str) -> Optional[Tuple[ProductInstanceGS, str]]:
         """ Finds an instance by its ID across all shelves. Returns (instance, shelf_id) or None. """
-        for shelf_id, items_on_shelf in self.shelf_inventory.items():
-            for item in items_on_shelf:
-                if item.instance_id == instance_id:
-                    return item, shelf_id
-        return None
+        with self._lock:
+            row = self.inventory.find(instance_id) # Hash index, O(1)
+            if row is None:
+                return None
+            instance = self.inventory.view(row)
+            return instance, instance.shelf_id
+
+    def get_instance_details(self, instance_id: str, simulate_update: bool = True) -> Optional[Dict[str, Any]]:
+        """The instance as a dict (None if it doesn't exist), after simulating a reading from its shelf sensor."""
+        with self._lock:
+            row = self.inventory.find(instance_id)
+            if row is None:
+                return None
+            instance = self.inventory.view(row)
+            if simulate_update:
+                self.simulate_sensor_update_for_instance(instance)
+            return instance.to_dict()
+
+    def get_instances_by_sku(self, sku: str) -> List[ProductInstanceGS]:
+        """All instances of a product, across shelves."""
+        with self._lock:
+            return [self.inventory.view(row) for row in self.inventory.rows_with_sku(sku).tolist()]
+
+    def get_instances_by_status(self, status: str) -> List[ProductInstanceGS]:
+        """All instances currently in a spoilage status, e.g. "Critical / Donate"."""
+        with self._lock:
+            return [self.inventory.view(row) for row in self.inventory.rows_with_status(status).tolist()]
+
+    def move_instance(self, instance_id: str, shelf_id: str) -> Optional[ProductInstanceGS]:
+        """Moves an instance to another shelf. Returns the instance, or None if it doesn't exist."""
+        with self._lock:
+            row = self.inventory.find(instance_id)
+            if row is None:
+                return None
+            self.inventory.move(row, shelf_id)
+            return self.inventory.view(row)
+
+    def remove_instance(self, instance_id: str) -> bool:
+        """Removes an instance (sold, donated or discarded). Returns False if it doesn't exist."""
+        with self._lock:
+            row = self.inventory.find(instance_id)
+            if row is None:
+                return False
+            self.inventory.remove(row)
+            return True
 
 # Example for direct testing
 if __name__ == '__main__':
     gs_service = GreenShelfService()
 
     print("--- Initial Shelf Summary ---")
-    summary = gs_service.get_all_shelves_summary("Store101", simulate_updates=False) # Don't simulate for initial view
+    summary = gs_service.get_all_shelves_summary("Store101") # Don't simulate for initial view
     for shelf, status_color in summary.items():
         print(f"Shelf {shelf}: {status_color}")
 
@@ -247,7 +462,6 @@ if __name__ == '__main__':
             print(f"  Update {i+1}: Temp: {test_item.current_conditions.temperature_c:.1f}°C, Pred Spoil: {test_item.predicted_spoilage_date}, Status: {test_item.status}")
 
     print("\n--- Shelf Summary After Some Simulations ---")
-    summary_after = gs_service.get_all_shelves_summary("Store101", simulate_updates=True)
+    summary_after = gs_service.get_all_shelves_summary("Store101", refresh=True)
     for shelf, status_color in summary_after.items():
         print(f"Shelf {shelf}: {status_color}")
-```
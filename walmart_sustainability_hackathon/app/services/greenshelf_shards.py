@@ -0,0 +1,237 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..models.greenshelf_models import SPOILAGE_STATUSES, STATUS_CODES, _day_to_date
+from .greenshelf_service import GreenShelfService
+
+
+def query_shard(store_id: str, service: GreenShelfService, statuses: Optional[List[str]] = None,
+                categories: Optional[List[str]] = None, skus: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Active instances in one store matching every given filter (None matches anything)."""
+    inventory = service.inventory
+    with service.locked():
+        rows = inventory.active_rows()
+        sku_codes = inventory.sku_code[rows]
+        sku_categories = [
+            master.category if master else None
+            for master in (service.get_product_master(sku) for sku in inventory.skus.values)
+        ]
+        match = np.ones(len(rows), dtype=bool)
+        if statuses is not None:
+            match &= np.isin(inventory.status_code[rows], [STATUS_CODES[status] for status in statuses if status in STATUS_CODES])
+        if categories is not None:
+            wanted = set(categories)
+            match &= np.array([category in wanted for category in sku_categories], dtype=bool)[sku_codes]
+        if skus is not None:
+            wanted = set(skus)
+            match &= np.array([sku in wanted for sku in inventory.skus.values], dtype=bool)[sku_codes]
+
+        results = []
+        for row in rows[match].tolist():
+            label, color = SPOILAGE_STATUSES[inventory.status_code[row]]
+            sku_code = inventory.sku_code[row]
+            results.append({
+                "store_id": store_id,
+                "instance_id": inventory.instance_ids[row],
+                "sku": inventory.skus[sku_code],
+                "product_name": inventory.product_names[inventory.product_name_code[row]],
+                "category": sku_categories[sku_code],
+                "shelf_id": inventory.shelves[inventory.shelf_code[row]],
+                "quantity": int(inventory.quantity[row]),
+                "predicted_spoilage_date": _day_to_date(inventory.predicted_spoilage_day[row]).isoformat(),
+                "status": label,
+                "status_color": color
+            })
+        return results
+
+
+class GreenShelfShards:
+    """
+    GreenShelf partitioned by store: one GreenShelfService (inventory, sensor streams, sweeper) per
+    store, so stores load, evict and update independently.
+
+    Stores are loaded lazily on first use by `loader(store_id)`, outside the shards' lock: requests
+    for other stores go on while one loads, and concurrent requests for the same store wait for its
+    single load. An LRU keeps the resident stores' inventories within `memory_budget_bytes` (by
+    GreenShelfInventory.nbytes(), re-measured on each use since inventories grow); pinned stores are
+    never evicted. `on_load(store_id, service)` runs on every freshly loaded service before any
+    request sees it, e.g. to subscribe to its status changes (a failure fails the load).
+    `on_evict(store_id, service)` runs after a store is dropped, e.g. to persist it, and a reload of
+    that store waits for it to finish. While `sweep_max_sleep_seconds` is positive
+    every resident store runs its spoilage sweeper, started on load and stopped on eviction.
+
+    Cross-store queries load and filter the stores on up to `max_workers` threads (0 queries them
+    one after another) and merge the per-store results.
+    """
+
+    def __init__(self, loader: Callable[[str], GreenShelfService] = GreenShelfService,
+                 memory_budget_bytes: int = 256 * 1024 * 1024, max_workers: int = 8,
+                 on_load: Optional[Callable[[str, GreenShelfService], None]] = None,
+                 on_evict: Optional[Callable[[str, GreenShelfService], None]] = None):
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.max_workers = max_workers
+        self.on_load = on_load
+        self.on_evict = on_evict
+        self.sweep_max_sleep_seconds = 0.0
+        self._resident: "OrderedDict[str, GreenShelfService]" = OrderedDict()
+        self._resident_bytes: Dict[str, int] = {}
+        self._pinned: Set[str] = set()
+        self._loading: Dict[str, Future] = {} # Store ID -> its load in progress
+        self._releasing: Dict[str, threading.Event] = {} # Store ID -> set once its eviction has been handled
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, store_id: str) -> GreenShelfService:
+        """The store's service, loading it if it isn't resident."""
+        with self._lock:
+            service = self._resident.get(store_id)
+            if service is not None:
+                self._resident.move_to_end(store_id)
+                self._resident_bytes[store_id] = service.inventory.nbytes()
+                self.hits += 1
+                return service
+            waiting = store_id in self._loading
+            if waiting: # Another request is loading it
+                loading = self._loading[store_id]
+                self.hits += 1
+            else:
+                loading = self._loading[store_id] = Future()
+                releasing = self._releasing.get(store_id)
+                self.misses += 1
+        if waiting:
+            return loading.result()
+
+        try:
+            if releasing is not None: # Its files are still being written by on_evict
+                releasing.wait()
+            service = self.loader(store_id)
+            if self.on_load is not None:
+                self.on_load(store_id, service)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[store_id]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[store_id]
+            self._resident[store_id] = service
+            self._resident_bytes[store_id] = service.inventory.nbytes()
+            if self.sweep_max_sleep_seconds > 0:
+                self._start_sweeper(service)
+            evicted = self._evict()
+        loading.set_result(service)
+        for evicted_store_id, evicted_service in evicted:
+            self._release(evicted_store_id, evicted_service)
+        return service
+
+    def pin(self, store_id: str) -> GreenShelfService:
+        """Loads a store and keeps it resident regardless of the memory budget."""
+        with self._lock:
+            self._pinned.add(store_id)
+        return self.get(store_id)
+
+    def evict(self, store_id: str) -> bool:
+        """Drops a store (even a pinned one); the next get() loads it again."""
+        with self._lock:
+            self._pinned.discard(store_id)
+            service = self._resident.pop(store_id, None)
+            self._resident_bytes.pop(store_id, None)
+            if service is None:
+                return False
+            self._releasing[store_id] = threading.Event()
+        self._release(store_id, service)
+        return True
+
+    def resident_stores(self) -> List[str]:
+        """Resident store IDs, least recently used first."""
+        with self._lock:
+            return list(self._resident)
+
+    def resident_services(self) -> Dict[str, GreenShelfService]:
+        """Resident stores' services, without counting as a use."""
+        with self._lock:
+            return dict(self._resident)
+
+    def _evict(self) -> List[Tuple[str, GreenShelfService]]:
+        # Always keeps the most recently used store, even if it alone exceeds the budget
+        evicted = []
+        for store_id in list(self._resident):
+            if sum(self._resident_bytes.values()) <= self.memory_budget_bytes or len(self._resident) <= 1:
+                break
+            if store_id in self._pinned or store_id == next(reversed(self._resident)):
+                continue
+            evicted.append((store_id, self._resident.pop(store_id)))
+            del self._resident_bytes[store_id]
+            self._releasing[store_id] = threading.Event()
+            self.evictions += 1
+        return evicted
+
+    def _release(self, store_id: str, service: GreenShelfService):
+        try:
+            service.sweeper.stop()
+            if self.on_evict is not None:
+                self.on_evict(store_id, service)
+        finally:
+            with self._lock:
+                self._releasing.pop(store_id).set()
+
+    def _start_sweeper(self, service: GreenShelfService):
+        service.sweeper.max_sleep_seconds = self.sweep_max_sleep_seconds
+        service.sweeper.start()
+
+    def start_sweepers(self, max_sleep_seconds: float):
+        """Runs the spoilage sweeper of every resident store, and of each store loaded from now on."""
+        with self._lock:
+            self.sweep_max_sleep_seconds = max_sleep_seconds
+            for service in self._resident.values():
+                self._start_sweeper(service)
+
+    def stop(self):
+        """Stops the sweepers."""
+        with self._lock:
+            self.sweep_max_sleep_seconds = 0.0
+            services = list(self._resident.values())
+        for service in services:
+            service.sweeper.stop()
+
+    def query_instances(self, store_ids: Iterable[str], statuses: Optional[List[str]] = None,
+                        categories: Optional[List[str]] = None, skus: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Active instances across the given stores matching every given filter, e.g. everything
+        "Critical / Donate" in category "Dairy" across a region's stores, soonest predicted spoilage
+        first. Stores that aren't resident are loaded, several at a time.
+        """
+        def query(store_id: str) -> List[Dict[str, Any]]:
+            # A store evicted by a later load is still queried through the service taken here
+            return query_shard(store_id, self.get(store_id), statuses, categories, skus)
+
+        store_ids = list(dict.fromkeys(store_ids))
+        if self.max_workers > 1 and len(store_ids) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(store_ids))) as executor:
+                per_store = list(executor.map(query, store_ids))
+        else:
+            per_store = [query(store_id) for store_id in store_ids]
+        return sorted(
+            (item for items in per_store for item in items),
+            key=lambda item: (item["predicted_spoilage_date"], item["store_id"], item["instance_id"])
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "resident_stores": list(self._resident),
+                "pinned_stores": sorted(self._pinned),
+                "loading_stores": sorted(self._loading),
+                "resident_bytes": sum(self._resident_bytes.values()),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
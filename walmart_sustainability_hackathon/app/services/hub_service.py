@@ -219,5 +219,3 @@ if __name__ == '__main__':
     print("\nTips:")
     for tip in dashboard_data.sustainability_tips:
         print(f"  - {tip}")
-
-```
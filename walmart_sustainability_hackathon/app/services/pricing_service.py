@@ -1,17 +1,51 @@
 from datetime import date, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
 import random
 
-from ..models.greenshelf_models import ProductInstanceGS # Product info from GreenShelf
-from ..models.pricing_models import ProductPricingInfo, DynamicPriceResult, DynamicPricingRulesConfig, MOCK_PRODUCT_PRICING_PS
+import numpy as np
+
+from ..models.greenshelf_models import ProductInstanceGS, StatusChangeEvent, STATUS_CODES, EPOCH_ORDINAL # Product info from GreenShelf
+from ..models.pricing_models import (
+    ProductPricingInfo, DynamicPriceResult, DynamicPricingRulesConfig, BulkPriceResult, MOCK_PRODUCT_PRICING_PS
+)
 from .greenshelf_service import GreenShelfService # Dependency
 
+
+def _round_like_round(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    np.round(values, ndigits), except that values within float error of a tie go through round(),
+    which rounds the exact binary value; keeps bulk prices identical to the per-item path's.
+    """
+    rounded = np.round(values, ndigits)
+    scaled = values * 10.0 ** ndigits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(value, ndigits) for value in values[near_tie].tolist()]
+    return rounded
+
+
 class DynamicPricingService:
     def __init__(self, greenshelf_service: GreenShelfService,
                  product_pricing_data: Dict[str, ProductPricingInfo] = MOCK_PRODUCT_PRICING_PS):
         self.greenshelf_service = greenshelf_service
         self.product_pricing_data = product_pricing_data
         self.config = DynamicPricingRulesConfig()
+        self.attach(greenshelf_service)
+
+    def attach(self, greenshelf_service: GreenShelfService):
+        """Reprices the store's items as soon as GreenShelf moves them to another spoilage tier."""
+        greenshelf_service.subscribe(
+            lambda events: self.reprice_on_status_changes(events, greenshelf_service=greenshelf_service)
+        )
+
+    def reprice_on_status_changes(self, events: List[StatusChangeEvent],
+                                  greenshelf_service: Optional[GreenShelfService] = None):
+        service = greenshelf_service or self.greenshelf_service
+        inventory = service.inventory
+        rows = [inventory.find(event.instance_id) for event in events]
+        rows = [row for row in rows if row is not None]
+        if rows:
+            self.reprice(np.unique(np.array(rows, dtype=np.intp)), greenshelf_service=service)
 
     def get_dynamic_price_for_instance(self, instance_id: str, demand_signal_factor: Optional[float] = None) -> Optional[DynamicPriceResult]:
         """
@@ -20,122 +54,232 @@ class DynamicPricingService:
                               >1 means higher demand (potentially smaller discount needed)
                               <1 means lower demand (potentially larger discount needed)
         """
-        item_tuple = self.greenshelf_service.get_instance_by_id(instance_id)
-        if not item_tuple:
-            # print(f"Error (PricingService): Product instance {instance_id} not found in GreenShelf.")
-            return None
-
-        product_instance, _ = item_tuple # We don't need shelf_id here for pricing logic itself
-
-        # Ensure product instance's spoilage status is up-to-date
-        # (get_instance_by_id doesn't simulate updates, so we might need to if a lot of time passed)
-        # For this demo, we assume GreenShelfService.get_shelf_items or a dedicated update call
-        # would have recently updated it. If not, call simulate_sensor_update_for_instance here.
-        # self.greenshelf_service.simulate_sensor_update_for_instance(product_instance) # Uncomment if direct calls need refresh
-
-        pricing_info = self.product_pricing_data.get(product_instance.sku)
-        if not pricing_info:
-            # print(f"Error (PricingService): Base pricing info not found for SKU {product_instance.sku}.")
-            # Fallback: use product_instance.original_price if it was set, or skip discount
-            if hasattr(product_instance, 'original_price') and product_instance.original_price is not None:
-                 pricing_info = ProductPricingInfo(sku=product_instance.sku,
-                                                   original_price=product_instance.original_price,
-                                                   cost_price=product_instance.original_price * 0.5, # Guess cost
-                                                   min_margin_pct=0.05)
-            else: # Cannot price without original_price
-                return DynamicPriceResult( # Return with no discount
-                    instance_id=product_instance.instance_id, sku=product_instance.sku, product_name=product_instance.product_name,
-                    original_price=0, discount_percentage=0, discounted_price=0,
-                    reason="Pricing info unavailable", predicted_spoilage_date=product_instance.predicted_spoilage_date,
-                    status_from_greenshelf=product_instance.status, status_color_from_greenshelf=product_instance.status_color
-                )
-
-
-        days_remaining = (product_instance.predicted_spoilage_date - date.today()).days
-        base_discount_pct = 0.0
-        reason_template = "Standard Price"
-
-        rules_for_status = self.config.TIERS.get(product_instance.status)
-        if rules_for_status:
-            for threshold_days, discount_pct, rule_name_tmpl in sorted(rules_for_status, key=lambda x: x[0]):
-                if days_remaining <= threshold_days:
-                    base_discount_pct = discount_pct
-                    reason_template = rule_name_tmpl
-                    break
-
-        current_demand_factor = demand_signal_factor if demand_signal_factor is not None else self.config.DEFAULT_DEMAND_FACTOR
-
-        effective_discount_pct = base_discount_pct
-        # Apply demand factor: If demand is high (factor > 1), we might reduce discount.
-        # If demand is low (factor < 1), we might increase discount.
-        # This logic is simplified: higher demand factor reduces discount.
-        if current_demand_factor != 1.0 and base_discount_pct > 0:
-             # Only apply if it makes sense, e.g., not for already critical items where max discount is desired
-            if product_instance.status not in ["Critical / Donate", "Spoiled"]:
-                 effective_discount_pct = base_discount_pct / current_demand_factor
-
-        # Cap discount by MAX_DISCOUNT_PERCENTAGE
-        effective_discount_pct = min(effective_discount_pct, self.config.MAX_DISCOUNT_PERCENTAGE)
-        effective_discount_pct = max(0, effective_discount_pct) # Ensure not negative
-
-        # Enforce minimum profit margin
-        potential_discounted_price = pricing_info.original_price * (1 - effective_discount_pct)
-        min_profitable_price = pricing_info.cost_price * (1 + pricing_info.min_margin_pct)
-
-        final_reason = reason_template.format(product_name=product_instance.product_name)
-
-        if potential_discounted_price < min_profitable_price and pricing_info.original_price > pricing_info.cost_price : # only if profitable at all
-            # Adjust discount to meet minimum margin, if possible
-            if pricing_info.original_price > min_profitable_price:
-                effective_discount_pct = (pricing_info.original_price - min_profitable_price) / pricing_info.original_price
-                final_reason += " (Margin Protected)"
-            else:
-                # If even original price is below cost + min_margin, sell at cost or max possible discount not leading to loss
-                effective_discount_pct = (pricing_info.original_price - pricing_info.cost_price) / pricing_info.original_price
-                final_reason += " (Near Cost)"
-
-            effective_discount_pct = max(0, min(effective_discount_pct, self.config.MAX_DISCOUNT_PERCENTAGE))
-
-
-        final_discount_percentage = round(effective_discount_pct, 4) # Store with more precision
-        final_discounted_price = round(pricing_info.original_price * (1 - final_discount_percentage), 2)
-
-        # Update ProductInstanceGS with pricing info for the demo UI
-        product_instance.original_price = pricing_info.original_price
-        product_instance.current_discount_percentage = final_discount_percentage
-        product_instance.current_discounted_price = final_discounted_price
-
-        return DynamicPriceResult(
-            instance_id=product_instance.instance_id,
-            sku=product_instance.sku,
-            product_name=product_instance.product_name,
-            original_price=pricing_info.original_price,
-            discount_percentage=final_discount_percentage,
-            discounted_price=final_discounted_price,
-            reason=final_reason,
-            predicted_spoilage_date=product_instance.predicted_spoilage_date,
-            status_from_greenshelf=product_instance.status,
-            status_color_from_greenshelf=product_instance.status_color
-        )
+        with self.greenshelf_service.locked():
+            item_tuple = self.greenshelf_service.get_instance_by_id(instance_id)
+            if not item_tuple:
+                # print(f"Error (PricingService): Product instance {instance_id} not found in GreenShelf.")
+                return None
+
+            product_instance, _ = item_tuple # We don't need shelf_id here for pricing logic itself
+            return self.get_dynamic_price(product_instance, demand_signal_factor)
+
+    def get_dynamic_price(self, product_instance: ProductInstanceGS, demand_signal_factor: Optional[float] = None) -> DynamicPriceResult:
+        """
+        Calculates dynamic discount for a product instance already in hand
+        (see get_dynamic_price_for_instance for demand_signal_factor).
+        """
+        with self.greenshelf_service.locked(): # Reads the status and writes the price back without a sweep in between
+            # Ensure product instance's spoilage status is up-to-date
+            # (get_instance_by_id doesn't simulate updates, so we might need to if a lot of time passed)
+            # For this demo, we assume GreenShelfService.get_shelf_items or a dedicated update call
+            # would have recently updated it. If not, call simulate_sensor_update_for_instance here.
+            # self.greenshelf_service.simulate_sensor_update_for_instance(product_instance) # Uncomment if direct calls need refresh
+
+            pricing_info = self.product_pricing_data.get(product_instance.sku)
+            if not pricing_info:
+                # print(f"Error (PricingService): Base pricing info not found for SKU {product_instance.sku}.")
+                # Fallback: use product_instance.original_price if it was set, or skip discount
+                if hasattr(product_instance, 'original_price') and product_instance.original_price is not None:
+                     pricing_info = ProductPricingInfo(sku=product_instance.sku,
+                                                       original_price=product_instance.original_price,
+                                                       cost_price=product_instance.original_price * 0.5, # Guess cost
+                                                       min_margin_pct=0.05)
+                else: # Cannot price without original_price
+                    return DynamicPriceResult( # Return with no discount
+                        instance_id=product_instance.instance_id, sku=product_instance.sku, product_name=product_instance.product_name,
+                        original_price=0, discount_percentage=0, discounted_price=0,
+                        reason="Pricing info unavailable", predicted_spoilage_date=product_instance.predicted_spoilage_date,
+                        status_from_greenshelf=product_instance.status, status_color_from_greenshelf=product_instance.status_color
+                    )
+
+
+            days_remaining = (product_instance.predicted_spoilage_date - date.today()).days
+            base_discount_pct = 0.0
+            reason_template = "Standard Price"
+
+            rules_for_status = self.config.TIERS.get(product_instance.status)
+            if rules_for_status:
+                for threshold_days, discount_pct, rule_name_tmpl in sorted(rules_for_status, key=lambda x: x[0]):
+                    if days_remaining <= threshold_days:
+                        base_discount_pct = discount_pct
+                        reason_template = rule_name_tmpl
+                        break
+
+            current_demand_factor = demand_signal_factor if demand_signal_factor is not None else self.config.DEFAULT_DEMAND_FACTOR
+
+            effective_discount_pct = base_discount_pct
+            # Apply demand factor: If demand is high (factor > 1), we might reduce discount.
+            # If demand is low (factor < 1), we might increase discount.
+            # This logic is simplified: higher demand factor reduces discount.
+            if current_demand_factor != 1.0 and base_discount_pct > 0:
+                 # Only apply if it makes sense, e.g., not for already critical items where max discount is desired
+                if product_instance.status not in ["Critical / Donate", "Spoiled"]:
+                     effective_discount_pct = base_discount_pct / current_demand_factor
+
+            # Cap discount by MAX_DISCOUNT_PERCENTAGE
+            effective_discount_pct = min(effective_discount_pct, self.config.MAX_DISCOUNT_PERCENTAGE)
+            effective_discount_pct = max(0, effective_discount_pct) # Ensure not negative
+
+            # Enforce minimum profit margin
+            potential_discounted_price = pricing_info.original_price * (1 - effective_discount_pct)
+            min_profitable_price = pricing_info.cost_price * (1 + pricing_info.min_margin_pct)
+
+            final_reason = reason_template.format(product_name=product_instance.product_name)
+
+            if potential_discounted_price < min_profitable_price and pricing_info.original_price > pricing_info.cost_price : # only if profitable at all
+                # Adjust discount to meet minimum margin, if possible
+                if pricing_info.original_price > min_profitable_price:
+                    effective_discount_pct = (pricing_info.original_price - min_profitable_price) / pricing_info.original_price
+                    final_reason += " (Margin Protected)"
+                else:
+                    # If even original price is below cost + min_margin, sell at cost or max possible discount not leading to loss
+                    effective_discount_pct = (pricing_info.original_price - pricing_info.cost_price) / pricing_info.original_price
+                    final_reason += " (Near Cost)"
+
+                effective_discount_pct = max(0, min(effective_discount_pct, self.config.MAX_DISCOUNT_PERCENTAGE))
+
+
+            final_discount_percentage = round(effective_discount_pct, 4) # Store with more precision
+            final_discounted_price = round(pricing_info.original_price * (1 - final_discount_percentage), 2)
+
+            # Update ProductInstanceGS with pricing info for the demo UI
+            product_instance.original_price = pricing_info.original_price
+            product_instance.current_discount_percentage = final_discount_percentage
+            product_instance.current_discounted_price = final_discounted_price
+
+            return DynamicPriceResult(
+                instance_id=product_instance.instance_id,
+                sku=product_instance.sku,
+                product_name=product_instance.product_name,
+                original_price=pricing_info.original_price,
+                discount_percentage=final_discount_percentage,
+                discounted_price=final_discounted_price,
+                reason=final_reason,
+                predicted_spoilage_date=product_instance.predicted_spoilage_date,
+                status_from_greenshelf=product_instance.status,
+                status_color_from_greenshelf=product_instance.status_color
+            )
+
+    def reprice(self, rows: Optional[np.ndarray] = None, demand_signal_factors: Union[float, np.ndarray, None] = None,
+                greenshelf_service: Optional[GreenShelfService] = None) -> BulkPriceResult:
+        """
+        get_dynamic_price for many instances at once (default: every one in the store), as array
+        operations over the inventory columns: tier thresholds, demand factors, the discount cap and
+        margin protection give the same prices as the per-item path, which are written back onto
+        the instances the same way. demand_signal_factors is one factor for all instances or one
+        per row. greenshelf_service selects another store to reprice (default: this service's).
+        """
+        service = greenshelf_service or self.greenshelf_service
+        config = self.config
+        with service.locked():
+            inventory = service.inventory
+            if rows is None:
+                rows = inventory.active_rows()
+            n = len(rows)
+
+            # Base pricing per interned SKU; SKUs without it fall back to a price already on the instance
+            pricing = [self.product_pricing_data.get(sku) for sku in inventory.skus.values]
+            sku_codes = inventory.sku_code[rows]
+            known = np.array([info is not None for info in pricing], dtype=bool)[sku_codes]
+            instance_price = inventory.original_price[rows]
+            priced = known | ~np.isnan(instance_price)
+            original_price = np.where(
+                known, np.array([info.original_price if info else np.nan for info in pricing], dtype=float)[sku_codes],
+                instance_price
+            )
+            cost_price = np.where(
+                known, np.array([info.cost_price if info else np.nan for info in pricing], dtype=float)[sku_codes],
+                instance_price * 0.5 # Guess cost
+            )
+            min_margin_pct = np.where(
+                known, np.array([info.min_margin_pct if info else np.nan for info in pricing], dtype=float)[sku_codes], 0.05
+            )
+
+            # Tier per instance (-1: standard price): the lowest threshold of its status's rules it is within
+            status_codes = inventory.status_code[rows]
+            days_remaining = inventory.predicted_spoilage_day[rows].astype(np.int64) - (date.today().toordinal() - EPOCH_ORDINAL)
+            tier = np.full(n, -1, dtype=np.int32)
+            tier_discounts: List[float] = []
+            tier_templates: List[str] = []
+            for status, rules in config.TIERS.items():
+                on_status = status_codes == STATUS_CODES.get(status, -1)
+                first = len(tier_templates)
+                ordered = sorted(rules, key=lambda x: x[0])
+                for threshold_days, discount_pct, rule_name_tmpl in ordered:
+                    tier_discounts.append(discount_pct)
+                    tier_templates.append(rule_name_tmpl)
+                for k in reversed(range(len(ordered))): # Lower thresholds overwrite higher ones
+                    tier[on_status & (days_remaining <= ordered[k][0])] = first + k
+            base_discount_pct = np.array(tier_discounts + [0.0], dtype=float)[tier] # Tier -1 picks the trailing 0
+
+            # Demand adjusts discounts except for items that should go at the maximum discount
+            factors = np.broadcast_to(np.asarray(
+                config.DEFAULT_DEMAND_FACTOR if demand_signal_factors is None else demand_signal_factors, dtype=float
+            ), (n,))
+            adjustable = (factors != 1.0) & (base_discount_pct > 0) & \
+                (status_codes != STATUS_CODES["Critical / Donate"]) & (status_codes != STATUS_CODES["Spoiled"])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                effective_discount_pct = np.where(adjustable, base_discount_pct / factors, base_discount_pct)
+            effective_discount_pct = np.maximum(0, np.minimum(effective_discount_pct, config.MAX_DISCOUNT_PERCENTAGE))
+
+            # Enforce minimum profit margin (only for items profitable at all)
+            min_profitable_price = cost_price * (1 + min_margin_pct)
+            adjust = (original_price * (1 - effective_discount_pct) < min_profitable_price) & (original_price > cost_price)
+            margin_protected = adjust & (original_price > min_profitable_price)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                adjusted_pct = np.where(margin_protected, original_price - min_profitable_price,
+                                        original_price - cost_price) / original_price
+            effective_discount_pct = np.where(
+                adjust, np.maximum(0, np.minimum(adjusted_pct, config.MAX_DISCOUNT_PERCENTAGE)), effective_discount_pct
+            )
+            adjustment = np.where(margin_protected, 1, np.where(adjust, 2, 0)).astype(np.int8)
+
+            original_price = np.where(priced, original_price, 0.0)
+            discount_percentage = np.where(priced, _round_like_round(effective_discount_pct, 4), 0.0)
+            discounted_price = np.where(priced, _round_like_round(original_price * (1 - discount_percentage), 2), 0.0)
+
+            # Update the instances with pricing info for the demo UI
+            priced_rows = rows[priced]
+            inventory.original_price[priced_rows] = original_price[priced]
+            inventory.current_discount_percentage[priced_rows] = discount_percentage[priced]
+            inventory.current_discounted_price[priced_rows] = discounted_price[priced]
+
+            return BulkPriceResult(
+                rows=rows,
+                instance_ids=[inventory.instance_ids[row] for row in rows.tolist()],
+                sku_codes=sku_codes,
+                skus=list(inventory.skus.values),
+                product_name_codes=inventory.product_name_code[rows],
+                product_names=list(inventory.product_names.values),
+                status_codes=status_codes,
+                predicted_spoilage_days=inventory.predicted_spoilage_day[rows],
+                priced=priced,
+                original_price=original_price,
+                discount_percentage=discount_percentage,
+                discounted_price=discounted_price,
+                tier=tier,
+                tier_templates=tier_templates,
+                adjustment=adjustment
+            )
 
     def get_dynamic_prices_for_shelf_items(self, shelf_id: str) -> List[DynamicPriceResult]:
         """
         Gets dynamic prices for all items on a given shelf by fetching from GreenShelf first.
         """
-        # Get current state of items from GreenShelf (this also simulates sensor updates)
-        items_on_shelf = self.greenshelf_service.get_shelf_items(shelf_id, simulate_updates=True)
+        with self.greenshelf_service.locked():
+            # Get current state of items from GreenShelf (this also simulates sensor updates)
+            items_on_shelf = self.greenshelf_service.get_shelf_items(shelf_id, simulate_updates=True)
 
-        priced_results: List[DynamicPriceResult] = []
-        for instance in items_on_shelf:
-            # For demo, apply a random demand factor or a simple one based on status
-            demand_factor = 1.0
-            if instance.status == "Nearing Expiry": demand_factor = random.uniform(0.9, 1.1)
-            elif instance.status == "Approaching": demand_factor = random.uniform(1.0, 1.2)
+            priced_results: List[DynamicPriceResult] = []
+            for instance in items_on_shelf:
+                # For demo, apply a random demand factor or a simple one based on status
+                demand_factor = 1.0
+                if instance.status == "Nearing Expiry": demand_factor = random.uniform(0.9, 1.1)
+                elif instance.status == "Approaching": demand_factor = random.uniform(1.0, 1.2)
 
-            price_result = self.get_dynamic_price_for_instance(instance.instance_id, demand_signal_factor=demand_factor)
-            if price_result:
-                priced_results.append(price_result)
-        return priced_results
+                # Price the instance we already hold rather than looking it up again by ID
+                priced_results.append(self.get_dynamic_price(instance, demand_signal_factor=demand_factor))
+            return priced_results
 
 # Example for direct testing
 if __name__ == '__main__':
@@ -159,11 +303,10 @@ if __name__ == '__main__':
         print(f"    Reason: {item_price_info.reason}")
 
     # Test a single item if an instance ID is known
-    if gs_service.shelf_inventory.get("ShelfA1_Dairy"):
-        first_item_instance_id = gs_service.shelf_inventory["ShelfA1_Dairy"][0].instance_id
+    shelf_a1_items = gs_service.get_shelf_items("ShelfA1_Dairy", simulate_updates=False)
+    if shelf_a1_items:
+        first_item_instance_id = shelf_a1_items[0].instance_id
         print(f"\n--- Single item test for {first_item_instance_id} ---")
         single_item_price = dp_service.get_dynamic_price_for_instance(first_item_instance_id)
         if single_item_price:
             print(f"  Product: {single_item_price.product_name}, Discounted: ${single_item_price.discounted_price:.2f}, Reason: {single_item_price.reason}")
-
-```
@@ -0,0 +1,193 @@
+import fcntl
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+# One record per day: days since 1970-01-01, units sold, average price
+SALES_HISTORY_DTYPE = np.dtype([('day', '<i4'), ('quantity_sold', '<i4'), ('price', '<f4')])
+
+
+def _read_header(f) -> Tuple[Tuple[int, int], int]:
+    """Reads a .npy file's header, leaving `f` at the start of the data; returns (format version, record count)."""
+    version = np.lib.format.read_magic(f)
+    read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+    (length,), _, _ = read_header(f)
+    return version, length
+
+
+class SalesHistoryStore:
+    """
+    Columnar, disk-backed store of daily sales history with one compact array per series.
+
+    Each series (e.g. "Store101_SKU_DAIRY_MILK1G") is a single .npy file of SALES_HISTORY_DTYPE
+    records. Files are opened memory-mapped and read-only, so worker processes on the same host
+    share one copy through the OS page cache instead of each building its own. Series are loaded
+    lazily on first use, and missing ones are created by a loader: the one passed to get(), or
+    else the store's own `loader(series_key)`. An LRU keeps the mapped arrays within
+    `memory_budget_bytes`. append() extends a file in place, so new sales cost O(new records)
+    rather than a rewrite of the whole history. Writers to a series, in this process or another,
+    are serialized by series_lock().
+    """
+
+    def __init__(self, root_dir: str, loader: Optional[Callable[[str], np.ndarray]] = None,
+                 memory_budget_bytes: int = 256 * 1024 * 1024):
+        self.root_dir = root_dir
+        self.loader = loader  # series_key -> SALES_HISTORY_DTYPE array, used when a series has no file yet
+        self.memory_budget_bytes = memory_budget_bytes
+        self._resident: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self._series_locks: Dict[str, threading.RLock] = {}
+        self._series_lock_files: Dict[str, object] = {} # Series key -> its lock file while locked here
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, series_key: str) -> str:
+        return os.path.join(self.root_dir, quote(series_key, safe='') + '.npy')
+
+    @contextmanager
+    def series_lock(self, series_key: str) -> Iterator[None]:
+        """
+        Exclusive lock on a series across threads and processes: an flock on a lock file beside the
+        series' file, which (unlike the data file) is never replaced. Reentrant within a thread.
+        """
+        with self._lock:
+            lock = self._series_locks.setdefault(series_key, threading.RLock())
+        with lock:
+            if series_key in self._series_lock_files: # This thread already holds it
+                yield
+                return
+            os.makedirs(self.root_dir, exist_ok=True)
+            with open(self._path(series_key) + '.lock', 'ab') as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX) # Released when the file is closed
+                self._series_lock_files[series_key] = f
+                try:
+                    yield
+                finally:
+                    del self._series_lock_files[series_key]
+
+    def get(self, series_key: str, loader: Optional[Callable[[], np.ndarray]] = None) -> np.ndarray:
+        """Returns the series' records, oldest day first, as a read-only (memory-mapped) array."""
+        with self._lock:
+            records = self._resident.get(series_key)
+            if records is not None:
+                self._resident.move_to_end(series_key)
+                self.hits += 1
+                return records
+            self.misses += 1
+
+        path = self._path(series_key)
+        if not os.path.exists(path):
+            self.write(series_key, loader() if loader is not None else self.loader(series_key))
+        records = np.load(path, mmap_mode='r')
+
+        with self._lock:
+            if series_key not in self._resident:
+                self._resident[series_key] = records
+                self._resident_bytes += records.nbytes
+                self._evict()
+        return records
+
+    def write(self, series_key: str, records: np.ndarray) -> None:
+        """Persists a series. The file is swapped in atomically, so concurrent readers never see a partial file."""
+        os.makedirs(self.root_dir, exist_ok=True)
+        records = np.ascontiguousarray(records, dtype=SALES_HISTORY_DTYPE)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, records)
+            os.replace(tmp_path, self._path(series_key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self.invalidate(series_key)
+
+    def append(self, series_key: str, records: np.ndarray,
+               loader: Optional[Callable[[], np.ndarray]] = None) -> np.ndarray:
+        """
+        Adds new records after the series' existing ones and returns the new full series.
+
+        The records are written past the end of the file, then the .npy header's length is updated
+        in place; readers that mapped the file earlier keep seeing the old length, and a crash in
+        between leaves the extra bytes unused. Records must be in day order and not older than the
+        series' last day (ValueError), so the history stays sorted.
+        """
+        records = np.ascontiguousarray(records, dtype=SALES_HISTORY_DTYPE)
+        if np.any(np.diff(records['day']) < 0):
+            raise ValueError("Sales records must be in day order.")
+        path = self._path(series_key)
+        # Held from reading the header through rewriting it, so concurrent appends can't interleave
+        with self.series_lock(series_key):
+            if not os.path.exists(path):
+                self.get(series_key, loader)
+
+            with open(path, 'r+b') as f:
+                # The file's own header, not a mapping cached here, says how many records it holds
+                version, length = _read_header(f)
+                data_start = f.tell()
+                itemsize = SALES_HISTORY_DTYPE.itemsize
+                if length and len(records):
+                    f.seek(data_start + (length - 1) * itemsize)
+                    last_day = int(np.frombuffer(f.read(itemsize), dtype=SALES_HISTORY_DTYPE)['day'][0])
+                    if int(records['day'][0]) < last_day:
+                        raise ValueError(f"Sales for {series_key} must not be older than its last recorded day.")
+
+                header = io.BytesIO()
+                write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+                write_header(header, {
+                    'descr': np.lib.format.dtype_to_descr(SALES_HISTORY_DTYPE),
+                    'fortran_order': False,
+                    'shape': (length + len(records),)
+                })
+                if header.tell() == data_start:
+                    f.seek(data_start + length * itemsize)
+                    f.write(records.tobytes())
+                    f.truncate()
+                    f.flush()
+                    f.seek(0)
+                    f.write(header.getvalue())
+            if header.tell() != data_start: # The length no longer fits the header's padding (rare): rewrite
+                self.write(series_key, np.concatenate([np.load(path, mmap_mode='r')[:length], records]))
+        self.invalidate(series_key)
+        return self.get(series_key)
+
+    def length(self, series_key: str) -> int:
+        """How many records the series' file holds right now (0 if it has none), including appends by other processes."""
+        try:
+            with open(self._path(series_key), 'rb') as f:
+                return _read_header(f)[1]
+        except FileNotFoundError:
+            return 0
+
+    def invalidate(self, series_key: str) -> None:
+        """Drops a series from memory; the next get() maps the file again (e.g. after another process appended)."""
+        with self._lock:
+            records = self._resident.pop(series_key, None)
+            if records is not None:
+                self._resident_bytes -= records.nbytes
+
+    def _evict(self) -> None:
+        # Always keep the most recently used series, even if it alone exceeds the budget
+        while self._resident_bytes > self.memory_budget_bytes and len(self._resident) > 1:
+            _, records = self._resident.popitem(last=False)
+            self._resident_bytes -= records.nbytes
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "resident_series": len(self._resident),
+                "resident_bytes": self._resident_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
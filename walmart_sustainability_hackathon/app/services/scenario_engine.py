@@ -0,0 +1,60 @@
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from ..models.demand_models import EventDataPoint, WeatherDataPoint
+
+
+class ScenarioBaseline(NamedTuple):
+    """The scenario-independent inputs of one series' forecast, one value per forecast day."""
+    dates: np.ndarray  # datetime64[D]
+    base_predictions: np.ndarray  # Model output
+    temperature: np.ndarray
+    weather_mask: np.ndarray  # Days with a weather reading; scenario temperature increases apply here
+    rain_effect: np.ndarray
+    event_impact_factor: np.ndarray
+    first_event_mask: np.ndarray  # Days the first event sets the event factor; scenario event multipliers apply here
+    first_event_name: str  # '' if there are no events
+
+
+def first_event_mask(day_numbers: np.ndarray, events: List[EventDataPoint]) -> np.ndarray:
+    """Days covered by the first event and not overridden by a later one (later events win, as in the features)."""
+    mask = np.zeros(len(day_numbers), dtype=bool)
+    for i, event in enumerate(events):
+        in_event = (day_numbers >= np.datetime64(event.start_date, 'D')) & \
+                   (day_numbers <= np.datetime64(event.end_date, 'D'))
+        mask = in_event if i == 0 else mask & ~in_event
+    return mask
+
+
+def weather_mask(day_numbers: np.ndarray, weather: List[WeatherDataPoint]) -> np.ndarray:
+    """Days that have a weather reading (the others keep the features' default temperature)."""
+    return np.isin(day_numbers, np.array([w.date for w in weather], dtype='datetime64[D]'))
+
+
+def apply_scenarios(baseline: ScenarioBaseline, scenarios: List[Optional[Dict]]) -> np.ndarray:
+    """
+    Predictions for every scenario at once, shape (len(scenarios), days).
+
+    Scenarios are scenario_adjustments dicts as taken by DemandForecastingService.predict (None or {}
+    is the baseline). Each becomes a row of the event and temperature multiplier matrices, so the
+    whole sweep is a handful of array operations over the shared baseline. Effects are applied in
+    the same order as DemandForecastingService's live path, so both give the same floats.
+    """
+    event_multipliers = np.array(
+        [(scenario or {}).get("event_impact_multiplier", 1.0) for scenario in scenarios], dtype=float
+    )
+    temperature_increases = np.array(
+        [(scenario or {}).get("weather_override", {}).get("temperature_increase_celsius", 0) for scenario in scenarios],
+        dtype=float
+    )
+
+    event_impact_factor = np.where(
+        baseline.first_event_mask,
+        baseline.event_impact_factor * event_multipliers[:, None],
+        baseline.event_impact_factor
+    )
+    temperature = np.where(baseline.weather_mask, baseline.temperature + temperature_increases[:, None], baseline.temperature)
+    predictions = baseline.base_predictions * (1 + (temperature - 15) * 0.005) # Small temp effect
+    predictions = predictions * baseline.rain_effect * event_impact_factor
+    return np.maximum(0, predictions) # Ensure non-negative
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple
+
+import numpy as np
+
+# Compact binary frame: one little-endian record per reading; humidity is NaN when the sensor has none
+SENSOR_FRAME_DTYPE = np.dtype([
+    ('shelf_id', 'S32'), ('timestamp_us', '<i8'), ('temperature_c', '<f4'), ('humidity_pct', '<f4')
+])
+
+
+class SensorReadingBatch(NamedTuple):
+    """Shelf sensor readings as columns, one entry per reading."""
+    shelf_ids: np.ndarray  # str
+    timestamp_us: np.ndarray  # int64, microseconds since 1970-01-01
+    temperature_c: np.ndarray
+    humidity_pct: np.ndarray  # NaN when absent
+
+    def __len__(self) -> int:
+        return len(self.shelf_ids)
+
+
+def batch_from_records(records: Iterable[Dict]) -> SensorReadingBatch:
+    """
+    Builds a batch from dicts with shelf_id, timestamp (ISO 8601), temperature_c and optional
+    humidity_pct. Raises ValueError on a malformed reading.
+    """
+    shelf_ids: List[str] = []
+    timestamps: List[datetime] = []
+    temperatures: List[float] = []
+    humidities: List[float] = []
+    for i, record in enumerate(records):
+        try:
+            shelf_ids.append(str(record['shelf_id']))
+            timestamp = datetime.fromisoformat(record['timestamp'])
+            if timestamp.tzinfo is not None: # Stored as naive local time, like datetime.now()
+                timestamp = timestamp.astimezone().replace(tzinfo=None)
+            timestamps.append(timestamp)
+            temperatures.append(float(record['temperature_c']))
+            humidity = record.get('humidity_pct')
+            humidities.append(np.nan if humidity is None else float(humidity))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid sensor reading at index {i}: {e}") from e
+    return SensorReadingBatch(
+        np.array(shelf_ids, dtype=object),
+        np.array(timestamps, dtype='datetime64[us]').astype(np.int64),
+        np.array(temperatures, dtype=float),
+        np.array(humidities, dtype=float)
+    )
+
+
+def batch_from_json_lines(text: str) -> SensorReadingBatch:
+    """One JSON reading per line (blank lines ignored)."""
+    records = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+    return batch_from_records(records)
+
+
+def batch_from_frame(frame: bytes) -> SensorReadingBatch:
+    """Readings packed back to back as SENSOR_FRAME_DTYPE records."""
+    if len(frame) % SENSOR_FRAME_DTYPE.itemsize:
+        raise ValueError(f"Frame length must be a multiple of {SENSOR_FRAME_DTYPE.itemsize} bytes")
+    records = np.frombuffer(frame, dtype=SENSOR_FRAME_DTYPE)
+    return SensorReadingBatch(
+        np.char.decode(records['shelf_id'], 'utf-8').astype(object),
+        records['timestamp_us'].astype(np.int64),
+        records['temperature_c'].astype(float),
+        records['humidity_pct'].astype(float)
+    )
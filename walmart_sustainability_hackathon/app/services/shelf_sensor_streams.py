@@ -0,0 +1,101 @@
+import numpy as np
+
+US_PER_HOUR = 3600 * 1_000_000
+
+
+class ShelfSensorStream:
+    """
+    Time-indexed readings from one shelf's (or zone's) sensor, shared by everything on the shelf.
+
+    Alongside each reading it keeps the prefix sum `degree_hours[i]`, the integral of temperature
+    over time (°C·h) from the first reading to reading i, treating each reading as holding until the
+    next one. The integral between any two times is then two lookups, so exposure over an
+    instance's stay costs O(1) however many readings the shelf has taken.
+
+    The stream holds at most `max_readings` readings (32 bytes each). It is kept contiguous rather
+    than as a wrap-around ring so lookups by time stay a single binary search: the owner trims the
+    older readings in bulk once it is full (see GreenShelfInventory._make_room), which keeps appends
+    amortized O(1). Indexes are logical: they keep counting up when old readings are trimmed.
+    """
+
+    def __init__(self, capacity: int = 64, max_readings: int = 4096):
+        self.max_readings = max_readings
+        self.offset = 0 # Readings trimmed from the front
+        self.size = 0 # Readings held
+        self.time_us = np.zeros(capacity, dtype=np.int64)
+        self.temperature_c = np.zeros(capacity, dtype=np.float64)
+        self.humidity_pct = np.full(capacity, np.nan, dtype=np.float64)
+        self.degree_hours = np.zeros(capacity, dtype=np.float64)
+
+    def __len__(self) -> int:
+        """Logical length: the index the next reading will get."""
+        return self.offset + self.size
+
+    @property
+    def last_index(self) -> int:
+        return len(self) - 1 # -1 while there are no readings
+
+    def last_time_us(self) -> int:
+        return int(self.time_us[self.size - 1]) if self.size else np.iinfo(np.int64).min
+
+    def index_at(self, time_us: int) -> int:
+        """Index of the reading current at `time_us`; the first reading's for earlier times (and 0 before any)."""
+        i = int(np.searchsorted(self.time_us[:self.size], time_us, side='right')) - 1
+        return self.offset + max(i, 0)
+
+    def _reserve(self, extra: int):
+        if self.size + extra <= len(self.time_us):
+            return
+        capacity = max(min(len(self.time_us) * 2, self.max_readings), self.size + extra)
+        for name in ('time_us', 'temperature_c', 'humidity_pct', 'degree_hours'):
+            old = getattr(self, name)
+            column = np.full(capacity, np.nan if name == 'humidity_pct' else 0, dtype=old.dtype)
+            column[:self.size] = old[:self.size]
+            setattr(self, name, column)
+
+    def extend(self, time_us: np.ndarray, temperature_c: np.ndarray, humidity_pct: np.ndarray) -> int:
+        """
+        Appends readings in time order. Readings older than the latest one held are dropped, since the
+        prefix sums only run forward. Returns how many were appended.
+        """
+        order = np.argsort(time_us, kind='stable')
+        time_us, temperature_c, humidity_pct = time_us[order], temperature_c[order], humidity_pct[order]
+        keep = time_us >= self.last_time_us()
+        time_us, temperature_c, humidity_pct = time_us[keep], temperature_c[keep], humidity_pct[keep]
+        n = len(time_us)
+        if not n:
+            return 0
+        self._reserve(n)
+        start = self.size
+        end = start + n
+        self.time_us[start:end] = time_us
+        self.temperature_c[start:end] = temperature_c
+        self.humidity_pct[start:end] = humidity_pct
+        # Each step adds the previous reading's temperature times the time until this one
+        if start == 0:
+            self.degree_hours[0] = 0.0
+        first = max(start, 1)
+        if end > first:
+            steps = self.temperature_c[first - 1:end - 1] * (np.diff(self.time_us[first - 1:end]) / US_PER_HOUR)
+            self.degree_hours[first:end] = np.cumsum(np.concatenate(([self.degree_hours[first - 1]], steps)))[1:]
+        self.size = end
+        return n
+
+    def trim(self, keep_from: int):
+        """Drops readings before logical index `keep_from` (nothing still referenced should be before it)."""
+        drop = min(max(0, keep_from - self.offset), self.size - 1)
+        if drop <= 0:
+            return
+        for name in ('time_us', 'temperature_c', 'humidity_pct', 'degree_hours'):
+            column = getattr(self, name)
+            column[:self.size - drop] = column[drop:self.size]
+        self.offset += drop
+        self.size -= drop
+
+    def integral_to(self, index: np.ndarray, time_us: np.ndarray) -> np.ndarray:
+        """
+        Temperature integral (°C·h) from the first reading to `time_us`, for times at or after reading
+        `index` (and before the next one). Vectorized over index/time_us.
+        """
+        i = index - self.offset
+        return self.degree_hours[i] + self.temperature_c[i] * ((time_us - self.time_us[i]) / US_PER_HOUR)
@@ -182,4 +182,3 @@ if __name__ == '__main__':
         # ... (print details similarly) ...
     else:
         print(f"No sourcing info found for {banana_sku}/{banana_batch}")
-```
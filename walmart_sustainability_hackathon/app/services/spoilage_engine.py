@@ -0,0 +1,104 @@
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from ..models.greenshelf_models import ProductMasterGS, STATUS_CODES
+
+
+class SpoilageParameters(NamedTuple):
+    """Product master fields the spoilage model needs, one value per interned SKU code."""
+    known: np.ndarray  # False for SKUs without a product master
+    ideal_temp_c: np.ndarray
+    base_shelf_life_days: np.ndarray
+    temp_sensitivity_factor: np.ndarray
+
+
+class SpoilageInputs(NamedTuple):
+    """Per-instance inputs of the spoilage model, in predict_spoilage_days' argument order."""
+    received_day: np.ndarray
+    printed_expiry_day: np.ndarray
+    avg_temp_exposure: np.ndarray
+    ideal_temp_c: np.ndarray
+    base_shelf_life_days: np.ndarray
+    temp_sensitivity_factor: np.ndarray
+
+
+def spoilage_parameters(skus: List[str], product_masters: Dict[str, ProductMasterGS]) -> SpoilageParameters:
+    masters = [product_masters.get(sku) for sku in skus]
+    return SpoilageParameters(
+        known=np.array([master is not None for master in masters], dtype=bool),
+        ideal_temp_c=np.array([master.ideal_temp_c if master else np.nan for master in masters], dtype=float),
+        base_shelf_life_days=np.array([master.base_shelf_life_days if master else np.nan for master in masters], dtype=float),
+        temp_sensitivity_factor=np.array([master.temp_sensitivity_factor if master else np.nan for master in masters], dtype=float)
+    )
+
+
+def average_temperatures(degree_hours: np.ndarray, hours: np.ndarray, current_temperature_c: np.ndarray) -> np.ndarray:
+    """
+    Temperature exposure per instance: the time-weighted average temperature since arrival, or the
+    shelf's current temperature while no time has passed.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(hours > 0, degree_hours / hours, current_temperature_c)
+
+
+def predict_spoilage_days(received_day: np.ndarray, printed_expiry_day: np.ndarray, avg_temp_exposure: np.ndarray,
+                          ideal_temp_c: np.ndarray, base_shelf_life_days: np.ndarray,
+                          temp_sensitivity_factor: np.ndarray, today_day) -> np.ndarray:
+    """
+    Predicted spoilage day (days since 1970-01-01) per instance; the array form of the scalar model.
+    today_day may be one day for all instances or one per instance.
+    """
+    days_since_received = today_day - received_day
+    temp_deviation_from_ideal = np.fmax(0, avg_temp_exposure - ideal_temp_c) # No reading yet (NaN) means no deviation
+    cumulative_days_lost_due_to_temp = days_since_received * temp_deviation_from_ideal * temp_sensitivity_factor
+    effective_shelf_life_days = base_shelf_life_days - cumulative_days_lost_due_to_temp
+    # np.rint rounds half to even, like round()
+    predicted_spoilage_day = received_day + np.maximum(0, np.rint(effective_shelf_life_days)).astype(np.int64)
+    return np.minimum(predicted_spoilage_day, printed_expiry_day) # Never later than the printed expiry
+
+
+def spoilage_status_codes(days_to_predicted_spoilage: np.ndarray) -> np.ndarray:
+    """Status code per instance, with the scalar model's tiers."""
+    return np.select(
+        [
+            days_to_predicted_spoilage < 0,
+            days_to_predicted_spoilage <= 1, # Critical (Today or Tomorrow)
+            days_to_predicted_spoilage <= 3, # Nearing Expiry (2-3 days left)
+            days_to_predicted_spoilage <= 5, # Approaching (4-5 days left)
+        ],
+        [
+            STATUS_CODES["Spoiled"],
+            STATUS_CODES["Critical / Donate"],
+            STATUS_CODES["Nearing Expiry"],
+            STATUS_CODES["Approaching"],
+        ],
+        default=STATUS_CODES["Normal"]
+    ).astype(np.int8)
+
+
+def next_status_change_days(received_day: np.ndarray, printed_expiry_day: np.ndarray, avg_temp_exposure: np.ndarray,
+                            ideal_temp_c: np.ndarray, base_shelf_life_days: np.ndarray,
+                            temp_sensitivity_factor: np.ndarray, today_day: int) -> np.ndarray:
+    """
+    First day after today_day on which each instance moves to a more severe status if its temperature
+    exposure stays as it is, or -1 once it is Spoiled. Days left only shrink as days pass, so statuses
+    never improve on their own; the day is found by bisection between today and the day after the
+    printed expiry, by which point every instance is Spoiled.
+    """
+    def status_on(day: np.ndarray) -> np.ndarray:
+        predicted_spoilage_day = predict_spoilage_days(received_day, printed_expiry_day, avg_temp_exposure, ideal_temp_c,
+                                                       base_shelf_life_days, temp_sensitivity_factor, day)
+        return spoilage_status_codes(predicted_spoilage_day - day)
+
+    lo = np.full(len(received_day), today_day, dtype=np.int64)
+    current = status_on(lo)
+    hi = np.maximum(printed_expiry_day.astype(np.int64) + 1, lo + 1)
+    searching = hi - lo > 1
+    while searching.any():
+        mid = (lo + hi) // 2
+        changed = status_on(mid) != current
+        hi = np.where(searching & changed, mid, hi)
+        lo = np.where(searching & ~changed, mid, lo)
+        searching = hi - lo > 1
+    return np.where(current == STATUS_CODES["Spoiled"], -1, hi)
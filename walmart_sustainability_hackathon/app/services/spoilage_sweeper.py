@@ -0,0 +1,136 @@
+import heapq
+import logging
+import threading
+from datetime import date, datetime
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.greenshelf_models import EPOCH_ORDINAL
+
+logger = logging.getLogger(__name__)
+
+
+def day_start(day: int) -> datetime:
+    """Local midnight starting a day numbered from 1970-01-01; statuses change at these times."""
+    return datetime.combine(date.fromordinal(EPOCH_ORDINAL + day), datetime.min.time())
+
+
+def today_day() -> int:
+    return date.today().toordinal() - EPOCH_ORDINAL
+
+
+class SpoilageSweeper:
+    """
+    Wakes GreenShelf only when an instance is due to move to a more severe spoilage tier.
+
+    Whenever statuses are recomputed, each instance's next change day (spoilage_engine.
+    next_status_change_days) is stored in the inventory's next_status_change_day column and pushed
+    onto a min-heap. sweep() pops the instances due by today and hands them to `recompute`, which
+    updates them (publishing change events) and schedules their next change. Heap entries that no
+    longer match the column are stale and skipped; the heap is rebuilt from the column when they
+    pile up. The background thread sleeps until the earliest due day starts, or at most
+    `max_sleep_seconds`, and is woken early when an earlier change gets scheduled.
+    """
+
+    def __init__(self, inventory, recompute: Callable[[np.ndarray], None], max_sleep_seconds: float = 3600.0):
+        self.inventory = inventory
+        self.recompute = recompute
+        self.max_sleep_seconds = max_sleep_seconds
+        self._heap: List[Tuple[int, int]] = [] # (day, row)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, rows: np.ndarray, next_change_days: np.ndarray):
+        """Records the next status change day of each row (-1 for none)."""
+        column = self.inventory.next_status_change_day
+        with self._lock:
+            changed = np.flatnonzero(column[rows] != next_change_days)
+            rows, days = rows[changed], next_change_days[changed]
+            column[rows] = days
+            earliest = self._heap[0][0] if self._heap else None
+            for day, row in zip(days.tolist(), rows.tolist()):
+                if day >= 0:
+                    heapq.heappush(self._heap, (day, row))
+            if len(self._heap) > 2 * self.inventory.active_count + 1024:
+                self._compact()
+            if self._heap and (earliest is None or self._heap[0][0] < earliest):
+                self._wake.set()
+
+    def _compact(self):
+        rows = self.inventory.active_rows()
+        days = self.inventory.next_status_change_day[rows]
+        scheduled = days >= 0
+        self._heap = list(zip(days[scheduled].tolist(), rows[scheduled].tolist()))
+        heapq.heapify(self._heap)
+
+    def rebuild(self):
+        """Rebuilds the heap from the inventory's next_status_change_day column, e.g. after a restore."""
+        with self._lock:
+            self._compact()
+        self._wake.set()
+
+    def _is_current(self, day: int, row: int) -> bool:
+        return bool(self.inventory.active[row]) and self.inventory.next_status_change_day[row] == day
+
+    def next_due_day(self) -> Optional[int]:
+        with self._lock:
+            while self._heap and not self._is_current(*self._heap[0]):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, day: int) -> np.ndarray:
+        """Rows whose next status change is on or before `day`, taken off the heap."""
+        rows = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= day:
+                due_day, row = heapq.heappop(self._heap)
+                if self._is_current(due_day, row):
+                    rows.append(row)
+        return np.unique(np.array(rows, dtype=np.intp))
+
+    def rows_changing_by(self, day: int) -> np.ndarray:
+        """Active rows whose next status change is on or before `day`, leaving the schedule as it is."""
+        rows = self.inventory.active_rows()
+        days = self.inventory.next_status_change_day[rows]
+        return rows[(days >= 0) & (days <= day)]
+
+    def sweep(self) -> int:
+        """Updates every instance due to change status by today. Returns how many were updated."""
+        rows = self.pop_due(today_day())
+        if len(rows):
+            self.recompute(rows)
+        return len(rows)
+
+    def _seconds_until_due(self) -> float:
+        due_day = self.next_due_day()
+        if due_day is None:
+            return self.max_sleep_seconds
+        seconds = (day_start(due_day) - datetime.now()).total_seconds()
+        return min(max(seconds, 0.0), self.max_sleep_seconds)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                swept = self.sweep()
+                if swept:
+                    logger.info("Spoilage sweeper updated %d instances", swept)
+            except Exception:
+                logger.exception("Spoilage sweep failed")
+            self._wake.wait(self._seconds_until_due())
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="spoilage-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
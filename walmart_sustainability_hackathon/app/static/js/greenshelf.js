@@ -44,8 +44,8 @@ document.addEventListener('DOMContentLoaded', function () {
         storeLayoutDiv.innerHTML = '<p>Loading shelf statuses...</p>';
 
         try {
-            // This endpoint in GreenShelfService already simulates updates before summarizing
-            const response = await fetch(`/api/greenshelf/store/${storeId}/layout_summary?simulate_updates=true`);
+            // refresh=true asks GreenShelfService to simulate sensor updates before summarizing
+            const response = await fetch(`/api/greenshelf/store/${storeId}/layout_summary?refresh=true`);
             if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
             const shelfStatuses = await response.json();
             renderStoreLayout(shelfStatuses);
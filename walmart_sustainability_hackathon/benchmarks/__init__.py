@@ -0,0 +1,2 @@
+# Micro-benchmarks for the service layer. Run from the project root, e.g.:
+#   python -m benchmarks.bench_forecast
@@ -0,0 +1,87 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.services.demand_forecasting_service import DemandForecastingService
+
+HORIZON_DAYS = 90
+RUNS = 200
+
+
+def legacy_forecast_points(model_info, features_df):
+    """The previous row-by-row model application (iterrows), kept here as the baseline."""
+    points = []
+    for idx_date, row in features_df.iterrows():
+        if model_info["type"] == "heuristic_average":
+            base_pred = model_info["daily_averages"].get(idx_date.dayofweek, model_info["overall_average"])
+            base_pred = base_pred * (model_info["monthly_averages"].get(idx_date.month, model_info["overall_average"]) / model_info["overall_average"])
+        else:
+            base_pred = model_info["value"]
+        final_prediction = base_pred
+        final_prediction *= (1 + (row['temperature'] - 15) * 0.005)
+        final_prediction *= (1 + row['precipitation_prob'] * -0.05)
+        final_prediction *= row['event_impact_factor']
+        final_prediction = max(0, final_prediction)
+        confidence_margin = final_prediction * random.uniform(0.1, 0.25)
+        points.append((idx_date.to_pydatetime(), round(final_prediction),
+                       max(0, round(final_prediction - confidence_margin)),
+                       round(final_prediction + confidence_margin)))
+    return points
+
+
+def time_ms(fn, runs=RUNS):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    service = DemandForecastingService()
+    snapshot_dir = tempfile.TemporaryDirectory()
+    service.forecast_snapshot_path = os.path.join(snapshot_dir.name, 'forecast_snapshot.npz')  # Live path first
+    store_id, sku = "Store101", "SKU_DAIRY_MILK1G"
+    service.predict(store_id, sku, HORIZON_DAYS)  # Train the model and warm the history cache
+
+    model_key = f"{store_id}_{sku}"
+    model_info = service.models[model_key]
+    start = date.today() + timedelta(days=1)
+    history = service._get_or_load_historical_sales(store_id, sku)
+    external = service._get_external_data_for_future(sku, store_id, start, HORIZON_DAYS)
+    features_df = service._create_future_features_df(history, start, HORIZON_DAYS, external)
+
+    # Same point predictions either way (only the random confidence margin differs)
+    legacy_units = [units for _, units, _, _ in legacy_forecast_points(model_info, features_df)]
+    vectorized_units = [p.predicted_units for p in service._forecast_points_from_features(model_key, model_info, features_df)]
+    assert legacy_units == vectorized_units
+
+    print(f"--- Demand forecast latency, {HORIZON_DAYS}-day horizon, median / p95 of {RUNS} runs ---")
+    rows = [
+        ("model application, row loop (previous)", lambda: legacy_forecast_points(model_info, features_df)),
+        ("model application, vectorized", lambda: service._forecast_points_from_features(model_key, model_info, features_df)),
+        ("feature construction", lambda: service._create_future_features_df(history, start, HORIZON_DAYS, external)),
+        ("full predict() call", lambda: service.predict(store_id, sku, HORIZON_DAYS)),
+    ]
+    for name, fn in rows:
+        median, p95 = time_ms(fn)
+        print(f"{name:42s} {median:8.3f} ms  p95 {p95:8.3f} ms")
+
+    service.materialize_forecasts([store_id], [sku]).save(service.forecast_snapshot_path)
+    scenario = {"event_impact_multiplier": 1.5, "weather_override": {"temperature_increase_celsius": 5}}
+    rows = [
+        ("predict() from snapshot", lambda: service.predict(store_id, sku, HORIZON_DAYS)),
+        ("predict() from snapshot, with scenario", lambda: service.predict(store_id, sku, HORIZON_DAYS, scenario)),
+    ]
+    for name, fn in rows:
+        median, p95 = time_ms(fn)
+        print(f"{name:42s} {median:8.3f} ms  p95 {p95:8.3f} ms")
+    snapshot_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.models.greenshelf_models import MOCK_PRODUCT_MASTERS_GS
+from app.services.greenshelf_service import GreenShelfService
+from app.services.pricing_service import DynamicPricingService
+
+INSTANCES = 50_000
+RUNS = 5
+
+
+def build_store(instances: int) -> GreenShelfService:
+    """A store with `instances` random batches across the mock shelves and SKUs, statuses computed."""
+    service = GreenShelfService("BenchStore")
+    inventory = service.inventory
+    shelf_ids = list(inventory.shelves.values)
+    rng = random.Random(0)
+    for i in range(instances):
+        master = rng.choice(list(MOCK_PRODUCT_MASTERS_GS.values()))
+        received = date.today() - timedelta(days=rng.randint(0, master.base_shelf_life_days))
+        inventory.add(
+            instance_id=f"{master.sku}_bench{i}", sku=master.sku, product_name=master.name,
+            printed_expiry_date=received + timedelta(days=master.base_shelf_life_days),
+            received_date=received, shelf_id=rng.choice(shelf_ids), quantity=rng.randint(1, 20)
+        )
+    service.recompute_spoilage_statuses()
+    return service
+
+
+def time_ms(fn, runs=RUNS):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    service = build_store(INSTANCES)
+    pricing_service = DynamicPricingService(greenshelf_service=service)
+    rows = service.inventory.active_rows()
+    instances = [service.inventory.view(row) for row in rows.tolist()]
+    demand_factors = np.random.default_rng(0).uniform(0.8, 1.25, len(rows))
+    factor_list = demand_factors.tolist()
+
+    def per_item():
+        return [pricing_service.get_dynamic_price(instance, demand_signal_factor=factor)
+                for instance, factor in zip(instances, factor_list)]
+
+    def bulk():
+        return pricing_service.reprice(rows, demand_factors)
+
+    # Same prices and reasons either way
+    per_item_results = per_item()
+    bulk_result = bulk()
+    assert [r.discount_percentage for r in per_item_results] == bulk_result.discount_percentage.tolist()
+    assert [r.discounted_price for r in per_item_results] == bulk_result.discounted_price.tolist()
+    assert [r.reason for r in per_item_results] == [bulk_result.reason(i) for i in range(len(bulk_result))]
+
+    print(f"--- Store repricing, {len(rows)} instances, median of {RUNS} runs ---")
+    for name, fn in [("per item, get_dynamic_price (previous)", per_item), ("bulk, reprice()", bulk),
+                     ("bulk, reprice() + to_dict()", lambda: bulk().to_dict())]:
+        median = time_ms(fn)
+        print(f"{name:42s} {median:9.1f} ms  {len(rows) / median * 1000:12,.0f} instances/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.greenshelf_models import MOCK_PRODUCT_MASTERS_GS, SensorReading
+from app.services.greenshelf_inventory import GreenShelfInventory
+from app.services.greenshelf_service import GreenShelfService
+
+SHELF_IDS = ["ShelfA1_Dairy", "ShelfA2_Produce", "ShelfB1_Meat", "ShelfC1_Bakery"]
+
+
+def stock(service: GreenShelfService, start: datetime, instances: int = 300, seed: int = 0,
+          prefix: str = "test") -> GreenShelfService:
+    """
+    Adds `instances` batches to the service's store, one every 10 minutes from `start`, each with a
+    reading from its shelf and one from another shelf, moving an earlier batch now and then; every
+    batch of a product whose received date spans its whole shelf life, so all statuses occur.
+    """
+    inventory = service.inventory
+    rng = random.Random(seed)
+    masters = list(MOCK_PRODUCT_MASTERS_GS.values())
+    temperatures = {shelf_id: rng.uniform(0, 8) for shelf_id in SHELF_IDS}
+
+    def reading(shelf_id: str, at: datetime) -> SensorReading:
+        temperatures[shelf_id] = min(max(temperatures[shelf_id] + rng.uniform(-1, 1.5), -2), 25)
+        return SensorReading(at, round(temperatures[shelf_id], 1), round(rng.uniform(40, 70), 1))
+
+    for step in range(instances):
+        at = start + timedelta(minutes=10 * step)
+        master = rng.choice(masters)
+        received = date.today() - timedelta(days=rng.randint(0, master.base_shelf_life_days + 1))
+        shelf_id = rng.choice(SHELF_IDS)
+        inventory.add(
+            instance_id=f"{master.sku}_{prefix}{step}", sku=master.sku, product_name=master.name,
+            printed_expiry_date=received + timedelta(days=master.base_shelf_life_days),
+            received_date=received, shelf_id=shelf_id, quantity=rng.randint(1, 20),
+            current_conditions=reading(shelf_id, at)
+        )
+        other_shelf_id = rng.choice(SHELF_IDS)
+        other = reading(other_shelf_id, at + timedelta(minutes=5))
+        inventory.record_shelf_readings(
+            inventory.add_shelf(other_shelf_id), np.array([np.datetime64(other.timestamp, 'us').astype(np.int64)]),
+            np.array([other.temperature_c]), np.array([other.humidity_pct])
+        )
+        if step % 25 == 24:
+            row = int(rng.choice(inventory.active_rows()))
+            inventory.move(row, rng.choice(SHELF_IDS), at + timedelta(minutes=5))
+    service.recompute_spoilage_statuses()
+    return service
+
+
+def build_store(store_id: str = "TestStore") -> GreenShelfService:
+    """A store of varied batches over the last three days, plus one batch without product master data."""
+    service = GreenShelfService(store_id, inventory=GreenShelfInventory())
+    stock(service, datetime.now() - timedelta(hours=72))
+    service.inventory.add(
+        instance_id="SKU_UNKNOWN_test", sku="SKU_UNKNOWN", product_name="Unknown product",
+        printed_expiry_date=date.today() + timedelta(days=5), received_date=date.today(),
+        shelf_id=SHELF_IDS[0], quantity=1
+    )
+    service.recompute_spoilage_statuses()
+    return service
+
+
+@pytest.fixture
+def store() -> GreenShelfService:
+    return build_store()
@@ -0,0 +1,93 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.greenshelf_inventory import GreenShelfInventory
+from app.services.greenshelf_persistence import GreenShelfPersistence
+from app.services.sensor_ingestion import batch_from_records
+
+from .conftest import SHELF_IDS, build_store, stock
+
+STREAM_COLUMNS = ('time_us', 'temperature_c', 'humidity_pct', 'degree_hours')
+# Recomputed on restore rather than journaled, so only meaningful for instances still in stock
+DERIVED_COLUMNS = ('predicted_spoilage_day', 'status_code', 'next_status_change_day')
+
+
+def assert_same_state(actual: GreenShelfInventory, expected: GreenShelfInventory):
+    assert actual.size == expected.size
+    assert actual.instance_ids == expected.instance_ids
+    assert actual.shelves.values == expected.shelves.values
+    assert actual.skus.values == expected.skus.values
+    assert actual.product_names.values == expected.product_names.values
+    rows = expected.active_rows()
+    np.testing.assert_array_equal(actual.active_rows(), rows)
+    for name in GreenShelfInventory.COLUMNS:
+        actual_column, expected_column = getattr(actual, name)[:actual.size], getattr(expected, name)[:expected.size]
+        if name in DERIVED_COLUMNS:
+            actual_column, expected_column = actual_column[rows], expected_column[rows]
+        np.testing.assert_array_equal(actual_column, expected_column, err_msg=name)
+    assert len(actual.streams) == len(expected.streams)
+    for actual_stream, expected_stream in zip(actual.streams, expected.streams):
+        assert (actual_stream.offset, actual_stream.size) == (expected_stream.offset, expected_stream.size)
+        for name in STREAM_COLUMNS:
+            np.testing.assert_array_equal(getattr(actual_stream, name)[:actual_stream.size],
+                                          getattr(expected_stream, name)[:expected_stream.size], err_msg=name)
+    np.testing.assert_array_equal(actual.shelf_status_counts[:len(actual.shelves)],
+                                  expected.shelf_status_counts[:len(expected.shelves)])
+
+
+def change_stock(service, start: datetime, prefix: str):
+    """Journaled changes of every kind: adds, moves and readings (via stock), bulk readings and removals."""
+    stock(service, start, instances=60, seed=hash(prefix) % 1000, prefix=prefix)
+    service.ingest_sensor_readings(batch_from_records([
+        {"shelf_id": shelf_id, "timestamp": (start + timedelta(hours=12, minutes=i)).isoformat(), "temperature_c": 3.0 + i}
+        for i, shelf_id in enumerate(SHELF_IDS)
+    ]))
+    for instance_id in service.inventory.instance_ids[::17]:
+        service.remove_instance(instance_id)
+
+
+def test_snapshot_plus_journal_restores_exact_state(tmp_path):
+    persistence = GreenShelfPersistence(str(tmp_path), build=build_store)
+    live = persistence.load("TestStore") # Built and snapshotted
+    start = datetime.now() - timedelta(hours=2)
+    change_stock(live, start - timedelta(hours=24), "before")
+    persistence.snapshot("TestStore", live)
+    change_stock(live, start, "after") # Only in the journal
+
+    restored = GreenShelfPersistence(str(tmp_path)).load("TestStore")
+
+    live.recompute_spoilage_statuses() # Restores recompute statuses; bring the live store to the same point
+    assert_same_state(restored.inventory, live.inventory)
+    assert restored.inventory.journal is not None
+
+
+def test_restore_ignores_a_torn_journal_record(tmp_path):
+    persistence = GreenShelfPersistence(str(tmp_path), build=build_store)
+    live = persistence.load("TestStore")
+    change_stock(live, datetime.now() - timedelta(hours=20), "logged")
+    expected = GreenShelfPersistence(str(tmp_path)).load("TestStore").inventory
+    with open(tmp_path / "TestStore" / "inventory.wal", 'ab') as f:
+        f.write(b'\x01\x10\x00\x00\x00partial') # A record cut off by a crash
+
+    restored = GreenShelfPersistence(str(tmp_path)).load("TestStore")
+    assert_same_state(restored.inventory, expected)
+
+
+def test_closed_store_rejects_further_changes(tmp_path):
+    persistence = GreenShelfPersistence(str(tmp_path), build=build_store)
+    live = persistence.load("TestStore")
+    persistence.close("TestStore", live)
+    with pytest.raises(RuntimeError):
+        live.remove_instance(live.inventory.instance_ids[0])
+
+
+@pytest.mark.parametrize("store_id", ["", ".", "..", "Elsewhere"])
+def test_store_ids_outside_the_known_stores_are_rejected(tmp_path, store_id):
+    root = tmp_path / "greenshelf"
+    persistence = GreenShelfPersistence(str(root), build=build_store, store_ids=["TestStore"])
+    with pytest.raises(ValueError):
+        persistence.load(store_id)
+    assert os.listdir(tmp_path) == []
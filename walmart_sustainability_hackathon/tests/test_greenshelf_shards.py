@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app.models.greenshelf_models import STATUS_CODES
+from app.services.greenshelf_shards import GreenShelfShards
+from app.services.pricing_service import DynamicPricingService
+
+from .conftest import build_store
+
+
+def force_status_change(service, row: int):
+    """Moves the row to another status, so the next recompute changes it back and publishes an event."""
+    inventory = service.inventory
+    other = STATUS_CODES["Normal"] if inventory.status_code[row] != STATUS_CODES["Normal"] else STATUS_CODES["Spoiled"]
+    inventory.set_statuses(np.array([row]), np.array([other], dtype=np.int8))
+    service.recompute_spoilage_statuses(np.array([row]))
+
+
+@pytest.fixture
+def shards():
+    shards = GreenShelfShards(loader=build_store, max_workers=0)
+    pricing = DynamicPricingService(greenshelf_service=shards.pin("StoreA"))
+    # As in app/main.py: stores loaded from here on get the same subscriber as the pinned one
+    shards.on_load = lambda store_id, service: pricing.attach(service)
+    return shards
+
+
+def test_lazily_loaded_stores_are_repriced_on_status_changes(shards):
+    store_a, store_b = shards.get("StoreA"), shards.get("StoreB")
+    row = int(store_b.inventory.active_rows()[0])
+    assert np.isnan(store_b.inventory.current_discounted_price[row])
+
+    force_status_change(store_b, row)
+
+    assert not np.isnan(store_b.inventory.current_discounted_price[row])
+    assert np.isnan(store_a.inventory.current_discounted_price[store_a.inventory.active_rows()]).all()
+
+
+def test_reloaded_stores_get_the_subscriber_again(shards):
+    first = shards.get("StoreB")
+    shards.evict("StoreB")
+    reloaded = shards.get("StoreB")
+    assert reloaded is not first
+    assert len(reloaded._subscribers) == 1
+
+    row = int(reloaded.inventory.active_rows()[0])
+    force_status_change(reloaded, row)
+    assert not np.isnan(reloaded.inventory.current_discounted_price[row])
+
+
+def test_failing_on_load_fails_the_load():
+    def on_load(store_id, service):
+        raise RuntimeError("subscriber unavailable")
+
+    shards = GreenShelfShards(loader=build_store, on_load=on_load, max_workers=0)
+    with pytest.raises(RuntimeError):
+        shards.get("StoreB")
+    assert "StoreB" not in shards.resident_services()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from app.services.pricing_service import DynamicPricingService
+
+PRICE_COLUMNS = ("original_price", "current_discount_percentage", "current_discounted_price")
+
+
+@pytest.fixture
+def pricing(store) -> DynamicPricingService:
+    return DynamicPricingService(greenshelf_service=store)
+
+
+def per_item_prices(pricing: DynamicPricingService, rows: np.ndarray, demand_factors):
+    factors = demand_factors.tolist() if isinstance(demand_factors, np.ndarray) else [demand_factors] * len(rows)
+    return [pricing.get_dynamic_price(pricing.greenshelf_service.inventory.view(row), demand_signal_factor=factor)
+            for row, factor in zip(rows.tolist(), factors)]
+
+
+@pytest.mark.parametrize("demand_factors", [None, 0.85, "per_row"])
+def test_reprice_matches_per_item_prices(pricing, demand_factors):
+    inventory = pricing.greenshelf_service.inventory
+    rows = inventory.active_rows()
+    if demand_factors == "per_row":
+        demand_factors = np.random.default_rng(0).uniform(0.8, 1.25, len(rows))
+
+    expected = per_item_prices(pricing, rows, demand_factors)
+    expected_columns = {name: getattr(inventory, name)[rows].copy() for name in PRICE_COLUMNS}
+    for name in PRICE_COLUMNS:
+        getattr(inventory, name)[rows] = np.nan
+    result = pricing.reprice(rows, demand_factors)
+
+    assert result.instance_ids == [r.instance_id for r in expected]
+    assert result.discount_percentage.tolist() == [r.discount_percentage for r in expected]
+    assert result.discounted_price.tolist() == [r.discounted_price for r in expected]
+    assert result.original_price.tolist() == [r.original_price for r in expected]
+    assert [result.reason(i) for i in range(len(result))] == [r.reason for r in expected]
+    assert len({r.reason for r in expected}) > 3 # Several tiers, the standard price and unpriced items
+    for name in PRICE_COLUMNS: # Written back onto the instances the same way
+        np.testing.assert_array_equal(getattr(inventory, name)[rows], expected_columns[name])
+
+
+def test_reprice_defaults_to_every_instance(pricing):
+    inventory = pricing.greenshelf_service.inventory
+    assert pricing.reprice().rows.tolist() == inventory.active_rows().tolist()
+
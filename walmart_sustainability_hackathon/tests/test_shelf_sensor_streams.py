@@ -0,0 +1,97 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.greenshelf_models import SensorReading
+from app.services.greenshelf_inventory import GreenShelfInventory
+from app.services.greenshelf_service import GreenShelfService
+
+from .conftest import SHELF_IDS, stock
+
+START = datetime(2024, 5, 1, 8, 0)
+
+
+def add(inventory: GreenShelfInventory, instance_id: str, shelf_id: str, reading: SensorReading):
+    return inventory.add(
+        instance_id=instance_id, sku="SKU_DAIRY_MILK1G", product_name="Whole Milk (1 Gallon)",
+        printed_expiry_date=date(2024, 5, 13), received_date=date(2024, 5, 1), shelf_id=shelf_id, quantity=1,
+        current_conditions=reading
+    )
+
+
+def record(inventory: GreenShelfInventory, shelf_id: str, hours: float, temperature_c: float):
+    inventory.record_shelf_readings(
+        inventory.add_shelf(shelf_id), np.array([np.datetime64(START + timedelta(hours=hours), 'us').astype(np.int64)]),
+        np.array([temperature_c]), np.array([np.nan])
+    )
+
+
+def test_shelf_reading_is_shared_by_everything_on_the_shelf():
+    inventory = GreenShelfInventory()
+    first = add(inventory, "a", "S", SensorReading(START, 4.0))
+    second = add(inventory, "b", "S", SensorReading(START, 4.0))
+    elsewhere = add(inventory, "c", "T", SensorReading(START, 9.0))
+    stream = inventory.streams[inventory.shelves.code("S")]
+    readings = len(stream)
+    record(inventory, "S", 1, 6.0)
+
+    assert len(stream) == readings + 1 # Stored once, not per instance
+    assert first.current_conditions.temperature_c == second.current_conditions.temperature_c == 6.0
+    assert elsewhere.current_conditions.temperature_c == 9.0
+
+
+def test_exposure_is_time_weighted_from_arrival():
+    inventory = GreenShelfInventory()
+    early = add(inventory, "early", "S", SensorReading(START, 4.0))
+    record(inventory, "S", 1, 6.0)
+    late = add(inventory, "late", "S", SensorReading(START + timedelta(hours=1), 6.0))
+    record(inventory, "S", 4, 10.0)
+
+    assert early.exposure() == pytest.approx((4.0 * 1 + 6.0 * 3, 4.0))
+    assert early.average_temperature_c == pytest.approx(5.5)
+    assert late.average_temperature_c == pytest.approx(6.0)
+    assert early.net_degree_hours_above(5.0) == pytest.approx(2.0)
+
+
+def test_move_keeps_exposure_from_earlier_shelves():
+    inventory = GreenShelfInventory()
+    instance = add(inventory, "a", "S", SensorReading(START, 4.0))
+    record(inventory, "S", 2, 8.0)
+    inventory.move(instance.row, "T", START + timedelta(hours=2))
+    record(inventory, "T", 2, 2.0)
+    record(inventory, "S", 3, 20.0) # No longer on S
+    record(inventory, "T", 5, 2.0)
+
+    assert instance.shelf_id == "T"
+    assert instance.exposure() == pytest.approx((4.0 * 2 + 2.0 * 3, 5.0))
+
+
+def test_older_readings_are_dropped():
+    inventory = GreenShelfInventory()
+    add(inventory, "a", "S", SensorReading(START + timedelta(hours=2), 4.0))
+    shelf_code = inventory.shelves.code("S")
+    kept = inventory.record_shelf_readings(
+        shelf_code, np.array([np.datetime64(START + timedelta(hours=h), 'us').astype(np.int64) for h in (1, 3)]),
+        np.array([9.0, 5.0]), np.array([np.nan, np.nan])
+    )
+    assert kept == 1
+    assert inventory.shelf_conditions(shelf_code).temperature_c == 5.0
+
+
+def test_capped_streams_give_the_same_exposures():
+    def stocked(max_readings: int) -> GreenShelfService:
+        service = GreenShelfService("TestStore", inventory=GreenShelfInventory())
+        for shelf_id in SHELF_IDS:
+            service.inventory.streams[service.inventory.add_shelf(shelf_id)].max_readings = max_readings
+        return stock(service, START, instances=200)
+
+    capped, uncapped = stocked(16), stocked(100_000)
+    assert max(stream.size for stream in capped.inventory.streams) <= 16
+    assert max(stream.size for stream in uncapped.inventory.streams) > 16
+
+    rows = capped.inventory.active_rows()
+    np.testing.assert_array_equal(rows, uncapped.inventory.active_rows())
+    for actual, expected in zip(capped.inventory.exposures(rows), uncapped.inventory.exposures(rows)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-9)
+    np.testing.assert_array_equal(capped.inventory.status_code[rows], uncapped.inventory.status_code[rows])
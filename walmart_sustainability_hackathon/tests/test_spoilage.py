@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.models.greenshelf_models import STATUS_CODES
+
+
+def test_recompute_matches_per_instance_model(store):
+    inventory = store.inventory
+    rows = inventory.active_rows()
+    for row in rows.tolist():
+        store.update_product_spoilage_status(inventory.view(row))
+    expected_days = inventory.predicted_spoilage_day[rows].copy()
+    expected_statuses = inventory.status_code[rows].copy()
+    assert len(np.unique(expected_statuses)) >= 4 # The store covers most tiers
+
+    known = expected_statuses != STATUS_CODES["Error: Missing Product Info"] # Neither path predicts a day for these
+    inventory.predicted_spoilage_day[rows[known]] = 0
+    inventory.set_statuses(rows, np.full(len(rows), STATUS_CODES["Normal"], dtype=np.int8))
+    store.recompute_spoilage_statuses()
+
+    np.testing.assert_array_equal(inventory.predicted_spoilage_day[rows[known]], expected_days[known])
+    np.testing.assert_array_equal(inventory.status_code[rows], expected_statuses)
+
+
+def test_recompute_flags_missing_product_master(store):
+    instance = store.get_instance_by_id("SKU_UNKNOWN_test")[0]
+    assert instance.status == "Error: Missing Product Info"
+    store.update_product_spoilage_status(instance)
+    assert instance.status == "Error: Missing Product Info"
+
+
+def test_recompute_of_some_rows_leaves_others_alone(store):
+    inventory = store.inventory
+    rows = inventory.active_rows()
+    before = inventory.predicted_spoilage_day[rows].copy()
+    inventory.predicted_spoilage_day[rows[1:]] = 0
+    store.recompute_spoilage_statuses(rows[:1])
+    assert inventory.predicted_spoilage_day[rows[0]] == before[0]
+    assert not inventory.predicted_spoilage_day[rows[1:]].any()
+
+
+def test_status_histograms_follow_recompute(store):
+    inventory = store.inventory
+    store.recompute_spoilage_statuses()
+    rows = inventory.active_rows()
+    counts = np.zeros_like(inventory.shelf_status_counts)
+    np.add.at(counts, (inventory.shelf_code[rows], inventory.status_code[rows]), 1)
+    np.testing.assert_array_equal(inventory.shelf_status_counts, counts)